@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from '../hooks/useAuth';
 import { apiClient } from '../lib/api';
 import { toast } from 'sonner';
@@ -13,6 +13,9 @@ import { Label } from './ui/label';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Badge } from './ui/badge';
 
+// 自动暂存窗口（毫秒）：窗口内编辑过的QA对合并为一次批量暂存
+const AUTO_SAVE_INTERVAL = 3000;
+
 // 子组件：QA卡片
 function EditorQACard({ qa, onEdit, onDelete, onMarkCorrect, isEditing, editData, setEditData, onSave, onCancel, saving, isReadOnly }) {
   const handleFormChange = (field, value) => {
@@ -99,7 +102,14 @@ export function CollaborationTaskEditor({ task, onBack }) {
   const [taskInfo, setTaskInfo] = useState(null);
   const [editingId, setEditingId] = useState(null);
   const [editForm, setEditForm] = useState({ prompt: '', completion: '' });
-  
+  // 相邻页的分页游标：翻到上一页/下一页时按游标定位，深翻页不再使用 OFFSET
+  const pageCursorsRef = useRef({});
+  // 自动暂存队列：编辑中的QA对按ID去重，每个窗口合并为一次批量请求
+  const pendingDraftsRef = useRef(new Map());
+  const autoSavedIdsRef = useRef(new Set());
+  const autoSaveTimerRef = useRef(null);
+  const autoSavePromiseRef = useRef(Promise.resolve());
+
   const getLocalStorageKey = useCallback(() => `collab_editor_hidden_${user?.id}_${task?.id}`, [user, task]);
   
     useEffect(() => {
@@ -162,7 +172,9 @@ export function CollaborationTaskEditor({ task, onBack }) {
     }
     try {
       setLoading(true);
-      const response = await apiClient.getCollaborationTaskEditorData(task.id, { page, per_page: itemsPerPage });
+      const cursor = pageCursorsRef.current[page];
+      const params = cursor ? { cursor, per_page: itemsPerPage } : { page, per_page: itemsPerPage };
+      const response = await apiClient.getCollaborationTaskEditorData(task.id, params);
       if (response.success) {
         const pairs = response.data.qa_pairs || [];
         const pairsWithReviewFlag = pairs.map(p => ({
@@ -172,8 +184,15 @@ export function CollaborationTaskEditor({ task, onBack }) {
         setQaPairs(pairsWithReviewFlag);
         setAssignmentInfo(response.data.assignment_info);
         setTaskInfo(response.data.task_info);
-        setTotalPages(response.data.pagination?.pages || 1);
-        setTotalItems(response.data.pagination?.total || 0);
+        const pagination = response.data.pagination || {};
+        // 游标分页不返回总数，沿用按页码加载时得到的总数
+        if (pagination.total !== undefined) {
+          setTotalPages(pagination.pages || 1);
+          setTotalItems(pagination.total || 0);
+        }
+        pageCursorsRef.current = {};
+        if (pagination.next_cursor) pageCursorsRef.current[page + 1] = pagination.next_cursor;
+        if (pagination.prev_cursor) pageCursorsRef.current[page - 1] = pagination.prev_cursor;
         setCurrentPage(page);
       } else {
         toast.error(`获取QA对失败: ${response.error.message}`);
@@ -190,6 +209,49 @@ export function CollaborationTaskEditor({ task, onBack }) {
     fetchEditorData(currentPage);
   }, [fetchEditorData, currentPage]);
 
+  // 发送队列中的自动暂存；请求串行发送，保证同一QA对的内容按顺序写入
+  const flushAutoSave = useCallback(() => {
+    clearTimeout(autoSaveTimerRef.current);
+    autoSaveTimerRef.current = null;
+    autoSavePromiseRef.current = autoSavePromiseRef.current.then(async () => {
+      const pending = pendingDraftsRef.current;
+      if (pending.size === 0) return;
+      pendingDraftsRef.current = new Map();
+      const drafts = [...pending.values()];
+      try {
+        const response = await apiClient.saveDraftsBatch(task.id, drafts, true);
+        if (!response.success) throw new Error(response.error.message);
+        drafts.forEach(draft => autoSavedIdsRef.current.add(draft.qa_pair_id));
+      } catch (error) {
+        // 未被更新内容覆盖的草稿放回队列，随下一次暂存重试
+        drafts.forEach(draft => {
+          if (!pendingDraftsRef.current.has(draft.qa_pair_id)) pendingDraftsRef.current.set(draft.qa_pair_id, draft);
+        });
+        console.error('自动暂存失败:', error);
+      }
+    });
+    return autoSavePromiseRef.current;
+  }, [task.id]);
+
+  const queueAutoSave = useCallback((qaPairId, prompt, completion) => {
+    pendingDraftsRef.current.set(qaPairId, { qa_pair_id: qaPairId, prompt, completion });
+    if (!autoSaveTimerRef.current) {
+      autoSaveTimerRef.current = setTimeout(flushAutoSave, AUTO_SAVE_INTERVAL);
+    }
+  }, [flushAutoSave]);
+
+  useEffect(() => {
+    if (!editingId || !editForm.prompt.trim() || !editForm.completion.trim()) return;
+    const qa = qaPairs.find(p => p.id === editingId);
+    const changed = qa && (qa.prompt !== editForm.prompt || qa.completion !== editForm.completion);
+    if (changed || autoSavedIdsRef.current.has(editingId)) {
+      queueAutoSave(editingId, editForm.prompt, editForm.completion);
+    }
+  }, [editForm, editingId, qaPairs, queueAutoSave]);
+
+  // 离开编辑器时发送剩余的自动暂存
+  useEffect(() => () => { flushAutoSave(); }, [flushAutoSave]);
+
   const startEdit = (qaPair) => {
     if (assignmentInfo?.status === 'completed' || assignmentInfo?.status === 'overdue') {
       toast.warning(`任务已${assignmentInfo?.status === 'completed' ? '提交' : '逾期'}，无法编辑`);
@@ -200,8 +262,18 @@ export function CollaborationTaskEditor({ task, onBack }) {
   };
 
   const cancelEdit = () => {
+    const qaPairId = editingId;
+    const original = qaPairs.find(p => p.id === qaPairId);
     setEditingId(null);
     setEditForm({ prompt: '', completion: '' });
+    pendingDraftsRef.current.delete(qaPairId);
+    // 取消编辑时撤销本次编辑已自动暂存的内容
+    autoSavePromiseRef.current.then(() => {
+      if (original && autoSavedIdsRef.current.delete(qaPairId)) {
+        queueAutoSave(qaPairId, original.prompt, original.completion);
+        flushAutoSave();
+      }
+    });
   };
 
   const saveEdit = async (qaPairId) => {
@@ -211,6 +283,10 @@ export function CollaborationTaskEditor({ task, onBack }) {
     }
     setSaving(true);
     try {
+      // 显式暂存覆盖队列中的自动暂存，并等待已发出的自动暂存完成，避免旧内容后写入
+      pendingDraftsRef.current.delete(qaPairId);
+      await autoSavePromiseRef.current;
+      autoSavedIdsRef.current.delete(qaPairId);
       const response = await apiClient.saveDraft(task.id, {
         qa_pair_id: qaPairId,
         prompt: editForm.prompt.trim(),
@@ -259,6 +335,7 @@ export function CollaborationTaskEditor({ task, onBack }) {
     if (window.confirm('确定要提交任务吗？所有暂存的修改和删除都将生效，提交后无法再次修改。')) {
       setSubmitting(true);
       try {
+        await flushAutoSave();
         const response = await apiClient.submitCollaborationTaskAssignment(task.id);
         if (response.success) {
           toast.success('任务提交成功！');
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from '../hooks/useAuth';
 import { apiClient } from '../lib/api';
 import { toast } from 'sonner';
@@ -95,6 +95,8 @@ export function CollaborationTaskSummary({ task, onBack }) {
   const [saving, setSaving] = useState(false);
   const [showAll, setShowAll] = useState(false);
   const itemsPerPage = 5;
+  // 相邻页与当前页的游标，翻页时按游标加载，不再用 OFFSET 跳过前面的行
+  const pageCursorsRef = useRef({});
 
   const getLocalStorageKey = useCallback(() => `collab_hidden_${user?.id}_${task?.id}`, [user, task]);
   
@@ -137,9 +139,20 @@ export function CollaborationTaskSummary({ task, onBack }) {
   const fetchData = useCallback(async (page = 1) => {
     setLoading(true);
     try {
-      const res = await apiClient.getCollaborationTaskSummaryData(task.id, { page, per_page: itemsPerPage });
+      const cursor = pageCursorsRef.current[page];
+      const params = cursor ? { cursor, per_page: itemsPerPage } : { page, per_page: itemsPerPage };
+      const res = await apiClient.getCollaborationTaskSummaryData(task.id, params);
       if (res.success) {
-        setSummaryData(res.data); // 后端返回的数据结构正好是我们需要的
+        const pagination = res.data.pagination || {};
+        // 游标分页不返回总数，沿用按页码加载时得到的总数
+        setSummaryData(prev => pagination.total !== undefined ? res.data : {
+          ...res.data,
+          pagination: { ...pagination, total: prev?.pagination.total, pages: prev?.pagination.pages }
+        });
+        pageCursorsRef.current = {};
+        if (cursor) pageCursorsRef.current[page] = cursor;
+        if (pagination.next_cursor) pageCursorsRef.current[page + 1] = pagination.next_cursor;
+        if (pagination.prev_cursor) pageCursorsRef.current[page - 1] = pagination.prev_cursor;
         setCurrentPage(page);
       } else {
         throw new Error(res.error?.message || '获取汇总数据失败');
@@ -26,6 +26,7 @@ function TaskCard({ task, user, onAssign, onSummary, onEdit, onDelete, onExport
         }
         
         switch (taskStatus) {
+            case 'importing': return { text: '导入中', color: 'text-orange-600', bg: 'bg-orange-100', icon: Clock };
             case 'draft': return { text: '草稿', color: 'text-gray-600', bg: 'bg-gray-100', icon: FileText };
             case 'in_progress': return { text: '进行中', color: 'text-blue-600', bg: 'bg-blue-100', icon: Clock };
             case 'completed': return { text: '已完成', color: 'text-green-600', bg: 'bg-green-100', icon: CheckCircle };
@@ -323,7 +324,7 @@ export function CollaborationTasks() {
                                 <div className="grid grid-cols-4 items-center gap-4"><Label htmlFor="title" className="text-right">标题 *</Label><Input id="title" value={createForm.title} onChange={(e) => setCreateForm(p => ({ ...p, title: e.target.value }))} className="col-span-3" required /></div>
                                 <div className="grid grid-cols-4 items-center gap-4"><Label htmlFor="description" className="text-right">描述</Label><Textarea id="description" value={createForm.description} onChange={(e) => setCreateForm(p => ({ ...p, description: e.target.value }))} className="col-span-3" /></div>
                                 <div className="grid grid-cols-4 items-center gap-4"><Label htmlFor="deadline" className="text-right">截止时间</Label><Input id="deadline" type="datetime-local" value={createForm.deadline} onChange={(e) => setCreateForm(p => ({ ...p, deadline: e.target.value }))} className="col-span-3" /></div>
-                                <div className="grid grid-cols-4 items-center gap-4"><Label htmlFor="file" className="text-right">文件 *</Label><Input id="file" type="file" accept=".jsonl" onChange={(e) => setCreateForm(p => ({ ...p, file: e.target.files[0] }))} className="col-span-3" required /></div>
+                                <div className="grid grid-cols-4 items-center gap-4"><Label htmlFor="file" className="text-right">文件 *</Label><Input id="file" type="file" accept=".jsonl,.jsonl.gz,.jsonl.bz2,.jsonl.xz" onChange={(e) => setCreateForm(p => ({ ...p, file: e.target.files[0] }))} className="col-span-3" required /></div>
                                 <DialogFooter><Button type="submit">创建任务</Button></DialogFooter>
                             </form>
                         </DialogContent>
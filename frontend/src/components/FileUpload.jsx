@@ -162,7 +162,7 @@ export function FileUpload({ onFileSelect, accept = '.jsonl', maxSize = 10 * 102
                   文件格式：每行一个JSON对象，包含 "prompt" 和 "completion" 字段
                 </p>
                 <div className="space-y-2 text-sm text-gray-500">
-                  <p>支持的格式：.jsonl</p>
+                  <p>支持的格式：{accept.split(',').join(' ')}</p>
                   <p>最大文件大小：{(maxSize / 1024 / 1024).toFixed(1)}MB</p>
                 </div>
               </div>
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useAuth } from '../hooks/useAuth';
 import { apiClient } from '../lib/api';
 import { toast } from 'sonner';
@@ -15,7 +15,46 @@ import {
   X
 } from 'lucide-react';
 
-export function NotificationCenter({ isOpen, onClose }) {
+// 订阅通知事件流，断开后 3 秒重连；enabled 为 false 时不建立连接。
+// 返回事件流是否可用，服务端未启用事件流（503）时返回 false，由调用方改为定期查询
+function useNotificationStream(enabled, onEvent) {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+  const [available, setAvailable] = useState(true);
+
+  useEffect(() => {
+    if (!enabled) return;
+    const controller = new AbortController();
+    let retryTimer = null;
+
+    const connect = async () => {
+      try {
+        await apiClient.streamNotifications((event, data) => handlerRef.current(event, data), controller.signal);
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        if (error.status === 503) {
+          setAvailable(false);
+          return;
+        }
+        console.error('通知连接中断:', error);
+      }
+      if (!controller.signal.aborted) {
+        retryTimer = setTimeout(connect, 3000);
+      }
+    };
+    connect();
+
+    return () => {
+      controller.abort();
+      clearTimeout(retryTimer);
+    };
+  }, [enabled]);
+
+  return available;
+}
+
+// subscribeToStream 由 NotificationBell 传入，面板与铃铛共用同一个事件流连接
+export function NotificationCenter({ isOpen, onClose, subscribeToStream }) {
   const { user } = useAuth();
   const [notifications, setNotifications] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
@@ -47,33 +86,24 @@ export function NotificationCenter({ isOpen, onClose }) {
     }
   }, [user, filter]);
 
-  // 获取未读通知数量
-  const fetchUnreadCount = useCallback(async () => {
-    if (!user) return;
-    
-    try {
-      const response = await apiClient.getUnreadNotificationCount();
-      if (response.success) {
-        setUnreadCount(response.data.unread_count || 0);
-      }
-    } catch (error) {
-      console.error('获取未读通知数量失败:', error);
-    }
-  }, [user]);
-
   useEffect(() => {
     if (isOpen) {
       fetchNotifications();
     }
   }, [isOpen, fetchNotifications]);
 
+  // 面板打开期间实时接收新通知与未读数量
   useEffect(() => {
-    // 定期获取未读通知数量
-    const interval = setInterval(fetchUnreadCount, 30000); // 每30秒检查一次
-    fetchUnreadCount();
-    
-    return () => clearInterval(interval);
-  }, [fetchUnreadCount]);
+    if (!isOpen || !subscribeToStream) return;
+    return subscribeToStream((event, data) => {
+      if (event === 'notification') {
+        setNotifications(prev => [data.notification, ...prev.filter(n => n.id !== data.notification.id)]);
+        setUnreadCount(data.unread_count);
+      } else if (event === 'unread_count') {
+        setUnreadCount(data.unread_count);
+      }
+    });
+  }, [isOpen, subscribeToStream]);
 
   // 标记通知为已读
   const markAsRead = async (notificationId) => {
@@ -302,16 +332,35 @@ export function NotificationBell() {
     }
   }, [user]);
 
+  // 打开的通知面板通过 subscribeToStream 接收同一连接上的事件
+  const streamListenersRef = useRef(new Set());
+  const subscribeToStream = useCallback((listener) => {
+    streamListenersRef.current.add(listener);
+    return () => streamListenersRef.current.delete(listener);
+  }, []);
+
+  // 未读数量由服务端推送，连接建立时即收到当前数量
+  const streamAvailable = useNotificationStream(Boolean(user), (event, data) => {
+    if (event === 'notification' || event === 'unread_count') {
+      setUnreadCount(data.unread_count);
+    }
+    streamListenersRef.current.forEach(listener => listener(event, data));
+  });
+
   useEffect(() => {
-    // 定期获取未读通知数量
+    if (streamAvailable) return;
+    // 服务端未启用事件流时，定期获取未读通知数量
     const interval = setInterval(fetchUnreadCount, 30000); // 每30秒检查一次
     fetchUnreadCount();
-    
+
+    return () => clearInterval(interval);
+  }, [streamAvailable, fetchUnreadCount]);
+
+  useEffect(() => {
     const handleRefresh = () => fetchUnreadCount();
     window.addEventListener('refresh-notifications', handleRefresh);
     
     return () => {
-      clearInterval(interval);
       window.removeEventListener('refresh-notifications', handleRefresh);
     };
   }, [fetchUnreadCount]);
@@ -334,6 +383,7 @@ export function NotificationBell() {
       <NotificationCenter 
         isOpen={showNotifications}
         onClose={() => setShowNotifications(false)}
+        subscribeToStream={subscribeToStream}
       />
     </>
   );
@@ -302,7 +302,7 @@ export function SingleFileEditor({ onSessionSave, currentSession, onBackToUpload
             <CardTitle className="flex items-center gap-2"><Upload className="w-5 h-5" />文件上传</CardTitle>
             <CardDescription>选择JSONL格式的文件开始编辑。文件中每行应包含一个JSON对象，包含prompt和completion字段。</CardDescription>
           </CardHeader>
-          <CardContent><FileUpload onFileSelect={handleFileSelect}/></CardContent>
+          <CardContent><FileUpload onFileSelect={handleFileSelect} accept={isGuestMode ? '.jsonl' : '.jsonl,.jsonl.gz,.jsonl.bz2,.jsonl.xz'}/></CardContent>
         </Card>
         {loading && (<Card className="mt-4"><CardContent className="p-8 text-center"><div className="flex items-center justify-center gap-3"><div className="animate-spin rounded-full h-6 w-6 border-b-2 border-blue-600"></div><span className="text-gray-600">{isGuestMode ? '解析文件中...' : '上传文件中...'}</span></div></CardContent></Card>)}
         {error && (<Alert variant="destructive" className="mt-4"><AlertCircle className="h-4 w-4" /><AlertDescription>{error}</AlertDescription></Alert>)}
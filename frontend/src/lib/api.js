@@ -90,7 +90,7 @@ class ApiClient {
   
   // --- 文件和会话管理 ---
   async getSessionHistory() { return this.request('/files/history'); }
-  async uploadFile(file) { const formData = new FormData(); formData.append("file", file); return this.request("/files/upload", { method: "POST", body: formData }); }
+  async uploadFile(file) { return this.request(`/files/upload?filename=${encodeURIComponent(file.name)}`, { method: "POST", body: file, headers: this.getHeaders("application/x-ndjson") }); }
   async getFile(fileId) { return this.request(`/files/${fileId}`); }
   async renameFile(fileId, newName) { return this.request(`/files/${fileId}/rename`, { method: 'PUT', body: JSON.stringify({ new_name: newName }) }); }
   async deleteFile(fileId) { return this.request(`/files/${fileId}`, { method: "DELETE" }); }
@@ -112,6 +112,9 @@ class ApiClient {
   async deleteCollaborationTask(taskId) { return this.request(`/collaboration-tasks/${taskId}`, { method: "DELETE" }); }
   async saveDraft(taskId, draftData) {
     return this.request(`/collaboration-tasks/${taskId}/draft`, { method: "POST", body: JSON.stringify(draftData) });
+}
+  async saveDraftsBatch(taskId, drafts, isAutoSaved = false) {
+    return this.request(`/collaboration-tasks/${taskId}/drafts/batch`, { method: "POST", body: JSON.stringify({ drafts, is_auto_saved: isAutoSaved }) });
 }
   async deleteCollaborationQAPair(taskId, qaPairId) {
     return this.request(`/collaboration-tasks/${taskId}/qa-pairs/${qaPairId}`, { method: 'DELETE' });
@@ -120,6 +123,8 @@ class ApiClient {
     const q = new URLSearchParams({ format }).toString();
     return this.request(`/collaboration-tasks/${taskId}/export?${q}`, { method: "GET" });
 }
+  async createExportJob(taskId, format = 'jsonl', kind = 'edited') { return this.request(`/collaboration-tasks/${taskId}/export-jobs`, { method: "POST", body: JSON.stringify({ format, kind }) }); }
+  async getExportJob(jobId) { return this.request(`/export-jobs/${jobId}`); }
   async getCollaborationTaskSummaryData(taskId, params = {}) { const q = new URLSearchParams(params).toString(); return this.request(`/collaboration-tasks/${taskId}/summary-data?${q}`); }
   async getCollaborationTaskProgress(taskId) { return this.request(`/collaboration-tasks/${taskId}/progress`); }
   async updateSummaryItem(taskId, qaPairId, data) { return this.request(`/collaboration-tasks/${taskId}/summary/${qaPairId}`, { method: "PUT", body: JSON.stringify(data) }); }
@@ -129,6 +134,45 @@ class ApiClient {
   async markNotificationAsRead(notificationId) { return this.request(`/notifications/${notificationId}/read`, { method: "PUT" }); }
   async markAllNotificationsAsRead() { return this.request("/notifications/mark-all-read", { method: "PUT" }); }
   async getUnreadNotificationCount() { return this.request("/notifications/unread-count"); }
+
+  // 订阅通知事件流（SSE）。用 fetch 读取而不是 EventSource，以便通过请求头携带令牌；
+  // 连接结束或出错时返回的 Promise 结束，由调用方决定是否重连；服务端未启用事件流时抛出 status 为 503 的错误
+  async streamNotifications(onEvent, signal) {
+    const response = await fetch(`${API_BASE_URL}/notifications/stream`, {
+      headers: this.getHeaders(null),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      const error = new Error(`通知连接失败: ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = "message";
+        const dataLines = [];
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+        }
+        if (dataLines.length) {
+          onEvent(event, JSON.parse(dataLines.join("\n")));
+        }
+      }
+    }
+  }
 }
 
 export const apiClient = new ApiClient();
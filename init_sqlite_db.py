@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 load_dotenv()
 
 from src.main import create_app, db
+from src.utils.migrations import upgrade_database
 from src.models.user import User
 from src.models.admin_group import AdminGroup
 from src.models.user_group import UserGroup
@@ -33,6 +34,7 @@ def init_database():
             notification, file, qa_pair
         )
         db.create_all()
+        upgrade_database(db.engine)
         print("新表已成功创建。")
 
         # 检查是否需要填充初始数据
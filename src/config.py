@@ -15,6 +15,15 @@ class Config:
         "pool_pre_ping": True,
         "pool_recycle": 300,
     }
+    # SQLite 连接参数，通过 connect 事件在每个新连接上执行；使用其他数据库时忽略，置空则使用默认值
+    SQLITE_PRAGMAS = {
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT") or 5000),  # 等待写锁的毫秒数
+        "journal_mode": "WAL",  # 读写互不阻塞
+        "synchronous": "NORMAL",  # WAL 模式下仅在检查点时 fsync，断电最多丢失最近的事务
+        "cache_size": -64000,  # 页缓存，负数单位为KB（约64MB）
+        "mmap_size": 256 * 1024 * 1024,  # 内存映射读取的最大字节数
+        "temp_store": "MEMORY",  # 排序、临时表放在内存中
+    }
     
     # JWT配置
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or SECRET_KEY
@@ -24,11 +33,65 @@ class Config:
     # Redis配置
     REDIS_URL = os.environ.get("REDIS_URL") or "redis://localhost:6379/0"
     
+    # 草稿写缓冲：自动暂存先写入 Redis，定期合并为批量 upsert 写入数据库
+    DRAFT_BUFFER_BACKEND = os.environ.get("DRAFT_BUFFER_BACKEND") or None  # redis 或 memory（进程内，仅限单进程与测试），为空时直接写数据库
+    DRAFT_BUFFER_FLUSH_INTERVAL = 5  # 缓冲刷写间隔（秒），0表示只在显式保存与提交时刷写
+    DRAFT_BUFFER_LOCK_TIMEOUT = 60  # 同一用户草稿刷写与提交互斥锁的超时（秒）
+    
+    # 会话活动记录：心跳与草稿保存只更新 Redis 中的活动记录，定期批量写入数据库
+    SESSION_TRACKER_BACKEND = os.environ.get("SESSION_TRACKER_BACKEND") or None  # redis 或 memory（进程内，仅限单进程与测试），为空时每次活动直接写数据库
+    SESSION_TRACKER_FLUSH_INTERVAL = 30  # 活动写入数据库的间隔（秒），会话开始与结束时也会写入
+    
+    # 通知事件流（SSE）：redis 通过 pub/sub 在Worker进程间广播，memory 只在本进程内推送（仅限单进程与测试）；
+    # 为空时不提供事件流，前端改为定期查询未读数量
+    NOTIFICATION_PUBSUB_BACKEND = os.environ.get("NOTIFICATION_PUBSUB_BACKEND") or None
+    NOTIFICATION_STREAM_KEEPALIVE = 15  # 无事件时发送保活注释的间隔（秒）
+    NOTIFICATION_STREAM_MAX_DURATION = 300  # 单个事件流连接的最长时间（秒），到期后客户端自动重连
+    NOTIFICATION_STREAM_QUEUE_SIZE = 100  # 每个连接待发送事件的上限，客户端过慢时丢弃多余事件
+    
+    # 未读通知计数：创建、标记已读时更新缓存中的计数，未读数量接口只读缓存；设置了 REDIS_URL 时默认使用 Redis
+    # redis 或 memory（进程内LRU，仅限单进程与测试），为空时直接按索引 COUNT 查询
+    UNREAD_COUNTER_BACKEND = os.environ.get("UNREAD_COUNTER_BACKEND") or ("redis" if os.environ.get("REDIS_URL") else None)
+    UNREAD_COUNTER_MAX_SIZE = 10000  # memory 后端最多缓存的用户数（LRU）
+    UNREAD_COUNTER_TTL = 24 * 60 * 60  # redis 后端计数的过期时间（秒）
+    UNREAD_COUNTER_RECONCILE_INTERVAL = 300  # 与数据库对账的间隔（秒），0表示不对账
+    
     # 文件上传配置
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
     EXPORT_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "exports")
     MAX_CONTENT_LENGTH = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 分块上传建议的分块大小，更大的文件通过 /uploads 接口分块上传
     ALLOWED_EXTENSIONS = {"jsonl", "json"}
+    ALLOWED_COMPRESSIONS = {"gz", "bz2", "xz"}  # 允许上传的压缩格式，如 data.jsonl.gz
+    INGEST_CHUNK_SIZE = 5000  # 流式导入时每批写入的QA对数量
+    INGEST_PARALLEL_THRESHOLD = 64 * 1024 * 1024  # 超过此大小的文件使用多进程分片解析
+    INGEST_SHARD_SIZE = 8 * 1024 * 1024  # 分片解析时每个字节区间的大小
+    INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS") or 0)  # 解析进程数（每个Worker进程共用一个进程池），0表示使用CPU核数
+    INGEST_ASYNC_ENABLED = True  # 协作任务上传后在后台导入，接口立即返回202
+    INGEST_JOB_TIMEOUT = 2 * 60 * 60  # 导入任务超过此时间（秒）仍未结束时由定期清理记为失败（Worker 重启或崩溃）
+    EXPORT_BATCH_SIZE = 2000  # 流式导出时每批读取的QA对数量
+    DRAFT_BATCH_MAX_SIZE = 500  # 批量暂存草稿接口单次请求允许的最大草稿数
+    EXPORT_SPOOL_MAX_SIZE = 16 * 1024 * 1024  # Excel导出在内存中缓冲的上限，超过后写入临时文件
+    EXPORT_CACHE_ENABLED = True  # 按文件版本缓存导出结果到 EXPORT_FOLDER，并支持 ETag 条件请求
+    EXPORT_JOB_TTL = 60 * 60  # 后台导出结果的下载令牌有效期（秒），过期后文件由定期清理删除
+    EXPORT_CACHE_MAX_AGE = 24 * 60 * 60  # 导出缓存文件的最长保留时间（秒）
+    
+    # 文件下载卸载配置：x-sendfile 或 x-accel-redirect，由前端代理直接发送文件
+    FILE_OFFLOAD_MODE = os.environ.get("FILE_OFFLOAD_MODE") or None
+    X_ACCEL_REDIRECT_PREFIX = "/protected"  # nginx internal location 前缀，下设 exports/、uploads/、static/
+    FILE_OFFLOAD_LOCATIONS = {}  # 自定义 {本地目录: 内部URI前缀}，为空时按 X_ACCEL_REDIRECT_PREFIX 生成
+    
+    # 响应压缩配置：按 Accept-Encoding 对JSON/文本响应进行 gzip/deflate 压缩
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "1") != "0"  # 前端代理已负责压缩时可关闭
+    COMPRESS_MIN_SIZE = 1024  # 小于该字节数的响应不压缩
+    COMPRESS_LEVEL = 6  # 压缩级别 1-9，越大压缩率越高、CPU开销越大
+    COMPRESS_MIMETYPES = [
+        "application/json", "application/jsonl", "text/html", "text/plain",
+        "text/css", "text/csv", "application/javascript"
+    ]
+    
+    # 后台任务配置
+    BACKGROUND_WORKERS = 2  # 后台线程池大小
     
     # CORS配置
     CORS_ORIGINS = ["http://localhost:5173"]
@@ -49,6 +112,13 @@ class Config:
     LOG_LEVEL = os.environ.get("LOG_LEVEL") or "INFO"
     LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "app.log")
     
+    # SQL统计配置：按请求统计语句数与耗时，记录慢查询与 N+1 告警
+    SQL_INSTRUMENTATION_ENABLED = os.environ.get("SQL_INSTRUMENTATION_ENABLED", "1") != "0"
+    # 是否在响应中输出 Server-Timing 头（语句数与耗时对所有客户端可见），默认只在开发与测试环境开启
+    SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED") == "1"
+    SLOW_QUERY_THRESHOLD = 0.2  # 单条语句超过该秒数时写入慢查询日志（LOG_FILE）
+    N_PLUS_ONE_THRESHOLD = 10  # 一次请求中同一形状的语句执行次数达到该值时记录 N+1 告警
+    
     # 安全配置
     BCRYPT_LOG_ROUNDS = 12
     
@@ -64,6 +134,7 @@ class Config:
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
+    SERVER_TIMING_ENABLED = True
     
 
 class ProductionConfig(Config):
@@ -77,6 +148,15 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     WTF_CSRF_ENABLED = False
+    AUTO_CLEANUP_ENABLED = False
+    SERVER_TIMING_ENABLED = True
+    DRAFT_BUFFER_BACKEND = "memory"
+    DRAFT_BUFFER_FLUSH_INTERVAL = 0
+    SESSION_TRACKER_BACKEND = "memory"
+    SESSION_TRACKER_FLUSH_INTERVAL = 0
+    NOTIFICATION_PUBSUB_BACKEND = "memory"
+    UNREAD_COUNTER_BACKEND = "memory"
+    UNREAD_COUNTER_RECONCILE_INTERVAL = 0
 
 
 config = {
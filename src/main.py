@@ -4,7 +4,8 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 import click
-from flask import Flask, send_from_directory, jsonify
+from sqlalchemy import inspect
+from flask import Flask, send_from_directory, jsonify, request
 from flask.cli import with_appcontext
 from flask_cors import CORS
 from src.config import Config
@@ -19,6 +20,9 @@ from src.models.collaboration_task_summary import CollaborationTaskSummary, Coll
 from src.models.notification import Notification, TaskStatusReminder
 from src.models.file import File
 from src.models.qa_pair import QAPair
+from src.models.ingest_job import IngestJob
+from src.models.upload_session import UploadSession
+from src.models.export_job import ExportJob
 
 # 导入路由蓝图
 from src.routes.auth import auth_bp
@@ -31,6 +35,23 @@ from src.routes.collaboration_task_draft import collaboration_task_draft_bp
 from src.routes.collaboration_task_summary import collaboration_task_summary_bp
 from src.routes.collaboration_task_final import collaboration_task_final_bp
 from src.routes.notification import notification_bp
+from src.routes.ingest_job import ingest_job_bp
+from src.routes.chunked_upload import chunked_upload_bp
+from src.routes.export_job import export_job_bp
+from src.routes.health import health_bp
+from src.utils.auth import create_response
+from src.utils.background import start_periodic_job
+from src.utils.export_jobs import sweep_expired_exports
+from src.utils.ingest import sweep_stale_ingest_jobs
+from src.utils.file_offload import init_file_offload
+from src.utils.compression import init_compression
+from src.utils.draft_buffer import init_draft_buffer
+from src.utils.activity_tracker import init_activity_tracker
+from src.utils.notification_events import init_notification_events
+from src.utils.unread_counter import init_unread_counter
+from src.utils.migrations import upgrade_database
+from src.utils.sqlite_profile import init_sqlite_profile
+from src.utils.sql_instrumentation import init_sql_instrumentation
 
 def create_app(config_name='default'):
     """应用工厂函数"""
@@ -46,6 +67,14 @@ def create_app(config_name='default'):
     CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True, expose_headers=['Content-Disposition'])
     
     db.init_app(app)
+    init_sqlite_profile(app, db)
+    init_sql_instrumentation(app, db)
+    init_file_offload(app)
+    init_compression(app)
+    init_draft_buffer(app)
+    init_activity_tracker(app)
+    init_notification_events(app)
+    init_unread_counter(app)
     
     # 注册蓝图
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
@@ -58,12 +87,21 @@ def create_app(config_name='default'):
     app.register_blueprint(collaboration_task_summary_bp, url_prefix='/api/v1')
     app.register_blueprint(collaboration_task_final_bp, url_prefix='/api/v1')
     app.register_blueprint(notification_bp, url_prefix='/api/v1')
+    app.register_blueprint(ingest_job_bp, url_prefix='/api/v1')
+    app.register_blueprint(chunked_upload_bp, url_prefix='/api/v1')
+    app.register_blueprint(export_job_bp, url_prefix='/api/v1')
+    app.register_blueprint(health_bp, url_prefix='/api/v1')
     
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_upgrade_command)
 
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
     os.makedirs(app.config["EXPORT_FOLDER"], exist_ok=True)
 
+    if app.config['AUTO_CLEANUP_ENABLED']:
+        start_periodic_job(app, 'export-sweeper', sweep_expired_exports, app.config['CLEANUP_INTERVAL'])
+        start_periodic_job(app, 'ingest-sweeper', sweep_stale_ingest_jobs, app.config['CLEANUP_INTERVAL'])
+
     @app.route("/guest")
     def serve_guest():
         return send_from_directory(app.static_folder, "index.html")
@@ -83,6 +121,10 @@ def create_app(config_name='default'):
     
     @app.errorhandler(404)
     def not_found(error):
+        # 前端路由与静态文件共用根路径，静态文件不存在时回退到单页应用入口
+        index_path = os.path.join(app.static_folder, "index.html")
+        if not request.path.startswith("/api/") and os.path.exists(index_path):
+            return send_from_directory(app.static_folder, "index.html")
         return jsonify(create_response(False, error={'code': 'NOT_FOUND', 'message': '请求的资源不存在'})), 404
     
     @app.errorhandler(500)
@@ -99,9 +141,20 @@ def create_app(config_name='default'):
 def init_db_command():
     """清除现有数据并创建新表。"""
     db.create_all()
+    # 新建的表已是最新结构，只记录迁移版本
+    upgrade_database(db.engine)
     click.echo('数据库表结构已初始化。')
     # ... 填充初始数据 ...
 
+@click.command('db-upgrade')
+@with_appcontext
+def db_upgrade_command():
+    """执行尚未执行的数据库迁移，保留已有数据。"""
+    if not inspect(db.engine).get_table_names():
+        db.create_all()
+    executed = upgrade_database(db.engine, logger=click.echo)
+    click.echo(f'已执行 {len(executed)} 个迁移。' if executed else '数据库结构已是最新。')
+
 # 创建应用实例
 app = create_app(os.environ.get('FLASK_ENV', 'default'))
 
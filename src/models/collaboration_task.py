@@ -1,6 +1,7 @@
 from . import db, BaseModel
 from datetime import datetime
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, update
+from sqlalchemy.orm import aliased, contains_eager
 
 class CollaborationTask(BaseModel):
     """协作任务模型"""
@@ -8,13 +9,21 @@ class CollaborationTask(BaseModel):
     
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    status = db.Column(db.Enum('draft', 'in_progress', 'completed', 'cancelled', name='collaboration_task_status'), 
+    status = db.Column(db.Enum('importing', 'draft', 'in_progress', 'completed', 'cancelled', name='collaboration_task_status'), 
                        nullable=False, default='draft')
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=True)
     original_filename = db.Column(db.String(255), nullable=False)
     total_qa_pairs = db.Column(db.Integer, nullable=False, default=0)
     deadline = db.Column(db.DateTime, nullable=True)
+
+    # 进度计数，随分配状态与草稿变化在同一事务中增减（见 CollaborationTaskAssignment.adjust_pair_counters），
+    # 读取进度与判断任务完成时无需再扫描分配与草稿
+    assignment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_assignment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    drafted_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    deleted_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    modified_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 关系定义
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_collaboration_tasks')
@@ -25,8 +34,8 @@ class CollaborationTask(BaseModel):
     drafts = db.relationship('CollaborationTaskDraft', back_populates='task', cascade="all, delete-orphan", passive_deletes=True)
     
     @classmethod
-    def create_task(cls, title, description, original_filename, created_by, total_qa_pairs, deadline=None):
-        """创建协作任务"""
+    def create_task(cls, title, description, original_filename, created_by, total_qa_pairs, deadline=None, commit=True):
+        """创建协作任务（commit=False 时仅 flush，由调用方控制事务）"""
         task = cls(
             title=title,
             description=description,
@@ -36,7 +45,10 @@ class CollaborationTask(BaseModel):
             deadline=deadline
         )
         db.session.add(task)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return task
     
     def can_be_accessed_by(self, user):
@@ -70,22 +82,46 @@ class CollaborationTask(BaseModel):
             assigned_to=user_id
         ).first()
     
+    @classmethod
+    def query_for_user(cls, user_id, statuses=None, assignment_statuses=None):
+        """用户创建或被分配的任务，一条语句同时取出创建者与该用户的分配
+
+        返回的查询每行为 (task, assignment)：创建者通过 JOIN 预先加载，assignment 为该用户
+        在任务中的分配（未被分配时为None）。statuses / assignment_statuses 用于按任务状态、
+        该用户的分配状态过滤。
+        """
+        # 同一用户在一个任务中只取一条分配，避免重复分配导致任务重复出现
+        own_ids = db.session.query(
+            CollaborationTaskAssignment.task_id.label('task_id'),
+            func.min(CollaborationTaskAssignment.id).label('id')
+        ).filter(CollaborationTaskAssignment.assigned_to == user_id).group_by(
+            CollaborationTaskAssignment.task_id
+        ).subquery()
+        own = aliased(CollaborationTaskAssignment)
+
+        query = cls.query.outerjoin(cls.creator).options(contains_eager(cls.creator)) \
+            .outerjoin(own_ids, own_ids.c.task_id == cls.id) \
+            .outerjoin(own, own.id == own_ids.c.id) \
+            .add_entity(own) \
+            .filter(or_(cls.created_by == user_id, own.id.isnot(None)))
+
+        if statuses:
+            query = query.filter(cls.status.in_(statuses))
+        if assignment_statuses:
+            query = query.filter(own.status.in_(assignment_statuses))
+        return query
+
     def get_progress(self):
-        """获取任务进度"""
-        assignments = self.assignments
-        if not assignments:
-            return {
-                'total_assignments': 0,
-                'completed_assignments': 0,
-                'completion_rate': 0.0
-            }
-        
-        completed_count = sum(1 for assignment in assignments if assignment.status == 'completed')
-        
+        """获取任务进度（读取计数列）"""
+        total = self.assignment_count or 0
+        completed = self.completed_assignment_count or 0
         return {
-            'total_assignments': len(assignments),
-            'completed_assignments': completed_count,
-            'completion_rate': completed_count / len(assignments) if assignments else 0.0
+            'total_assignments': total,
+            'completed_assignments': completed,
+            'completion_rate': completed / total if total else 0.0,
+            'drafted_pairs': self.drafted_pair_count or 0,
+            'deleted_pairs': self.deleted_pair_count or 0,
+            'modified_pairs': self.modified_pair_count or 0
         }
     
     def is_completed(self):
@@ -139,11 +175,21 @@ class CollaborationTaskAssignment(BaseModel):
     assigned_at = db.Column(db.DateTime, default=datetime.utcnow)
     started_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
+
+    # 该用户在分配范围内的草稿、标记删除与提交时实际修改的QA对数量
+    drafted_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    deleted_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    modified_pair_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # 关系定义
     assignee = db.relationship('User', backref='collaboration_task_assignments')
     # BUG修复: 添加与 CollaborationTask 的反向关系
     task = db.relationship('CollaborationTask', back_populates='assignments')
+
+    # 按 (任务, 用户) 查找分配，几乎每个编辑接口都会执行
+    __table_args__ = (
+        db.Index('ix_collaboration_task_assignments_task_user', 'task_id', 'assigned_to'),
+    )
     
     @classmethod
     def create_assignment(cls, task_id, assigned_to, start_index, end_index):
@@ -165,44 +211,127 @@ class CollaborationTaskAssignment(BaseModel):
             self.started_at = datetime.utcnow()
             db.session.commit()
     
-    def submit(self):
-        """提交任务"""
-        if self.status in ['pending', 'in_progress']:
-            self.status = 'completed'
-            self.completed_at = datetime.utcnow()
-            
-            from src.models.qa_pair import QAPair
-            qa_pairs = QAPair.query.filter(
+    @classmethod
+    def find_pair_owner_id(cls, task_id, user_id, qa_pair_id):
+        """返回用户在任务中范围包含该QA对的分配ID，没有时返回 None"""
+        from src.models.qa_pair import QAPair
+
+        pair_index = db.session.query(QAPair.index_in_file).join(
+            CollaborationTask, CollaborationTask.file_id == QAPair.file_id
+        ).filter(QAPair.id == qa_pair_id, CollaborationTask.id == task_id).scalar_subquery()
+        return db.session.query(func.min(cls.id)).filter(
+            cls.task_id == task_id,
+            cls.assigned_to == user_id,
+            cls.start_index <= pair_index,
+            cls.end_index >= pair_index
+        ).scalar()
+
+    @classmethod
+    def adjust_pair_counters(cls, task_id, assignment_id, drafted=0, deleted=0, modified=0):
+        """在当前事务中增减一个分配及所属任务上的QA对计数，不提交
+
+        以 UPDATE ... SET col = col + n 执行，并发写入不会丢失更新。
+        分配不存在时两者都不更新，任务上的计数始终等于各分配之和。
+        """
+        if assignment_id is None:
+            return
+        deltas = {
+            'drafted_pair_count': drafted,
+            'deleted_pair_count': deleted,
+            'modified_pair_count': modified
+        }
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        updated = cls.query.filter_by(id=assignment_id, task_id=task_id).update(
+            {getattr(cls, name): getattr(cls, name) + delta for name, delta in deltas.items()},
+            synchronize_session='evaluate'
+        )
+        if not updated:
+            return
+        CollaborationTask.query.filter_by(id=task_id).update(
+            {getattr(CollaborationTask, name): getattr(CollaborationTask, name) + delta for name, delta in deltas.items()},
+            synchronize_session='evaluate'
+        )
+
+    @classmethod
+    def recount_draft_counters(cls, task_id, user_id):
+        """按草稿表重新统计某用户各分配范围内的草稿与删除计数，用于批量增删草稿之后"""
+        from src.models.qa_pair import QAPair
+        from src.models.collaboration_task_draft import CollaborationTaskDraft
+
+        assignments = cls.query.filter_by(task_id=task_id, assigned_to=user_id).all()
+        if not assignments:
+            return
+
+        counts = {}
+        rows = db.session.query(cls.id, CollaborationTaskDraft.is_deleted, func.count(CollaborationTaskDraft.id)).join(
+            CollaborationTaskDraft, and_(
+                CollaborationTaskDraft.task_id == cls.task_id,
+                CollaborationTaskDraft.user_id == cls.assigned_to
+            )
+        ).join(QAPair, QAPair.id == CollaborationTaskDraft.qa_pair_id).join(
+            CollaborationTask, CollaborationTask.id == cls.task_id
+        ).filter(
+            cls.task_id == task_id,
+            cls.assigned_to == user_id,
+            QAPair.file_id == CollaborationTask.file_id,
+            QAPair.index_in_file >= cls.start_index,
+            QAPair.index_in_file <= cls.end_index
+        ).group_by(cls.id, CollaborationTaskDraft.is_deleted).all()
+        for assignment_id, is_deleted, count in rows:
+            counts[(assignment_id, bool(is_deleted))] = count
+
+        for assignment in assignments:
+            cls.adjust_pair_counters(
+                task_id, assignment.id,
+                drafted=counts.get((assignment.id, False), 0) - assignment.drafted_pair_count,
+                deleted=counts.get((assignment.id, True), 0) - assignment.deleted_pair_count
+            )
+
+    def submit(self, commit=True):
+        """提交任务：标记完成并将分配范围内的QA对记为该用户编辑，返回任务是否因此全部完成
+
+        范围内的QA对以一条 UPDATE 语句更新；commit=False 时不提交，由调用方控制事务
+        （草稿的批量应用见 src.utils.submission.submit_assignment）。
+        """
+        if self.status not in ['pending', 'in_progress']:
+            return False
+
+        from src.models.qa_pair import QAPair
+
+        self.status = 'completed'
+        self.completed_at = datetime.utcnow()
+        self.task.completed_assignment_count = CollaborationTask.completed_assignment_count + 1
+
+        db.session.execute(
+            update(QAPair).where(
                 QAPair.file_id == self.task.file_id,
                 QAPair.index_in_file >= self.start_index,
                 QAPair.index_in_file <= self.end_index
-            ).all()
-            
-            for qa_pair in qa_pairs:
-                qa_pair.edited_by = self.assigned_to
-                qa_pair.edited_at = datetime.utcnow()
-            
-            db.session.commit()
-            
-            self.check_completion_and_notify()
-            
-            db.session.commit()
+            ).values(
+                edited_by=self.assigned_to,
+                edited_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.flush()
+
+        return self.check_completion_and_notify(commit=commit)
     
     def get_qa_count(self):
         return self.end_index - self.start_index + 1
     
-    def check_completion_and_notify(self):
-        """检查任务是否全部完成并发送通知"""
+    def check_completion_and_notify(self, commit=True):
+        """检查任务是否全部完成，完成时更新任务状态（commit=False 时不提交）"""
         task = self.task
         if not task:
             return False
-            
-        assignments = task.assignments
-        completed_assignments = [a for a in assignments if a.status == 'completed']
-        
-        if len(completed_assignments) == len(assignments) and len(assignments) > 0:
+
+        if task.assignment_count > 0 and task.completed_assignment_count >= task.assignment_count:
             task.status = 'completed'
-            db.session.commit()
+            if commit:
+                db.session.commit()
             return True
         
         return False
@@ -219,6 +348,9 @@ class CollaborationTaskAssignment(BaseModel):
             'status': self.status,
             'assigned_at': self.assigned_at.isoformat() if self.assigned_at else None,
             'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'drafted_pair_count': self.drafted_pair_count,
+            'deleted_pair_count': self.deleted_pair_count,
+            'modified_pair_count': self.modified_pair_count
         }
 
@@ -1,5 +1,7 @@
 from . import db, BaseModel
 from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.dialects import sqlite, postgresql, mysql
 
 class CollaborationTaskDraft(BaseModel):
     """协作任务草稿模型 - 用于暂存用户的编辑进度"""
@@ -24,11 +26,14 @@ class CollaborationTaskDraft(BaseModel):
     # 唯一约束：每个用户对每个QA对只能有一个草稿
     __table_args__ = (
         db.UniqueConstraint('task_id', 'user_id', 'qa_pair_id', name='unique_task_user_qa_draft'),
+        db.Index('ix_collaboration_task_drafts_task_user_deleted', 'task_id', 'user_id', 'is_deleted'),
     )
     
     @classmethod
-    def save_draft(cls, task_id, user_id, qa_pair_id, prompt=None, completion=None, is_auto_saved=False, is_deleted=False):
-        """保存或更新草稿"""
+    def save_draft(cls, task_id, user_id, qa_pair_id, prompt=None, completion=None, is_auto_saved=False, is_deleted=False,
+                   saved_at=None, commit=True):
+        """保存或更新草稿，saved_at 为空时使用当前时间；已有草稿的保存时间更晚时不覆盖。commit=False 时不提交"""
+        saved_at = saved_at or datetime.utcnow()
         draft = cls.query.filter_by(
             task_id=task_id,
             user_id=user_id,
@@ -36,6 +41,9 @@ class CollaborationTaskDraft(BaseModel):
         ).first()
         
         if draft:
+            if draft.last_saved_at > saved_at:
+                return draft
+            was_deleted = draft.is_deleted
             # 更新现有草稿
             if prompt is not None:
                 draft.draft_prompt = prompt
@@ -44,7 +52,10 @@ class CollaborationTaskDraft(BaseModel):
             
             draft.is_deleted = is_deleted
             draft.is_auto_saved = is_auto_saved
-            draft.last_saved_at = datetime.utcnow()
+            draft.last_saved_at = saved_at
+            if was_deleted != is_deleted:
+                cls._adjust_counters(task_id, user_id, qa_pair_id, is_deleted, 1)
+                cls._adjust_counters(task_id, user_id, qa_pair_id, was_deleted, -1)
         else:
             # 创建新草稿
             draft = cls(
@@ -54,13 +65,105 @@ class CollaborationTaskDraft(BaseModel):
                 draft_prompt=prompt,
                 draft_completion=completion,
                 is_auto_saved=is_auto_saved,
-                last_saved_at=datetime.utcnow(),
+                last_saved_at=saved_at,
                 is_deleted=is_deleted
             )
             db.session.add(draft)
+            cls._adjust_counters(task_id, user_id, qa_pair_id, is_deleted, 1)
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return draft
+
+    @classmethod
+    def upsert_drafts(cls, task_id, user_id, items, is_auto_saved=False, commit=True):
+        """批量保存草稿，items 为 [{'qa_pair_id', 'prompt', 'completion', 'is_deleted', 'saved_at'}]
+
+        使用数据库原生的 INSERT ... ON CONFLICT（MySQL 为 ON DUPLICATE KEY UPDATE）
+        按 unique_task_user_qa_draft 一条语句写入；与 save_draft 相同，prompt/completion
+        为 None 时保留原有内容。已有草稿的保存时间晚于本次 saved_at 时不覆盖，
+        避免缓冲中较早的自动暂存覆盖之后的显式保存。写入后按草稿表重新统计计数，
+        commit=False 时不提交。
+        """
+        from src.models.collaboration_task import CollaborationTaskAssignment
+
+        if not items:
+            return 0
+
+        now = datetime.utcnow()
+        # 同一批次中同一QA对以最后一条为准
+        rows = {}
+        for item in items:
+            rows[item['qa_pair_id']] = {
+                'task_id': task_id,
+                'user_id': user_id,
+                'qa_pair_id': item['qa_pair_id'],
+                'draft_prompt': item.get('prompt'),
+                'draft_completion': item.get('completion'),
+                'is_deleted': bool(item.get('is_deleted', False)),
+                'is_auto_saved': is_auto_saved,
+                'last_saved_at': item.get('saved_at') or now,
+                'created_at': now,
+                'updated_at': now
+            }
+        rows = list(rows.values())
+
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            stmt = (sqlite.insert(table) if dialect == 'sqlite' else postgresql.insert(table)).values(rows)
+            new = stmt.excluded
+        elif dialect == 'mysql':
+            stmt = mysql.insert(table).values(rows)
+            new = stmt.inserted
+        else:
+            for row in rows:
+                cls.save_draft(
+                    task_id, user_id, row['qa_pair_id'], prompt=row['draft_prompt'],
+                    completion=row['draft_completion'], is_auto_saved=is_auto_saved, is_deleted=row['is_deleted'],
+                    saved_at=row['last_saved_at'], commit=False
+                )
+            if commit:
+                db.session.commit()
+            return len(rows)
+
+        update_values = {
+            'draft_prompt': func.coalesce(new.draft_prompt, table.c.draft_prompt),
+            'draft_completion': func.coalesce(new.draft_completion, table.c.draft_completion),
+            'is_deleted': new.is_deleted,
+            'is_auto_saved': new.is_auto_saved,
+            'updated_at': new.updated_at,
+            'last_saved_at': new.last_saved_at
+        }
+        is_newer = table.c.last_saved_at <= new.last_saved_at
+        if dialect == 'mysql':
+            # MySQL 不支持带条件的 ON DUPLICATE KEY UPDATE，逐列用 IF() 保留原值；
+            # 赋值按顺序执行，last_saved_at 必须最后更新，前面各列比较的才是原有时间
+            stmt = stmt.on_duplicate_key_update([
+                (name, func.if_(is_newer, value, table.c[name])) for name, value in update_values.items()
+            ])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['task_id', 'user_id', 'qa_pair_id'], set_=update_values, where=is_newer
+            )
+        db.session.execute(stmt)
+
+        CollaborationTaskAssignment.recount_draft_counters(task_id, user_id)
+        if commit:
+            db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def _adjust_counters(task_id, user_id, qa_pair_id, is_deleted, delta):
+        """草稿增减时同步范围包含该QA对的分配及任务上的草稿/删除计数，用户没有对应分配时不更新"""
+        from src.models.collaboration_task import CollaborationTaskAssignment
+        assignment_id = CollaborationTaskAssignment.find_pair_owner_id(task_id, user_id, qa_pair_id)
+        if assignment_id is None:
+            return
+        if is_deleted:
+            CollaborationTaskAssignment.adjust_pair_counters(task_id, assignment_id, deleted=delta)
+        else:
+            CollaborationTaskAssignment.adjust_pair_counters(task_id, assignment_id, drafted=delta)
     
     @classmethod
     def get_draft(cls, task_id, user_id, qa_pair_id):
@@ -90,15 +193,18 @@ class CollaborationTaskDraft(BaseModel):
         
         if draft:
             db.session.delete(draft)
+            cls._adjust_counters(task_id, user_id, qa_pair_id, draft.is_deleted, -1)
             db.session.commit()
     
     @classmethod
     def clear_user_drafts(cls, task_id, user_id):
         """清除用户在某个任务中的所有草稿"""
+        from src.models.collaboration_task import CollaborationTaskAssignment
         cls.query.filter_by(
             task_id=task_id,
             user_id=user_id
         ).delete()
+        CollaborationTaskAssignment.recount_draft_counters(task_id, user_id)
         db.session.commit()
     
     def has_changes(self, current_prompt, current_completion):
@@ -167,8 +273,8 @@ class CollaborationTaskSession(BaseModel):
         return session
     
     @classmethod
-    def update_activity(cls, task_id, user_id):
-        """更新用户活动"""
+    def update_activity(cls, task_id, user_id, commit=True):
+        """更新用户活动（commit=False 时不提交，由调用方控制事务）"""
         session = cls.query.filter_by(
             task_id=task_id,
             user_id=user_id,
@@ -178,7 +284,8 @@ class CollaborationTaskSession(BaseModel):
         if session:
             session.last_activity = datetime.utcnow()
             session.activity_count += 1
-            db.session.commit()
+            if commit:
+                db.session.commit()
         
         return session
     
@@ -78,18 +78,54 @@ class CollaborationTaskSummary(BaseModel):
         
         return pagination
     
+    @classmethod
+    def iter_for_export(cls, task_id, batch_size=None):
+        """按QA对在文件中的顺序键集分批读取任务汇总，用于导出最终结果
+
+        产出的行带有 prompt、completion（编辑后的内容）、index_in_file、
+        is_modified 与 editor_name 属性。
+        """
+        from src.models.user import User
+
+        if batch_size is None:
+            from flask import current_app
+            batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 2000)
+
+        last_index, last_id = None, None
+        while True:
+            query = db.session.query(
+                cls.id,
+                QAPair.index_in_file,
+                cls.edited_prompt.label('prompt'),
+                cls.edited_completion.label('completion'),
+                cls.is_modified,
+                User.display_name.label('editor_name')
+            ).join(QAPair, cls.qa_pair_id == QAPair.id).outerjoin(
+                User, cls.editor_id == User.id
+            ).filter(cls.task_id == task_id)
+            if last_index is not None:
+                query = query.filter(db.or_(
+                    QAPair.index_in_file > last_index,
+                    db.and_(QAPair.index_in_file == last_index, cls.id > last_id)
+                ))
+            rows = query.order_by(QAPair.index_in_file, cls.id).limit(batch_size).all()
+
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_index, last_id = rows[-1].index_in_file, rows[-1].id
+
     @classmethod
     def get_task_progress(cls, task_id):
-        """获取任务进度统计"""
-        from src.models.collaboration_task import CollaborationTaskAssignment
-        
-        assignments = CollaborationTaskAssignment.query.filter_by(task_id=task_id).all()
+        """获取任务进度统计（读取任务上的计数列）"""
+        from src.models.collaboration_task import CollaborationTask
         
-        total_assignments = len(assignments)
-        completed_assignments = len([a for a in assignments if a.status == 'completed'])
+        task = CollaborationTask.query.get(task_id)
+        total_assignments = task.assignment_count if task else 0
+        completed_assignments = task.completed_assignment_count if task else 0
         
-        total_qa_pairs = cls.query.filter_by(task_id=task_id).count()
-        modified_qa_pairs = cls.query.filter_by(task_id=task_id, is_modified=True).count()
+        total_qa_pairs = task.total_qa_pairs if task else 0
+        modified_qa_pairs = task.modified_pair_count if task else 0
         
         return {
             'total_assignments': total_assignments,
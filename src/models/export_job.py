@@ -0,0 +1,102 @@
+from . import db, BaseModel
+from datetime import datetime, timedelta
+import secrets
+
+class ExportJob(BaseModel):
+    """导出任务模型 - 记录后台导出的进度、结果文件与下载令牌"""
+    __tablename__ = 'export_jobs'
+
+    task_id = db.Column(db.Integer, db.ForeignKey('collaboration_tasks.id'), nullable=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    kind = db.Column(db.Enum('edited', 'final', name='export_job_kind'), nullable=False, default='edited')
+    export_format = db.Column(db.Enum('jsonl', 'excel', name='export_job_format'), nullable=False, default='jsonl')
+    status = db.Column(db.Enum('pending', 'running', 'completed', 'failed', 'expired', name='export_job_status'),
+                       nullable=False, default='pending')
+    total_rows = db.Column(db.Integer, nullable=False, default=0)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    download_name = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    download_token = db.Column(db.String(64), unique=True, nullable=True, index=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # 关系定义
+    task = db.relationship('CollaborationTask', foreign_keys=[task_id])
+    creator = db.relationship('User', foreign_keys=[created_by])
+
+    @classmethod
+    def create_job(cls, task_id, file_id, created_by, kind, export_format, download_name, total_rows=0):
+        """创建导出任务"""
+        job = cls(
+            task_id=task_id,
+            file_id=file_id,
+            created_by=created_by,
+            kind=kind,
+            export_format=export_format,
+            download_name=download_name,
+            total_rows=total_rows
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    @classmethod
+    def get_by_download_token(cls, token):
+        """根据下载令牌获取已完成的导出任务"""
+        return cls.query.filter_by(download_token=token, status='completed').first()
+
+    @classmethod
+    def get_expired_jobs(cls, now=None):
+        """获取下载令牌已过期但结果文件尚未清理的导出任务"""
+        now = now or datetime.utcnow()
+        return cls.query.filter(cls.status == 'completed', cls.expires_at < now).all()
+
+    def mark_completed(self, file_path, file_size, rows_written, ttl_seconds):
+        """标记导出完成并签发下载令牌（不提交，由调用方控制事务）"""
+        self.status = 'completed'
+        self.file_path = file_path
+        self.file_size = file_size
+        self.rows_written = rows_written
+        self.download_token = secrets.token_urlsafe(32)
+        self.finished_at = datetime.utcnow()
+        self.expires_at = self.finished_at + timedelta(seconds=ttl_seconds)
+
+    def mark_expired(self):
+        """标记结果已过期并作废下载令牌（不提交）"""
+        self.status = 'expired'
+        self.download_token = None
+        self.file_path = None
+
+    def is_download_available(self):
+        """下载令牌是否仍然有效"""
+        return self.status == 'completed' and self.expires_at is not None and self.expires_at > datetime.utcnow()
+
+    def can_be_accessed_by(self, user):
+        """检查用户是否可以查看此导出任务"""
+        return self.created_by == user.id or user.is_super_admin()
+
+    def to_dict(self, live_progress=None, download_url=None):
+        """转换为字典，live_progress 为当前进程中正在运行的导出进度"""
+        rows_written = live_progress['rows_written'] if live_progress else self.rows_written
+        return {
+            'id': self.id,
+            'task_id': self.task_id,
+            'kind': self.kind,
+            'format': self.export_format,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'rows_written': rows_written,
+            'progress': round(rows_written / self.total_rows * 100, 1) if self.total_rows else 0.0,
+            'download_name': self.download_name,
+            'file_size': self.file_size,
+            'download_url': download_url,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'error_message': self.error_message,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
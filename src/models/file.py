@@ -10,6 +10,7 @@ class File(BaseModel):
     file_path = db.Column(db.String(500), nullable=False)
     file_size = db.Column(db.Integer, nullable=False)
     file_type = db.Column(db.String(50), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # 文件内容的SHA-256
     
     # 上传信息
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -24,18 +25,22 @@ class File(BaseModel):
 
     
     @classmethod
-    def create_file(cls, filename, original_filename, file_path, file_size, file_type, uploaded_by):
-        """创建文件记录"""
+    def create_file(cls, filename, original_filename, file_path, file_size, file_type, uploaded_by, content_hash=None, commit=True):
+        """创建文件记录（commit=False 时仅 flush，由调用方控制事务）"""
         file_record = cls(
             filename=filename,
             original_filename=original_filename,
             file_path=file_path,
             file_size=file_size,
             file_type=file_type,
+            content_hash=content_hash,
             uploaded_by=uploaded_by
         )
         db.session.add(file_record)
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         return file_record
     
     @classmethod
@@ -47,6 +52,47 @@ class File(BaseModel):
             abort(404)
         return file_record
     
+    @classmethod
+    def find_by_content_hash(cls, content_hash):
+        """查找内容相同且物理文件仍存在的文件记录"""
+        for file_record in cls.query.filter_by(content_hash=content_hash).order_by(cls.id):
+            if os.path.exists(file_record.file_path):
+                return file_record
+        return None
+
+    @classmethod
+    def find_pristine_source_id(cls, content_hash, exclude_id=None):
+        """查找内容相同、QA对已导入且从未被编辑或删除过的文件ID
+
+        这样的文件中的QA对与原始上传内容一致，可以直接复制给新的文件记录。
+        """
+        from .qa_pair import QAPair
+
+        has_rows = db.session.query(QAPair.id).filter(QAPair.file_id == cls.id).exists()
+        has_changes = db.session.query(QAPair.id).filter(
+            QAPair.file_id == cls.id,
+            db.or_(QAPair.edited_by.isnot(None), QAPair.is_deleted == True)
+        ).exists()
+
+        query = db.session.query(cls.id).filter(
+            cls.content_hash == content_hash,
+            cls.is_deleted == False,
+            has_rows,
+            ~has_changes
+        )
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        row = query.order_by(cls.id).first()
+        return row[0] if row else None
+
+    @classmethod
+    def is_file_path_shared(cls, file_path, exclude_id=None):
+        """检查物理文件是否仍被其他文件记录引用"""
+        query = cls.query.filter_by(file_path=file_path)
+        if exclude_id is not None:
+            query = query.filter(cls.id != exclude_id)
+        return query.first() is not None
+
     def can_be_accessed_by(self, user):
         """检查用户是否可以访问此文件"""
         if user.is_super_admin():
@@ -67,7 +113,9 @@ class File(BaseModel):
         return False
     
     def delete_physical_file(self):
-        """删除物理文件"""
+        """删除物理文件，内容去重后被其他记录共享的文件会保留"""
+        if File.is_file_path_shared(self.file_path, exclude_id=self.id):
+            return
         try:
             if os.path.exists(self.file_path):
                 os.remove(self.file_path)
@@ -0,0 +1,75 @@
+from . import db, BaseModel
+from datetime import datetime
+
+class IngestJob(BaseModel):
+    """JSONL导入任务模型 - 记录后台导入的进度与结果"""
+    __tablename__ = 'ingest_jobs'
+
+    file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('collaboration_tasks.id'), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.Enum('pending', 'running', 'completed', 'failed', name='ingest_job_status'),
+                       nullable=False, default='pending')
+    lines_parsed = db.Column(db.Integer, nullable=False, default=0)
+    rows_inserted = db.Column(db.Integer, nullable=False, default=0)
+    error_message = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    # 关系定义
+    file = db.relationship('File', foreign_keys=[file_id])
+    task = db.relationship('CollaborationTask', foreign_keys=[task_id])
+    creator = db.relationship('User', foreign_keys=[created_by])
+
+    @classmethod
+    def create_job(cls, file_id, task_id, created_by, original_filename, commit=True):
+        """创建导入任务（commit=False 时仅 flush，由调用方控制事务）"""
+        job = cls(
+            file_id=file_id,
+            task_id=task_id,
+            created_by=created_by,
+            original_filename=original_filename
+        )
+        db.session.add(job)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return job
+
+    def can_be_accessed_by(self, user):
+        """检查用户是否可以查看此导入任务"""
+        return self.created_by == user.id or user.is_super_admin()
+
+    def get_elapsed_seconds(self):
+        """获取已耗时（秒）"""
+        if not self.started_at:
+            return 0.0
+        end_time = self.finished_at or datetime.utcnow()
+        return (end_time - self.started_at).total_seconds()
+
+    def to_dict(self, live_progress=None):
+        """转换为字典，live_progress 为当前进程中正在运行的导入进度"""
+        lines_parsed = self.lines_parsed
+        rows_inserted = self.rows_inserted
+        if live_progress:
+            lines_parsed = live_progress['lines_parsed']
+            rows_inserted = live_progress['rows_inserted']
+
+        elapsed = self.get_elapsed_seconds()
+        return {
+            'id': self.id,
+            'file_id': self.file_id,
+            'task_id': self.task_id,
+            'original_filename': self.original_filename,
+            'status': self.status,
+            'lines_parsed': lines_parsed,
+            'rows_inserted': rows_inserted,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows_inserted / elapsed, 1) if elapsed > 0 else 0.0,
+            'error_message': self.error_message,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -16,6 +16,11 @@ class Notification(BaseModel):
     # 关系定义
     user = db.relationship('User', backref='notifications')
     related_task = db.relationship('CollaborationTask', backref='notifications')
+
+    # 通知列表与未读数量按用户、已读状态过滤并按创建时间排序
+    __table_args__ = (
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
     
     @classmethod
     def create_notification(cls, user_id, title, content, notification_type='system', related_task_id=None):
@@ -29,13 +34,42 @@ class Notification(BaseModel):
         )
         db.session.add(notification)
         db.session.commit()
+
+        from src.utils.notification_events import publish_notification_event
+        from src.utils.unread_counter import adjust_unread_count
+        adjust_unread_count(user_id, 1)
+        publish_notification_event(user_id, 'notification', lambda: {
+            'notification': notification.to_dict(),
+            'unread_count': cls.get_unread_count(user_id)
+        })
         return notification
+
+    @classmethod
+    def get_unread_count(cls, user_id):
+        """获取用户的未读通知数量，启用未读计数时读取计数而不查询数据库"""
+        from src.utils.unread_counter import get_cached_unread_count
+        return get_cached_unread_count(user_id)
+
+    @classmethod
+    def mark_all_as_read(cls, user_id):
+        """将用户的所有未读通知标记为已读，返回标记的数量"""
+        from src.utils.unread_counter import reset_unread_count
+        updated = cls.query.filter_by(user_id=user_id, is_read=False).update({'is_read': True})
+        db.session.commit()
+        reset_unread_count(user_id)
+        return updated
+
+    @classmethod
+    def publish_unread_count(cls, user_id):
+        """向用户的通知流推送最新的未读数量"""
+        from src.utils.notification_events import publish_notification_event
+        publish_notification_event(user_id, 'unread_count', lambda: {'unread_count': cls.get_unread_count(user_id)})
     
     @classmethod
     def create_task_assignment_notification(cls, user_id, task, assignment):
         """创建任务分配通知"""
-        title = f"新的协作任务分配：{task.name}"
-        content = f"您被分配了协作任务'{task.name}'，需要处理 {assignment.get_qa_count()} 个QA对"
+        title = f"新的协作任务分配：{task.title}"
+        content = f"您被分配了协作任务'{task.title}'，需要处理 {assignment.get_qa_count()} 个QA对"
         if task.deadline:
             content += f"，截止时间：{task.deadline.strftime('%Y-%m-%d %H:%M')}"
         content += "。请及时完成任务。"
@@ -51,8 +85,8 @@ class Notification(BaseModel):
     @classmethod
     def create_task_completion_notification(cls, user_id, task):
         """创建任务完成通知"""
-        title = f"协作任务已完成：{task.name}"
-        content = f"协作任务'{task.name}'的所有分配已完成，您可以进行最终审核和导出。"
+        title = f"协作任务已完成：{task.title}"
+        content = f"协作任务'{task.title}'的所有分配已完成，您可以进行最终审核和导出。"
         
         return cls.create_notification(
             user_id=user_id,
@@ -65,8 +99,8 @@ class Notification(BaseModel):
     @classmethod
     def create_task_reminder_notification(cls, user_id, task, assignment):
         """创建任务提醒通知"""
-        title = f"任务提醒：{task.name}"
-        content = f"您的协作任务'{task.name}'尚未完成，还有 {assignment.get_qa_count()} 个QA对待处理"
+        title = f"任务提醒：{task.title}"
+        content = f"您的协作任务'{task.title}'尚未完成，还有 {assignment.get_qa_count()} 个QA对待处理"
         if task.deadline:
             content += f"，截止时间：{task.deadline.strftime('%Y-%m-%d %H:%M')}"
         content += "。请尽快完成。"
@@ -80,9 +114,13 @@ class Notification(BaseModel):
         )
     
     def mark_as_read(self):
-        """标记为已读"""
-        self.is_read = True
+        """标记为已读，只有确实由未读变为已读时才减少未读计数"""
+        from src.utils.unread_counter import adjust_unread_count
+        updated = Notification.query.filter_by(id=self.id, is_read=False).update({'is_read': True})
         db.session.commit()
+        if updated:
+            adjust_unread_count(self.user_id, -1)
+            self.publish_unread_count(self.user_id)
     
     def to_dict(self):
         """转换为字典"""
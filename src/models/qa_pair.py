@@ -1,5 +1,6 @@
 from . import db, BaseModel
 from datetime import datetime, timezone, timedelta
+from sqlalchemy import insert
 
 # 北京时间时区
 BEIJING_TZ = timezone(timedelta(hours=8))
@@ -23,24 +24,120 @@ class QAPair(BaseModel):
     editor = db.relationship('User', foreign_keys=[edited_by], backref='edited_qa_pairs')
     drafts = db.relationship('CollaborationTaskDraft', back_populates='qa_pair', cascade="all, delete-orphan")
 
+    # 编辑页与汇总页按 (file_id, index_in_file) 顺序分页读取，并按 is_deleted 过滤
+    __table_args__ = (
+        db.Index('ix_qa_pairs_file_index_deleted', 'file_id', 'index_in_file', 'is_deleted'),
+    )
+
     
     @classmethod
-    def create_from_jsonl_data(cls, file_id, qa_pairs_data):
-        """从JSONL数据创建QA对记录"""
-        qa_pairs = []
-        for index, qa_data in enumerate(qa_pairs_data):
-            qa_pair = cls(
-                file_id=file_id,
-                index_in_file=index,
-                prompt=qa_data['prompt'],
-                completion=qa_data['completion']
-            )
-            qa_pairs.append(qa_pair)
-            db.session.add(qa_pair)
-        
-        db.session.commit()
-        return qa_pairs
+    def create_from_jsonl_data(cls, file_id, qa_pairs_data, start_index=0, chunk_size=None, commit=True, on_batch=None):
+        """从JSONL数据批量写入QA对记录
+
+        qa_pairs_data 可以是列表，也可以是流式产出QA对字典的生成器。
+        记录按 chunk_size 分批通过 executemany 写入，所有批次处于同一事务中，
+        内存占用只与批次大小相关。每写入一批后以累计行数调用 on_batch。返回写入的行数。
+        """
+        if chunk_size is None:
+            from flask import current_app
+            chunk_size = current_app.config.get('INGEST_CHUNK_SIZE', 5000)
+
+        stmt = insert(cls.__table__)
+        now = datetime.utcnow()
+        batch = []
+        total = 0
+        for index, qa_data in enumerate(qa_pairs_data, start_index):
+            batch.append({
+                'file_id': file_id,
+                'index_in_file': index,
+                'prompt': qa_data['prompt'],
+                'completion': qa_data['completion'],
+                'is_deleted': False,
+                'created_at': now,
+                'updated_at': now
+            })
+            if len(batch) >= chunk_size:
+                db.session.execute(stmt, batch)
+                total += len(batch)
+                batch = []
+                if on_batch:
+                    on_batch(total)
+
+        if batch:
+            db.session.execute(stmt, batch)
+            total += len(batch)
+            if on_batch:
+                on_batch(total)
+
+        if commit:
+            db.session.commit()
+        return total
+    
+    @classmethod
+    def copy_from_file(cls, source_file_id, target_file_id, commit=True):
+        """以单条 INSERT ... SELECT 将源文件的QA对复制到目标文件，返回复制的行数"""
+        now = datetime.utcnow()
+        source = db.select(
+            db.literal(target_file_id),
+            cls.index_in_file,
+            cls.prompt,
+            cls.completion,
+            db.literal(False),
+            db.literal(now),
+            db.literal(now)
+        ).where(cls.file_id == source_file_id).order_by(cls.index_in_file)
+
+        stmt = insert(cls.__table__).from_select(
+            ['file_id', 'index_in_file', 'prompt', 'completion', 'is_deleted', 'created_at', 'updated_at'],
+            source
+        )
+        result = db.session.execute(stmt)
+
+        if commit:
+            db.session.commit()
+        return result.rowcount
     
+    @classmethod
+    def iter_for_export(cls, file_id, batch_size=None):
+        """按 index_in_file 键集分批读取文件中未删除的QA对，只加载导出所需的列
+
+        每批是一条独立的短查询，内存占用只与批次大小相关，也不会在流式响应期间
+        长时间持有数据库游标。产出的行带有 prompt 与 completion 属性。
+        """
+        if batch_size is None:
+            from flask import current_app
+            batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 2000)
+
+        last_index, last_id = None, None
+        while True:
+            query = db.session.query(cls.id, cls.index_in_file, cls.prompt, cls.completion).filter(
+                cls.file_id == file_id,
+                cls.is_deleted == False
+            )
+            if last_index is not None:
+                query = query.filter(db.or_(
+                    cls.index_in_file > last_index,
+                    db.and_(cls.index_in_file == last_index, cls.id > last_id)
+                ))
+            rows = query.order_by(cls.index_in_file, cls.id).limit(batch_size).all()
+
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_index, last_id = rows[-1].index_in_file, rows[-1].id
+
+    @classmethod
+    def get_export_version(cls, file_id):
+        """返回 (最后更新时间, 未删除QA对数量)，任一变化都说明导出内容可能已改变
+
+        最后更新时间包含已删除的行，软删除同样会更新 updated_at。
+        """
+        max_updated_at, count = db.session.query(
+            db.func.max(cls.updated_at),
+            db.func.sum(db.case((cls.is_deleted == False, 1), else_=0))
+        ).filter(cls.file_id == file_id).one()
+        return max_updated_at, int(count or 0)
+
     @classmethod
     def get_or_404(cls, qa_id):
         """根据ID获取QA对，不存在则抛出404"""
@@ -0,0 +1,61 @@
+from . import db, BaseModel
+from datetime import datetime
+
+class UploadSession(BaseModel):
+    """分块上传会话模型 - 记录可断点续传的上传进度"""
+    __tablename__ = 'upload_sessions'
+
+    upload_id = db.Column(db.String(36), unique=True, nullable=False, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=True)
+    received_size = db.Column(db.BigInteger, nullable=False, default=0)
+    checksum = db.Column(db.String(64), nullable=True)
+    status = db.Column(db.Enum('uploading', 'completed', 'aborted', name='upload_session_status'),
+                       nullable=False, default='uploading')
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    # 关系定义
+    creator = db.relationship('User', foreign_keys=[created_by])
+
+    @classmethod
+    def create_session(cls, upload_id, created_by, original_filename, filename, file_path, total_size=None):
+        """创建上传会话"""
+        session = cls(
+            upload_id=upload_id,
+            created_by=created_by,
+            original_filename=original_filename,
+            filename=filename,
+            file_path=file_path,
+            total_size=total_size
+        )
+        db.session.add(session)
+        db.session.commit()
+        return session
+
+    @classmethod
+    def get_by_upload_id(cls, upload_id):
+        """根据上传ID获取会话"""
+        return cls.query.filter_by(upload_id=upload_id).first()
+
+    def mark_completed(self, checksum):
+        """标记上传完成（不提交，由调用方控制事务）"""
+        self.status = 'completed'
+        self.checksum = checksum
+        self.completed_at = datetime.utcnow()
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            'upload_id': self.upload_id,
+            'original_filename': self.original_filename,
+            'total_size': self.total_size,
+            'received_size': self.received_size,
+            'offset': self.received_size,
+            'checksum': self.checksum,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
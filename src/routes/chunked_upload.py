@@ -0,0 +1,201 @@
+from flask import Blueprint, request, jsonify, current_app
+import os
+import uuid
+from src.models.upload_session import UploadSession
+from src.models import db
+from src.utils.auth import login_required, create_response
+from src.utils.file_handler import allowed_file, generate_unique_filename, get_file_type, delete_file_safe
+from src.utils.chunked_upload import get_upload_lock, append_chunk, finish_upload, discard_upload_state
+from src.routes.file_management import create_file_from_saved_file
+from src.routes.collaboration_task import create_task_from_saved_file, parse_deadline
+
+chunked_upload_bp = Blueprint('chunked_upload', __name__)
+
+def _get_owned_upload(current_user, upload_id):
+    """获取当前用户的上传会话，返回 (upload, error_response)"""
+    upload = UploadSession.get_by_upload_id(upload_id)
+    if not upload:
+        return None, (jsonify(create_response(False, error={'code': 'NOT_FOUND', 'message': '上传会话不存在'})), 404)
+    if upload.created_by != current_user.id:
+        return None, (jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403)
+    return upload, None
+
+@chunked_upload_bp.route('/uploads', methods=['POST'])
+@login_required
+def init_upload(current_user):
+    """初始化分块上传会话"""
+    try:
+        data = request.get_json() or {}
+        original_filename = data.get('filename', '')
+        total_size = data.get('total_size')
+
+        if not original_filename or not allowed_file(original_filename):
+            return jsonify(create_response(False, error={'code': 'UPLOAD_ERROR', 'message': '不支持的文件类型'})), 400
+        if total_size is not None and (not isinstance(total_size, int) or total_size <= 0):
+            return jsonify(create_response(False, error={'code': 'INVALID_REQUEST', 'message': 'total_size 必须是正整数'})), 400
+
+        filename = generate_unique_filename(original_filename)
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        open(file_path, 'wb').close()
+
+        upload = UploadSession.create_session(
+            upload_id=str(uuid.uuid4()),
+            created_by=current_user.id,
+            original_filename=original_filename,
+            filename=filename,
+            file_path=file_path,
+            total_size=total_size
+        )
+
+        data = upload.to_dict()
+        data['chunk_size'] = current_app.config['UPLOAD_CHUNK_SIZE']
+        return jsonify(create_response(True, data=data, message='上传会话已创建')), 201
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"创建上传会话失败: {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'创建上传会话失败: {str(e)}'})), 500
+
+@chunked_upload_bp.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def get_upload(current_user, upload_id):
+    """查询上传会话状态，断线后客户端据此获取续传偏移量"""
+    upload, error_response = _get_owned_upload(current_user, upload_id)
+    if error_response:
+        return error_response
+    return jsonify(create_response(True, data=upload.to_dict()))
+
+@chunked_upload_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(current_user, upload_id):
+    """在指定偏移量处追加一个分块，请求体为原始字节"""
+    upload, error_response = _get_owned_upload(current_user, upload_id)
+    if error_response:
+        return error_response
+    if upload.status != 'uploading':
+        return jsonify(create_response(False, error={'code': 'INVALID_STATUS', 'message': '上传会话已结束'})), 400
+
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        return jsonify(create_response(False, error={'code': 'MISSING_PARAMETER', 'message': 'offset是必需的'})), 400
+
+    try:
+        with get_upload_lock(upload_id):
+            # 以磁盘上的实际大小为准，中断的分块可能只写入了一部分
+            current_offset = os.path.getsize(upload.file_path)
+            if offset != current_offset:
+                upload.received_size = current_offset
+                db.session.commit()
+                return jsonify(create_response(
+                    False,
+                    error={'code': 'OFFSET_MISMATCH', 'message': f'偏移量不匹配，请从 {current_offset} 处继续上传', 'offset': current_offset}
+                )), 409
+
+            if upload.total_size and request.content_length and offset + request.content_length > upload.total_size:
+                return jsonify(create_response(False, error={'code': 'CHUNK_TOO_LARGE', 'message': '分块超出了声明的文件大小'})), 400
+
+            try:
+                upload.received_size = append_chunk(upload_id, upload.file_path, offset, request.stream)
+            finally:
+                db.session.commit()
+
+        return jsonify(create_response(True, data=upload.to_dict()))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"上传分块失败 (upload {upload_id}): {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'上传分块失败: {str(e)}'})), 500
+
+@chunked_upload_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_upload(current_user, upload_id):
+    """完成上传，并将组装好的文件交给导入流程
+
+    target 为 file 时创建单文件校对记录；为 collaboration_task 时创建协作任务，
+    需要同时提供 title，可选 description、deadline。
+    """
+    upload, error_response = _get_owned_upload(current_user, upload_id)
+    if error_response:
+        return error_response
+    if upload.status != 'uploading':
+        return jsonify(create_response(False, error={'code': 'INVALID_STATUS', 'message': '上传会话已结束'})), 400
+
+    data = request.get_json() or {}
+    target = data.get('target', 'file')
+    if target not in ('file', 'collaboration_task'):
+        return jsonify(create_response(False, error={'code': 'INVALID_REQUEST', 'message': '无效的target'})), 400
+    if target == 'collaboration_task':
+        if not current_user.is_admin():
+            return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+        if not data.get('title'):
+            return jsonify(create_response(False, error={'code': 'MISSING_FIELDS', 'message': '任务标题不能为空'})), 400
+        try:
+            deadline = parse_deadline(data.get('deadline'))
+        except ValueError as e:
+            return jsonify(create_response(False, error={'code': 'INVALID_DATE_FORMAT', 'message': str(e)})), 400
+
+    try:
+        with get_upload_lock(upload_id):
+            file_size = os.path.getsize(upload.file_path)
+            if file_size == 0 or (upload.total_size and file_size != upload.total_size):
+                return jsonify(create_response(
+                    False,
+                    error={'code': 'INCOMPLETE_UPLOAD', 'message': f'文件尚未上传完整，已接收 {file_size} 字节', 'offset': file_size}
+                )), 400
+
+            checksum = finish_upload(upload_id, upload.file_path)
+
+        expected_checksum = data.get('sha256')
+        if expected_checksum and expected_checksum.lower() != checksum:
+            upload.status = 'aborted'
+            db.session.commit()
+            delete_file_safe(upload.file_path)
+            return jsonify(create_response(False, error={'code': 'CHECKSUM_MISMATCH', 'message': '文件校验失败，请重新上传'})), 400
+
+        upload.received_size = file_size
+        upload.mark_completed(checksum)
+
+        file_info = {
+            'filename': upload.filename,
+            'original_filename': upload.original_filename,
+            'file_path': upload.file_path,
+            'file_size': file_size,
+            'file_type': get_file_type(upload.original_filename),
+            'content_hash': checksum
+        }
+        if target == 'collaboration_task':
+            response, status_code = create_task_from_saved_file(
+                current_user, file_info, data['title'], data.get('description', ''), deadline
+            )
+        else:
+            response, status_code = create_file_from_saved_file(current_user, file_info)
+
+        if status_code >= 400:
+            # 导入失败时事务已回滚，文件也已删除
+            upload.status = 'aborted'
+            db.session.commit()
+        return response, status_code
+    except Exception as e:
+        db.session.rollback()
+        discard_upload_state(upload_id)
+        current_app.logger.error(f"完成上传失败 (upload {upload_id}): {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'完成上传失败: {str(e)}'})), 500
+
+@chunked_upload_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload(current_user, upload_id):
+    """放弃上传并删除已接收的部分"""
+    upload, error_response = _get_owned_upload(current_user, upload_id)
+    if error_response:
+        return error_response
+    if upload.status != 'uploading':
+        return jsonify(create_response(False, error={'code': 'INVALID_STATUS', 'message': '上传会话已结束'})), 400
+
+    try:
+        with get_upload_lock(upload_id):
+            upload.status = 'aborted'
+            db.session.commit()
+            delete_file_safe(upload.file_path)
+        discard_upload_state(upload_id)
+        return jsonify(create_response(True, message='上传已取消'))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'取消上传失败: {str(e)}'})), 500
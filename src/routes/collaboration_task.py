@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for
 import os
 import json
 from sqlalchemy import or_, func
@@ -8,14 +8,21 @@ from src.models.collaboration_task import CollaborationTask, CollaborationTaskAs
 from src.models.collaboration_task_draft import CollaborationTaskDraft
 from src.models.file import File
 from src.models.qa_pair import QAPair
+from src.models.ingest_job import IngestJob
 from src.models.user import User
 from src.models.user_group import UserGroup
 from src.models import db
 from src.utils.auth import login_required, create_response, admin_required
 from src.utils.file_handler import (
-    save_uploaded_file, parse_jsonl_file, export_to_jsonl, 
-    export_to_excel, create_export_filename
+    save_uploaded_file,
+    create_export_filename, parse_export_format, prepare_stream_upload, delete_file_safe,
+    discard_uploaded_file, JsonlParseError
 )
+from src.utils.export_cache import send_export
+from src.utils.pagination import paginate_from_request, has_pagination_args, get_list_arg, InvalidCursorError
+from src.utils.ingest import ingest_jsonl_file, ingest_upload_stream, reuse_existing_blob, start_ingest_job
+from src.utils.submission import submit_assignment_drafts
+from src.utils.draft_buffer import flush_drafts, drafts_flushed, get_buffered_drafts
 from src.models.notification import Notification
 from src.routes.notification import (
     send_task_assignment_notifications,
@@ -28,35 +35,42 @@ collaboration_task_bp = Blueprint('collaboration_task', __name__)
 @collaboration_task_bp.route('/collaboration-tasks', methods=['GET'])
 @login_required
 def get_collaboration_tasks(current_user):
-    """获取协作任务列表"""
+    """获取协作任务列表，进度取自任务上的计数列
+
+    可选参数：status、assignment_status（逗号分隔）过滤任务状态与当前用户的分配状态；
+    带 cursor/page/per_page 时分页返回，否则返回全部任务。
+    """
     try:
-        query = CollaborationTask.query.join(
-            CollaborationTaskAssignment, 
-            CollaborationTask.id == CollaborationTaskAssignment.task_id,
-            isouter=True
-        ).filter(
-            or_(
-                CollaborationTask.created_by == current_user.id,
-                CollaborationTaskAssignment.assigned_to == current_user.id
+        query = CollaborationTask.query_for_user(
+            current_user.id,
+            statuses=get_list_arg('status'),
+            assignment_statuses=get_list_arg('assignment_status')
+        )
+        pagination = None
+        if has_pagination_args():
+            rows, pagination = paginate_from_request(
+                query, [CollaborationTask.created_at, CollaborationTask.id], descending=True
             )
-        ).distinct()
-        
-        query = query.order_by(CollaborationTask.created_at.desc())
-        
+        else:
+            rows = query.order_by(CollaborationTask.created_at.desc(), CollaborationTask.id.desc()).all()
+
         tasks_list = []
-        for task in query.all():
+        for task, assignment in rows:
             task_data = task.to_dict(include_progress=True)
             if task.created_by == current_user.id:
                 task_data['user_role'] = 'creator'
-            else:
-                assignment = task.get_assignment_for_user(current_user.id)
-                if assignment:
-                    task_data['user_role'] = 'assignee'
-                    task_data['assignment'] = assignment.to_dict()
-                    task_data['user_assignment_status'] = assignment.status
+            elif assignment:
+                task_data['user_role'] = 'assignee'
+                task_data['assignment'] = assignment.to_dict()
+                task_data['user_assignment_status'] = assignment.status
             tasks_list.append(task_data)
 
-        return jsonify(create_response(success=True, data={'tasks': tasks_list}))
+        data = {'tasks': tasks_list}
+        if pagination is not None:
+            data['pagination'] = pagination
+        return jsonify(create_response(success=True, data=data))
+    except InvalidCursorError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_CURSOR', 'message': str(e)})), 400
     except Exception as e:
         current_app.logger.error(f"Error getting collaboration tasks: {e}")
         return jsonify(create_response(
@@ -65,9 +79,159 @@ def get_collaboration_tasks(current_user):
         )), 500
 
 # ... 其他路由保持不变 ...
+def parse_deadline(deadline_str):
+    """解析截止日期字符串，格式无效时抛出 ValueError"""
+    if not deadline_str:
+        return None
+    try:
+        return datetime.fromisoformat(deadline_str)
+    except (ValueError, TypeError):
+        raise ValueError('截止日期格式无效')
+
+def create_task_from_saved_file(current_user, file_info, title, description, deadline):
+    """基于已保存到 UPLOAD_FOLDER 的文件创建协作任务并导入QA对，返回响应
+
+    文件记录、任务与QA对在同一事务中写入，解析失败时整体回滚并删除文件。
+    其他异常由调用方处理。
+    """
+    reuse_existing_blob(file_info)
+    file_record = File.create_file(
+        filename=file_info['filename'],
+        original_filename=file_info['original_filename'],
+        file_path=file_info['file_path'],
+        file_size=file_info['file_size'],
+        file_type=file_info['file_type'],
+        uploaded_by=current_user.id,
+        content_hash=file_info.get('content_hash'),
+        commit=False
+    )
+
+    task = CollaborationTask.create_task(
+        title=title,
+        description=description,
+        original_filename=file_info['original_filename'],
+        created_by=current_user.id,
+        total_qa_pairs=0,
+        deadline=deadline,
+        commit=False
+    )
+    task.file_id = file_record.id
+
+    if current_app.config['INGEST_ASYNC_ENABLED']:
+        # 任务保持 importing 状态，QA对由后台导入任务写入
+        task.status = 'importing'
+        job = IngestJob.create_job(
+            file_id=file_record.id,
+            task_id=task.id,
+            created_by=current_user.id,
+            original_filename=file_info['original_filename'],
+            commit=False
+        )
+        db.session.commit()
+        start_ingest_job(job.id)
+
+        task_data = task.to_dict()
+        task_data['ingest_job'] = job.to_dict()
+        response = jsonify(create_response(success=True, data=task_data, message='协作任务已创建，正在后台导入QA对'))
+        response.headers['Location'] = url_for('ingest_job.get_ingest_job', job_id=job.id)
+        return response, 202
+
+    try:
+        stats = ingest_jsonl_file(file_info['file_path'], file_record.id, content_hash=file_info.get('content_hash'))
+    except JsonlParseError as e:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(success=False, error={'code': 'PARSE_ERROR', 'message': str(e)})), 400
+
+    if stats.rows == 0:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(success=False, error={'code': 'PARSE_ERROR', 'message': '文件中没有有效的QA对'})), 400
+
+    task.total_qa_pairs = stats.rows
+    db.session.commit()
+
+    task_data = task.to_dict()
+    task_data['ingest'] = stats.to_dict()
+    return jsonify(create_response(success=True, data=task_data, message='协作任务创建成功')), 201
+
+def create_task_from_stream(current_user, file_info, stream, title, description, deadline):
+    """边接收请求体边创建协作任务并导入QA对，返回响应
+
+    请求体只能读取一次，因此始终同步导入，不经过后台导入任务。
+    解析失败时整体回滚并删除已写入的部分文件，其他异常由调用方处理。
+    """
+    file_record = File.create_file(
+        filename=file_info['filename'],
+        original_filename=file_info['original_filename'],
+        file_path=file_info['file_path'],
+        file_size=0,
+        file_type=file_info['file_type'],
+        uploaded_by=current_user.id,
+        commit=False
+    )
+
+    task = CollaborationTask.create_task(
+        title=title,
+        description=description,
+        original_filename=file_info['original_filename'],
+        created_by=current_user.id,
+        total_qa_pairs=0,
+        deadline=deadline,
+        commit=False
+    )
+    task.file_id = file_record.id
+
+    try:
+        stats = ingest_upload_stream(stream, file_info, file_record)
+    except JsonlParseError as e:
+        db.session.rollback()
+        delete_file_safe(file_info['file_path'])
+        return jsonify(create_response(success=False, error={'code': 'PARSE_ERROR', 'message': str(e)})), 400
+
+    if stats.rows == 0:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(success=False, error={'code': 'PARSE_ERROR', 'message': '文件中没有有效的QA对'})), 400
+
+    task.total_qa_pairs = stats.rows
+    db.session.commit()
+
+    task_data = task.to_dict()
+    task_data['ingest'] = stats.to_dict()
+    return jsonify(create_response(success=True, data=task_data, message='协作任务创建成功')), 201
+
+def _create_collaboration_task_from_stream(current_user):
+    """处理以请求体直接上传文件的任务创建，任务信息通过查询参数提供"""
+    title = request.args.get('title')
+    if not title:
+        return jsonify(create_response(success=False, error={'code': 'MISSING_FIELDS', 'message': '任务标题和文件不能为空'})), 400
+
+    try:
+        deadline_obj = parse_deadline(request.args.get('deadline'))
+    except ValueError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_DATE_FORMAT', 'message': str(e)})), 400
+
+    file_info, error = prepare_stream_upload(request.args.get('filename', ''), current_app.config['UPLOAD_FOLDER'])
+    if error:
+        return jsonify(create_response(success=False, error={'code': 'UPLOAD_ERROR', 'message': error})), 400
+
+    try:
+        return create_task_from_stream(
+            current_user, file_info, request.stream, title, request.args.get('description', ''), deadline_obj
+        )
+    except Exception as e:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        current_app.logger.error(f"Error creating collaboration task: {e}")
+        return jsonify(create_response(success=False, error={'code': 'INTERNAL_ERROR', 'message': f'创建协作任务失败: {str(e)}'})), 500
+
 @collaboration_task_bp.route('/collaboration-tasks', methods=['POST'])
 @admin_required
 def create_collaboration_task(current_user):
+    if request.mimetype != 'multipart/form-data':
+        return _create_collaboration_task_from_stream(current_user)
+
     if 'file' not in request.files:
         return jsonify(create_response(success=False, error={'code': 'NO_FILE', 'message': '没有选择文件'})), 400
     
@@ -76,51 +240,25 @@ def create_collaboration_task(current_user):
     if not title or file.filename == '':
         return jsonify(create_response(success=False, error={'code': 'MISSING_FIELDS', 'message': '任务标题和文件不能为空'})), 400
 
+    try:
+        deadline_obj = parse_deadline(request.form.get('deadline'))
+    except ValueError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_DATE_FORMAT', 'message': str(e)})), 400
+
+    file_info = None
     try:
         file_info, error = save_uploaded_file(file, current_app.config['UPLOAD_FOLDER'])
         if error:
             return jsonify(create_response(success=False, error={'code': 'UPLOAD_ERROR', 'message': error})), 400
-        
-        qa_pairs, parse_error = parse_jsonl_file(file_info['file_path'])
-        if parse_error:
-            os.remove(file_info['file_path'])
-            return jsonify(create_response(success=False, error={'code': 'PARSE_ERROR', 'message': parse_error})), 400
-
-        deadline_str = request.form.get('deadline')
-        deadline_obj = None
-        if deadline_str:
-            try:
-                deadline_obj = datetime.fromisoformat(deadline_str)
-            except (ValueError, TypeError):
-                return jsonify(create_response(success=False, error={'code': 'INVALID_DATE_FORMAT', 'message': '截止日期格式无效'})), 400
-
-        task = CollaborationTask.create_task(
-            title=title,
-            description=request.form.get('description', ''),
-            original_filename=file_info['original_filename'],
-            created_by=current_user.id,
-            total_qa_pairs=len(qa_pairs),
-            deadline=deadline_obj
-        )
-        
-        file_record = File.create_file(
-            filename=file_info['filename'],
-            original_filename=file_info['original_filename'],
-            file_path=file_info['file_path'],
-            file_size=file_info['file_size'],
-            file_type=file_info['file_type'],
-            uploaded_by=current_user.id
+
+        return create_task_from_saved_file(
+            current_user, file_info, title, request.form.get('description', ''), deadline_obj
         )
-        
-        task.file_id = file_record.id
-        db.session.commit()
-        
-        QAPair.create_from_jsonl_data(file_record.id, qa_pairs)
-        
-        return jsonify(create_response(success=True, data=task.to_dict(), message='协作任务创建成功')), 201
 
     except Exception as e:
         db.session.rollback()
+        if file_info:
+            discard_uploaded_file(file_info)
         current_app.logger.error(f"Error creating collaboration task: {e}")
         return jsonify(create_response(success=False, error={'code': 'INTERNAL_ERROR', 'message': f'创建协作任务失败: {str(e)}'})), 500
 
@@ -159,6 +297,8 @@ def assign_collaboration_task(current_user, task_id):
         task = CollaborationTask.query.get_or_404(task_id)
         if not task.can_be_managed_by(current_user):
             return jsonify(create_response(success=False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+        if task.status == 'importing':
+            return jsonify(create_response(success=False, error={'code': 'TASK_IMPORTING', 'message': '任务数据仍在导入中，请稍后再分配'})), 400
         if task.status != 'draft':
                  return jsonify(create_response(success=False, error={'code': 'TASK_NOT_DRAFT', 'message': '任务已被分配，无法重复操作'})), 400
 
@@ -221,6 +361,8 @@ def assign_collaboration_task(current_user, task_id):
             db.session.add(assignment)
         
         task.status = 'in_progress'
+        task.assignment_count = len(assignments)
+        task.completed_assignment_count = 0
         db.session.commit()
         
         send_task_assignment_notifications(task, task.assignments)
@@ -243,40 +385,52 @@ def get_editor_data(current_user, task_id):
         if not assignment:
             return jsonify(create_response(success=False, error={'code': 'NOT_ASSIGNED', 'message': '您未被分配此任务'})), 403
 
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 5, type=int)
-
         deleted_drafts = CollaborationTaskDraft.query.filter_by(
             task_id=task_id,
             user_id=current_user.id,
             is_deleted=True
         ).with_entities(CollaborationTaskDraft.qa_pair_id).all()
-        deleted_qa_ids = [d.qa_pair_id for d in deleted_drafts]
+        deleted_qa_ids = {d.qa_pair_id for d in deleted_drafts}
+
+        # 缓冲中尚未写入数据库的自动暂存优先于数据库中的草稿
+        buffered = get_buffered_drafts(task_id, current_user.id)
+        for qa_pair_id, entry in buffered.items():
+            if entry['is_deleted']:
+                deleted_qa_ids.add(qa_pair_id)
+            else:
+                deleted_qa_ids.discard(qa_pair_id)
 
         paginated_qa_query = QAPair.query.filter(
             QAPair.file_id == task.file_id,
             QAPair.index_in_file.between(assignment.start_index, assignment.end_index),
             QAPair.id.notin_(deleted_qa_ids)
-        ).order_by(QAPair.index_in_file)
+        )
+        qa_items, pagination = paginate_from_request(
+            paginated_qa_query, [QAPair.index_in_file, QAPair.id], default_per_page=5
+        )
 
-        paginated_qa = paginated_qa_query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        qa_ids_on_page = [qa.id for qa in paginated_qa.items]
+        qa_ids_on_page = [qa.id for qa in qa_items]
         drafts = CollaborationTaskDraft.query.filter(
             CollaborationTaskDraft.task_id == task_id,
             CollaborationTaskDraft.user_id == current_user.id,
             CollaborationTaskDraft.qa_pair_id.in_(qa_ids_on_page),
             CollaborationTaskDraft.is_deleted == False
         ).all()
-        drafts_map = {draft.qa_pair_id: draft for draft in drafts}
+        drafts_map = {draft.qa_pair_id: (draft.draft_prompt, draft.draft_completion) for draft in drafts}
+        for qa_pair_id in qa_ids_on_page:
+            entry = buffered.get(qa_pair_id)
+            if entry and not entry['is_deleted']:
+                prompt, completion = drafts_map.get(qa_pair_id, (None, None))
+                drafts_map[qa_pair_id] = (
+                    entry['prompt'] if entry['prompt'] is not None else prompt,
+                    entry['completion'] if entry['completion'] is not None else completion
+                )
 
         qa_pairs_data = []
-        for qa in paginated_qa.items:
+        for qa in qa_items:
             qa_dict = qa.to_dict()
             if qa.id in drafts_map:
-                draft = drafts_map[qa.id]
-                qa_dict['prompt'] = draft.draft_prompt
-                qa_dict['completion'] = draft.draft_completion
+                qa_dict['prompt'], qa_dict['completion'] = drafts_map[qa.id]
                 qa_dict['has_draft'] = True
             else:
                 qa_dict['has_draft'] = False
@@ -290,14 +444,11 @@ def get_editor_data(current_user, task_id):
             'qa_pairs': qa_pairs_data,
             'assignment_info': assignment_info,
             'task_info': {'deadline': task.deadline.isoformat() if task.deadline else None},
-            'pagination': {
-                'page': paginated_qa.page,
-                'per_page': paginated_qa.per_page,
-                'total': paginated_qa.total,
-                'pages': paginated_qa.pages,
-            }
+            'pagination': pagination
         }))
 
+    except InvalidCursorError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_CURSOR', 'message': str(e)})), 400
     except AttributeError as e:
         current_app.logger.error(f"AttributeError in get_editor_data for task {task_id}: {e}")
         return jsonify(create_response(success=False, error={'code': 'INTERNAL_ERROR', 'message': f"获取QA对失败: 读取草稿属性时出错 - {str(e)}"})), 500
@@ -318,29 +469,12 @@ def submit_assignment(current_user, task_id):
         if assignment.status == 'completed':
             return jsonify(create_response(success=False, error={'code': 'ALREADY_COMPLETED', 'message': '任务已提交，请勿重复操作'})), 400
 
-        drafts = CollaborationTaskDraft.query.filter_by(task_id=task_id, user_id=current_user.id).all()
-
-        for draft in drafts:
-            qa_pair = QAPair.query.get(draft.qa_pair_id)
-            if qa_pair:
-                if draft.is_deleted:
-                    qa_pair.soft_delete(deleted_by=current_user.id)
-                else:
-                    qa_pair.edit(
-                        prompt=draft.draft_prompt,
-                        completion=draft.draft_completion,
-                        editor_id=current_user.id
-                    )
-        
-        assignment.submit()
-        db.session.commit()
-        
-        if assignment.check_completion_and_notify():
-            db.session.refresh(assignment.task) 
+        with drafts_flushed(task_id, current_user.id):
+            stats = submit_assignment_drafts(assignment)
+        if stats.task_completed:
             send_task_completion_notification(assignment.task)
-   
         
-        return jsonify(create_response(success=True, message="任务提交成功"))
+        return jsonify(create_response(success=True, data=stats.to_dict(), message="任务提交成功"))
 
     except Exception as e:
         db.session.rollback()
@@ -362,6 +496,7 @@ def delete_qa_pair_in_task(current_user, task_id, qa_pair_id):
         if not (assignment.start_index <= qa_pair.index_in_file <= assignment.end_index):
             return jsonify(create_response(success=False, error={'code': 'FORBIDDEN', 'message': 'QA对不在您的分配范围内'})), 403
 
+        flush_drafts(task_id, current_user.id)
         CollaborationTaskDraft.save_draft(
             task_id=task_id,
             user_id=current_user.id,
@@ -413,6 +548,7 @@ def save_draft(current_user, task_id):
     prompt = data.get('prompt')
     completion = data.get('completion')
     
+    flush_drafts(task_id, current_user.id)
     draft = CollaborationTaskDraft.save_draft(
         task_id=task_id,
         user_id=current_user.id,
@@ -430,46 +566,36 @@ def get_summary_data(current_user, task_id):
         if not task.can_be_managed_by(current_user):
             return jsonify(create_response(success=False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
 
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 5, type=int)
-
         paginated_qa_query = QAPair.query.filter(
             QAPair.file_id == task.file_id,
             QAPair.is_deleted == False
-        ).options(joinedload(QAPair.editor)).order_by(QAPair.index_in_file)
-        
-        paginated_qa = paginated_qa_query.paginate(page=page, per_page=per_page, error_out=False)
-        summary_items = [qa.to_dict(include_edit_history=True) for qa in paginated_qa.items]
+        ).options(joinedload(QAPair.editor))
+
+        qa_items, pagination = paginate_from_request(
+            paginated_qa_query, [QAPair.index_in_file, QAPair.id], default_per_page=5
+        )
+        summary_items = [qa.to_dict(include_edit_history=True) for qa in qa_items]
 
         participants = []
         for p in task.assignments:
-            deleted_count = CollaborationTaskDraft.query.filter_by(
-                task_id=task.id,
-                user_id=p.assigned_to,
-                is_deleted=True
-            ).count()
-            
             participants.append({
                 'user_id': p.assignee.id,
                 'user_name': p.assignee.display_name,
                 'status': p.status,
                 'qa_count': p.get_qa_count(),
                 'completed_at': p.completed_at.isoformat() if p.completed_at else None,
-                'deleted_count': deleted_count 
+                'deleted_count': p.deleted_pair_count
             })
 
         return jsonify(create_response(success=True, data={
             'summary_items': summary_items,
             'participants': participants,
             'progress_stats': task.get_progress(),
-            'pagination': {
-                'page': paginated_qa.page,
-                'per_page': paginated_qa.per_page,
-                'total': paginated_qa.total,
-                'pages': paginated_qa.pages,
-            }
+            'pagination': pagination
         }))
 
+    except InvalidCursorError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_CURSOR', 'message': str(e)})), 400
     except Exception as e:
         current_app.logger.error(f"Error getting summary data for task {task_id}: {e}")
         return jsonify(create_response(success=False, error={'code': 'INTERNAL_ERROR', 'message': f'获取汇总数据失败: {str(e)}'})), 500
@@ -486,21 +612,17 @@ def export_collaboration_task(current_user, task_id):
         # if task.status != 'completed':
             # return jsonify(create_response(False, error={'code': 'TASK_NOT_COMPLETED', 'message': '任务尚未完成，无法导出'})), 400
 
-        export_format = request.args.get('format', 'jsonl').lower()
+        export_format = parse_export_format(request.args.get('format'))
         # 只导出未被删除的 QA 对
-        qa_pairs = QAPair.query.filter_by(file_id=task.file_id, is_deleted=False).order_by(QAPair.index_in_file).all()
-        
-        if not qa_pairs:
+        version = QAPair.get_export_version(task.file_id)
+        if version[1] == 0:
             return jsonify(create_response(False, error={'code': 'NO_DATA', 'message': '没有可导出的数据'})), 400
 
         filename = create_export_filename(task.original_filename, export_format, 'collaboration_edited')
-
-        if export_format == 'excel':
-            mem_file, mimetype = export_to_excel(qa_pairs)
-            return send_file(mem_file, as_attachment=True, download_name=filename, mimetype=mimetype)
-        else:
-            mem_file, mimetype = export_to_jsonl(qa_pairs)
-            return send_file(mem_file, as_attachment=True, download_name=filename, mimetype=mimetype)
+        return send_export(
+            task.file_id, export_format, 'collaboration', version, filename,
+            lambda: QAPair.iter_for_export(task.file_id)
+        )
 
     except Exception as e:
         current_app.logger.error(f"导出协作任务失败 (Task ID: {task_id}): {e}", exc_info=True)
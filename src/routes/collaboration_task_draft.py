@@ -4,6 +4,8 @@ from src.models.collaboration_task import CollaborationTask, CollaborationTaskAs
 from src.models.qa_pair import QAPair
 from src.models import db
 from src.utils.auth import login_required, create_response
+from src.utils.draft_buffer import buffer_drafts, flush_drafts, get_buffered_drafts, buffered_draft_dict
+from src.utils.activity_tracker import record_activity, get_tracked_session, start_tracked_session, end_tracked_session
 from datetime import datetime, timedelta
 
 collaboration_task_draft_bp = Blueprint('collaboration_task_draft', __name__)
@@ -47,20 +49,31 @@ def save_draft(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': 'QA对不在您的分配范围内'}
             )), 403
         
-        draft = CollaborationTaskDraft.save_draft(
-            task_id=task_id,
-            user_id=current_user.id,
-            qa_pair_id=qa_pair_id,
-            prompt=prompt,
-            completion=completion,
-            is_auto_saved=is_auto_saved
-        )
-        
-        CollaborationTaskSession.update_activity(task_id, current_user.id)
+        # 自动暂存写入草稿缓冲，显式保存前先刷写缓冲，保证写入顺序
+        item = {'qa_pair_id': qa_pair_id, 'prompt': prompt, 'completion': completion}
+        entries = buffer_drafts(task_id, current_user.id, [item]) if is_auto_saved else None
+        if entries is not None:
+            base = CollaborationTaskDraft.get_draft(task_id, current_user.id, qa_pair_id)
+            draft_data = buffered_draft_dict(
+                task_id, current_user.id, qa_pair_id, entries[qa_pair_id], base.to_dict() if base else None
+            )
+        else:
+            flush_drafts(task_id, current_user.id)
+            draft = CollaborationTaskDraft.save_draft(
+                task_id=task_id,
+                user_id=current_user.id,
+                qa_pair_id=qa_pair_id,
+                prompt=prompt,
+                completion=completion,
+                is_auto_saved=is_auto_saved
+            )
+            draft_data = draft.to_dict()
+        
+        record_activity(task_id, current_user.id)
         
         return jsonify(create_response(
             success=True,
-            data=draft.to_dict(),
+            data=draft_data,
             message='草稿保存成功' if not is_auto_saved else '自动暂存成功'
         ))
     
@@ -71,6 +84,90 @@ def save_draft(current_user, task_id):
             error={'code': 'INTERNAL_ERROR', 'message': f'保存草稿失败: {str(e)}'}
         )), 500
 
+@collaboration_task_draft_bp.route('/collaboration-tasks/<int:task_id>/drafts/batch', methods=['POST'])
+@login_required
+def save_drafts_batch(current_user, task_id):
+    """批量保存草稿
+
+    请求体: {"drafts": [{"qa_pair_id", "prompt", "completion", "is_deleted"}], "is_auto_saved": true}
+    整批草稿用一条查询校验分配范围，一条 upsert 语句写入，并在同一事务中更新会话活动；
+    启用草稿缓冲时自动暂存只写入缓冲。任一QA对不在分配范围内时整批拒绝。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('drafts')
+        is_auto_saved = bool(data.get('is_auto_saved', False))
+
+        if not isinstance(items, list) or not items:
+            return jsonify(create_response(
+                success=False,
+                error={'code': 'MISSING_PARAMETER', 'message': 'drafts 必须是非空数组'}
+            )), 400
+
+        max_size = current_app.config.get('DRAFT_BATCH_MAX_SIZE', 500)
+        if len(items) > max_size:
+            return jsonify(create_response(
+                success=False,
+                error={'code': 'BATCH_TOO_LARGE', 'message': f'单次最多保存 {max_size} 条草稿'}
+            )), 400
+
+        if not all(isinstance(item, dict) and isinstance(item.get('qa_pair_id'), int) for item in items):
+            return jsonify(create_response(
+                success=False,
+                error={'code': 'MISSING_PARAMETER', 'message': '每条草稿都需要整数 qa_pair_id'}
+            )), 400
+
+        assignment = CollaborationTaskAssignment.query.filter_by(
+            task_id=task_id,
+            assigned_to=current_user.id
+        ).first()
+
+        if not assignment:
+            return jsonify(create_response(
+                success=False,
+                error={'code': 'FORBIDDEN', 'message': '权限不足'}
+            )), 403
+
+        qa_pair_ids = {item['qa_pair_id'] for item in items}
+        valid_ids = {row.id for row in db.session.query(QAPair.id).join(
+            CollaborationTask, CollaborationTask.file_id == QAPair.file_id
+        ).filter(
+            CollaborationTask.id == task_id,
+            QAPair.id.in_(qa_pair_ids),
+            QAPair.index_in_file.between(assignment.start_index, assignment.end_index)
+        )}
+        invalid_ids = sorted(qa_pair_ids - valid_ids)
+        if invalid_ids:
+            return jsonify(create_response(
+                success=False,
+                error={'code': 'FORBIDDEN', 'message': f'QA对不在您的分配范围内: {invalid_ids}'}
+            )), 403
+
+        entries = buffer_drafts(task_id, current_user.id, items) if is_auto_saved else None
+        buffered = entries is not None
+        if buffered:
+            saved = len(entries)
+        else:
+            flush_drafts(task_id, current_user.id)
+            saved = CollaborationTaskDraft.upsert_drafts(
+                task_id, current_user.id, items, is_auto_saved=is_auto_saved, commit=False
+            )
+        record_activity(task_id, current_user.id, commit=False)
+        db.session.commit()
+
+        return jsonify(create_response(
+            success=True,
+            data={'saved': saved, 'buffered': buffered},
+            message='草稿保存成功' if not is_auto_saved else '自动暂存成功'
+        ))
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify(create_response(
+            success=False,
+            error={'code': 'INTERNAL_ERROR', 'message': f'批量保存草稿失败: {str(e)}'}
+        )), 500
+
 # ... (rest of the file remains unchanged) ...
 @collaboration_task_draft_bp.route('/collaboration-tasks/<int:task_id>/drafts', methods=['GET'])
 @login_required
@@ -88,12 +185,15 @@ def get_drafts(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        drafts = CollaborationTaskDraft.get_user_drafts(task_id, current_user.id)
+        drafts = {draft.qa_pair_id: draft.to_dict() for draft in CollaborationTaskDraft.get_user_drafts(task_id, current_user.id)}
+        # 叠加缓冲中尚未写入数据库的自动暂存
+        for qa_pair_id, entry in get_buffered_drafts(task_id, current_user.id).items():
+            drafts[qa_pair_id] = buffered_draft_dict(task_id, current_user.id, qa_pair_id, entry, drafts.get(qa_pair_id))
         
         return jsonify(create_response(
             success=True,
             data={
-                'drafts': [draft.to_dict() for draft in drafts],
+                'drafts': list(drafts.values()),
                 'count': len(drafts)
             }
         ))
@@ -121,8 +221,14 @@ def get_draft(current_user, task_id, qa_pair_id):
             )), 403
         
         draft = CollaborationTaskDraft.get_draft(task_id, current_user.id, qa_pair_id)
+        entry = get_buffered_drafts(task_id, current_user.id).get(qa_pair_id)
         
-        if draft:
+        if entry:
+            return jsonify(create_response(
+                success=True,
+                data=buffered_draft_dict(task_id, current_user.id, qa_pair_id, entry, draft.to_dict() if draft else None)
+            ))
+        elif draft:
             return jsonify(create_response(
                 success=True,
                 data=draft.to_dict()
@@ -156,6 +262,7 @@ def clear_draft(current_user, task_id, qa_pair_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
+        flush_drafts(task_id, current_user.id)
         CollaborationTaskDraft.clear_draft(task_id, current_user.id, qa_pair_id)
         
         return jsonify(create_response(
@@ -186,7 +293,7 @@ def start_session(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        session = CollaborationTaskSession.start_session(task_id, current_user.id)
+        session = start_tracked_session(task_id, current_user.id)
         
         return jsonify(create_response(
             success=True,
@@ -217,12 +324,12 @@ def update_session_activity(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        session = CollaborationTaskSession.update_activity(task_id, current_user.id)
+        session = record_activity(task_id, current_user.id)
         
         if session:
             return jsonify(create_response(
                 success=True,
-                data=session.to_dict()
+                data=session
             ))
         else:
             return jsonify(create_response(
@@ -253,7 +360,7 @@ def end_session(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        session = CollaborationTaskSession.end_session(task_id, current_user.id)
+        session = end_tracked_session(task_id, current_user.id)
         
         if session:
             return jsonify(create_response(
@@ -290,12 +397,12 @@ def get_current_session(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        session = CollaborationTaskSession.get_active_session(task_id, current_user.id)
+        session = get_tracked_session(task_id, current_user.id)
         
         if session:
             return jsonify(create_response(
                 success=True,
-                data=session.to_dict()
+                data=session
             ))
         else:
             return jsonify(create_response(
@@ -326,10 +433,10 @@ def check_idle_status(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        session = CollaborationTaskSession.get_active_session(task_id, current_user.id)
+        session = get_tracked_session(task_id, current_user.id)
         
         if session:
-            idle_time = session.get_idle_time()
+            idle_time = session['idle_time']
             is_idle = idle_time > 15  # 15分钟无活动视为空闲
             should_remind = idle_time > 10  # 10分钟后开始提醒
             
@@ -339,7 +446,7 @@ def check_idle_status(current_user, task_id):
                     'is_idle': is_idle,
                     'should_remind': should_remind,
                     'idle_time': idle_time,
-                    'session': session.to_dict()
+                    'session': session
                 }
             ))
         else:
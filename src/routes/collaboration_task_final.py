@@ -5,6 +5,8 @@ from src.models.qa_pair import QAPair
 from src.models.user import User
 from src.models import db
 from src.utils.auth import login_required, admin_required, create_response
+from src.utils.file_handler import iter_jsonl_export, stream_download, create_export_filename, JSONL_MIMETYPE
+from src.utils.export_jobs import final_result_metadata
 from datetime import datetime
 import json
 import io
@@ -58,6 +60,7 @@ def reject_assignment(current_user, task_id):
         # 更新任务状态
         task.status = 'in_progress'
         task.completed_at = None
+        task.completed_assignment_count = CollaborationTask.completed_assignment_count - 1
         
         # 发送打回通知
         from src.models.notification import Notification
@@ -66,7 +69,7 @@ def reject_assignment(current_user, task_id):
             user_id=assignment.assigned_to,
             notification_type='task_rejected',
             title='任务被打回',
-            content=f'您的协作任务"{task.name}"被管理员打回，请重新处理。原因：{reject_reason}',
+            content=f'您的协作任务"{task.title}"被管理员打回，请重新处理。原因：{reject_reason}',
             related_task_id=task_id
         )
         
@@ -163,45 +166,20 @@ def export_final_result(current_user, task_id):
                 error={'code': 'FORBIDDEN', 'message': '权限不足'}
             )), 403
         
-        # 获取汇总数据
-        summary_items = CollaborationTaskSummary.query.filter_by(
-            task_id=task_id
-        ).order_by(CollaborationTaskSummary.qa_pair_index).all()
-        
-        if not summary_items:
+        if not db.session.query(CollaborationTaskSummary.query.filter_by(task_id=task_id).exists()).scalar():
             return jsonify(create_response(
                 success=False,
                 error={'code': 'NO_DATA', 'message': '没有可导出的数据'}
             )), 400
         
-        # 构建JSONL数据
-        jsonl_lines = []
-        for item in summary_items:
-            qa_data = {
-                'prompt': item.edited_prompt,
-                'completion': item.edited_completion,
-                'metadata': {
-                    'original_index': item.qa_pair_index,
-                    'editor': item.editor_name,
-                    'is_modified': item.is_modified,
-                    'task_id': task_id,
-                    'task_name': task.name
-                }
-            }
-            jsonl_lines.append(json.dumps(qa_data, ensure_ascii=False))
-        
-        jsonl_content = '\n'.join(jsonl_lines)
-        
-        return jsonify(create_response(
-            success=True,
-            data={
-                'content': jsonl_content,
-                'filename': f'{task.name}_final_result.jsonl',
-                'total_items': len(summary_items),
-                'export_time': datetime.utcnow().isoformat()
-            },
-            message='导出成功'
-        ))
+        # 直接以JSONL附件流式返回，不再把整个文件内容嵌入JSON响应；
+        # 大任务可通过 /collaboration-tasks/<id>/export-jobs 在后台导出
+        filename = create_export_filename(task.original_filename, 'jsonl', 'final_result')
+        chunks = iter_jsonl_export(
+            CollaborationTaskSummary.iter_for_export(task_id),
+            metadata=final_result_metadata(task)
+        )
+        return stream_download(chunks, filename, JSONL_MIMETYPE)
     
     except Exception as e:
         return jsonify(create_response(
@@ -294,6 +272,7 @@ def reopen_task(current_user, task_id):
         task.completed_at = None
         task.finalized_at = None
         task.finalized_by = None
+        task.completed_assignment_count = 0
         
         # 重置所有分配状态为进行中
         assignments = CollaborationTaskAssignment.query.filter_by(task_id=task_id).all()
@@ -310,7 +289,7 @@ def reopen_task(current_user, task_id):
                     user_id=assignment.assigned_to,
                     notification_type='task_reopened',
                     title='任务重新开放',
-                    content=f'协作任务"{task.name}"已重新开放，请继续处理。原因：{reopen_reason}',
+                    content=f'协作任务"{task.title}"已重新开放，请继续处理。原因：{reopen_reason}',
                     related_task_id=task_id
                 )
         
@@ -2,11 +2,11 @@ from flask import Blueprint, request, jsonify, current_app
 from sqlalchemy.orm import joinedload
 from src.models.collaboration_task_summary import CollaborationTaskSummary
 from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
-from src.models.collaboration_task_draft import CollaborationTaskDraft
 from src.models.qa_pair import QAPair
 from src.models.user import User
 from src.models import db
 from src.utils.auth import login_required, admin_required, create_response
+from src.utils.pagination import paginate_from_request, InvalidCursorError
 from datetime import datetime
 
 collaboration_task_summary_bp = Blueprint('collaboration_task_summary', __name__)
@@ -21,23 +21,20 @@ def get_collaboration_task_summary(current_user, task_id):
         if task.created_by != current_user.id:
             return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
             
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
         if not task.file_id:
              return jsonify(create_response(False, error={'code': 'NOT_FOUND', 'message': '任务未关联任何文件'})), 404
 
         summary_query = CollaborationTaskSummary.query.filter_by(task_id=task_id)
         
         if summary_query.first():
-            pagination = summary_query.order_by(CollaborationTaskSummary.id).paginate(page=page, per_page=per_page, error_out=False)
-            summary_items = [item.to_dict(include_edit_history=True) for item in pagination.items]
+            items, pagination = paginate_from_request(summary_query, [CollaborationTaskSummary.id])
+            summary_items = [item.to_dict(include_edit_history=True) for item in items]
         else:
             qa_pair_query = QAPair.query.filter_by(file_id=task.file_id, is_deleted=False)
-            pagination = qa_pair_query.order_by(QAPair.index_in_file).paginate(page=page, per_page=per_page, error_out=False)
-            
+            items, pagination = paginate_from_request(qa_pair_query, [QAPair.index_in_file, QAPair.id])
+
             summary_items = []
-            for qa in pagination.items:
+            for qa in items:
                 item_dict = qa.to_dict(include_edit_history=True)
                 item_dict['is_modified'] = False
                 summary_items.append(item_dict)
@@ -46,17 +43,12 @@ def get_collaboration_task_summary(current_user, task_id):
             success=True,
             data={
                 'summary_items': summary_items,
-                'pagination': {
-                    'page': pagination.page,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'pages': pagination.pages,
-                    'has_prev': pagination.has_prev,
-                    'has_next': pagination.has_next
-                }
+                'pagination': pagination
             }
         ))
-    
+
+    except InvalidCursorError as e:
+        return jsonify(create_response(False, error={'code': 'INVALID_CURSOR', 'message': str(e)})), 400
     except Exception as e:
         current_app.logger.error(f"获取任务 {task_id} 汇总失败: {e}", exc_info=True)
         return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'获取汇总失败: {str(e)}'})), 500
@@ -82,13 +74,8 @@ def get_collaboration_task_progress(current_user, task_id):
         for a in assignments:
             participant_data = a.to_dict()
             
-            # BUG 2 修复: 计算并添加每个参与者的删除数量
-            deleted_count = CollaborationTaskDraft.query.filter_by(
-                task_id=task_id,
-                user_id=a.assigned_to,
-                is_deleted=True
-            ).count()
-            participant_data['deleted_count'] = deleted_count
+            # BUG 2 修复: 添加每个参与者的删除数量（取自分配上的计数列）
+            participant_data['deleted_count'] = a.deleted_pair_count
             
             participants.append(participant_data)
             
@@ -0,0 +1,94 @@
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for
+import os
+from src.models.export_job import ExportJob
+from src.models.collaboration_task import CollaborationTask
+from src.models.collaboration_task_summary import CollaborationTaskSummary
+from src.models.qa_pair import QAPair
+from src.models import db
+from src.utils.auth import login_required, create_response
+from src.utils.file_handler import create_export_filename, EXCEL_MIMETYPE, JSONL_MIMETYPE
+from src.utils.export_jobs import start_export_job, get_live_progress
+
+export_job_bp = Blueprint('export_job', __name__)
+
+def _job_to_dict(job):
+    """导出任务详情，下载令牌有效时附带下载地址"""
+    download_url = None
+    if job.is_download_available():
+        download_url = url_for('export_job.download_export', token=job.download_token)
+    return job.to_dict(live_progress=get_live_progress(job.id), download_url=download_url)
+
+@export_job_bp.route('/collaboration-tasks/<int:task_id>/export-jobs', methods=['POST'])
+@login_required
+def create_export_job(current_user, task_id):
+    """创建后台导出任务
+
+    kind 为 edited 时导出当前的QA对（与 /export 相同），为 final 时导出带元数据的最终汇总结果。
+    """
+    try:
+        task = CollaborationTask.query.get_or_404(task_id)
+        data = request.get_json(silent=True) or {}
+        kind = data.get('kind', 'edited')
+        export_format = data.get('format', 'jsonl').lower()
+
+        if kind not in ('edited', 'final'):
+            return jsonify(create_response(False, error={'code': 'INVALID_REQUEST', 'message': '无效的导出类型'})), 400
+        if export_format not in ('jsonl', 'excel'):
+            return jsonify(create_response(False, error={'code': 'INVALID_FORMAT', 'message': '不支持的导出格式'})), 400
+
+        # 权限与同步导出接口保持一致：最终结果只有任务创建者可以导出
+        if kind == 'final':
+            allowed = task.created_by == current_user.id
+            total_rows = CollaborationTaskSummary.query.filter_by(task_id=task_id).count()
+            suffix = 'final_result'
+        else:
+            allowed = task.can_be_managed_by(current_user)
+            total_rows = QAPair.get_export_version(task.file_id)[1] if task.file_id else 0
+            suffix = 'collaboration_edited'
+        if not allowed:
+            return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+        if total_rows == 0:
+            return jsonify(create_response(False, error={'code': 'NO_DATA', 'message': '没有可导出的数据'})), 400
+
+        job = ExportJob.create_job(
+            task_id=task.id,
+            file_id=task.file_id,
+            created_by=current_user.id,
+            kind=kind,
+            export_format=export_format,
+            download_name=create_export_filename(task.original_filename, export_format, suffix),
+            total_rows=total_rows
+        )
+        start_export_job(job.id)
+
+        response = jsonify(create_response(True, data=_job_to_dict(job), message='导出任务已创建'))
+        response.headers['Location'] = url_for('export_job.get_export_job', job_id=job.id)
+        return response, 202
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"创建导出任务失败 (Task ID: {task_id}): {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'创建导出任务失败: {str(e)}'})), 500
+
+@export_job_bp.route('/export-jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_export_job(current_user, job_id):
+    """获取导出任务进度，完成后返回带下载令牌的下载地址"""
+    try:
+        job = ExportJob.query.get_or_404(job_id)
+        if not job.can_be_accessed_by(current_user):
+            return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+
+        return jsonify(create_response(True, data=_job_to_dict(job)))
+    except Exception as e:
+        current_app.logger.error(f"获取导出任务 {job_id} 失败: {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'获取导出任务失败: {str(e)}'})), 500
+
+@export_job_bp.route('/export-jobs/download/<token>', methods=['GET'])
+def download_export(token):
+    """凭下载令牌下载导出结果，令牌本身即凭证，便于浏览器直接打开链接"""
+    job = ExportJob.get_by_download_token(token)
+    if not job or not job.is_download_available() or not os.path.exists(job.file_path):
+        return jsonify(create_response(False, error={'code': 'DOWNLOAD_EXPIRED', 'message': '下载链接无效或已过期'})), 404
+
+    mimetype = EXCEL_MIMETYPE if job.export_format == 'excel' else JSONL_MIMETYPE
+    return send_file(job.file_path, as_attachment=True, download_name=job.download_name, mimetype=mimetype)
@@ -1,16 +1,17 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
 import os
 import json
-import io
-import openpyxl
 from src.models.file import File
 from src.models.qa_pair import QAPair
 from src.models.collaboration_task import CollaborationTask
 from src.models import db
 from src.utils.auth import login_required, create_response
 from src.utils.file_handler import (
-    save_uploaded_file, parse_jsonl_file, create_export_filename
+    save_uploaded_file, prepare_stream_upload, create_export_filename, parse_export_format, delete_file_safe,
+    discard_uploaded_file, JsonlParseError
 )
+from src.utils.export_cache import send_export
+from src.utils.ingest import ingest_jsonl_file, ingest_upload_stream, reuse_existing_blob
 
 file_management_bp = Blueprint('file_management', __name__)
 
@@ -35,11 +36,88 @@ def get_file_history(current_user):
         current_app.logger.error(f"获取文件历史失败: {e}", exc_info=True)
         return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'获取文件历史失败: {str(e)}'})), 500
 
+def create_file_from_saved_file(current_user, file_info):
+    """基于已保存到 UPLOAD_FOLDER 的文件创建文件记录并导入QA对，返回响应
+
+    解析失败时回滚并删除文件，其他异常由调用方处理。
+    """
+    reuse_existing_blob(file_info)
+    file_record = File.create_file(
+        filename=file_info['filename'],
+        original_filename=file_info['original_filename'],
+        file_path=file_info['file_path'],
+        file_size=file_info['file_size'],
+        file_type=file_info['file_type'],
+        uploaded_by=current_user.id,
+        content_hash=file_info.get('content_hash'),
+        commit=False
+    )
+
+    try:
+        stats = ingest_jsonl_file(file_info['file_path'], file_record.id, content_hash=file_info.get('content_hash'))
+    except JsonlParseError as e:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(False, error={'code': 'PARSE_ERROR', 'message': str(e)})), 400
+
+    if stats.rows == 0:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(False, error={'code': 'PARSE_ERROR', 'message': '文件中没有有效的QA对'})), 400
+
+    db.session.commit()
+
+    current_app.logger.info(f"文件 {file_info['original_filename']} 上传成功, ID: {file_record.id}")
+    return jsonify(create_response(True, data={'file': file_record.to_dict(), 'qa_count': stats.rows, 'ingest': stats.to_dict()}, message='文件上传成功')), 201
+
+def create_file_from_stream(current_user, file_info, stream):
+    """边接收请求体边创建文件记录并导入QA对，返回响应
+
+    解析失败时回滚并删除已写入的部分文件，其他异常由调用方处理。
+    """
+    file_record = File.create_file(
+        filename=file_info['filename'],
+        original_filename=file_info['original_filename'],
+        file_path=file_info['file_path'],
+        file_size=0,
+        file_type=file_info['file_type'],
+        uploaded_by=current_user.id,
+        commit=False
+    )
+
+    try:
+        stats = ingest_upload_stream(stream, file_info, file_record)
+    except JsonlParseError as e:
+        db.session.rollback()
+        delete_file_safe(file_info['file_path'])
+        return jsonify(create_response(False, error={'code': 'PARSE_ERROR', 'message': str(e)})), 400
+
+    if stats.rows == 0:
+        db.session.rollback()
+        discard_uploaded_file(file_info)
+        return jsonify(create_response(False, error={'code': 'PARSE_ERROR', 'message': '文件中没有有效的QA对'})), 400
+
+    db.session.commit()
+
+    current_app.logger.info(f"文件 {file_info['original_filename']} 上传成功, ID: {file_record.id}")
+    return jsonify(create_response(True, data={'file': file_record.to_dict(), 'qa_count': stats.rows, 'ingest': stats.to_dict()}, message='文件上传成功')), 201
+
 @file_management_bp.route('/files/upload', methods=['POST'])
 @login_required
 def upload_file(current_user):
-    """上传文件（仅用于单文件校对）"""
+    """上传文件（仅用于单文件校对）
+
+    除 multipart 表单外，也可以直接以请求体发送文件内容，并通过 filename 查询参数
+    提供原始文件名；此时文件在接收过程中即被校验和导入。
+    """
+    file_info = None
     try:
+        if request.mimetype != 'multipart/form-data':
+            file_info, error = prepare_stream_upload(request.args.get('filename', ''), current_app.config['UPLOAD_FOLDER'])
+            if error:
+                return jsonify(create_response(False, error={'code': 'UPLOAD_ERROR', 'message': error})), 400
+            return create_file_from_stream(current_user, file_info, request.stream)
+
         if 'file' not in request.files or not request.files['file'].filename:
             return jsonify(create_response(False, error={'code': 'NO_FILE', 'message': '没有选择文件'})), 400
 
@@ -48,25 +126,11 @@ def upload_file(current_user):
         if error:
             return jsonify(create_response(False, error={'code': 'UPLOAD_ERROR', 'message': error})), 400
         
-        qa_pairs, parse_error = parse_jsonl_file(file_info['file_path'])
-        if parse_error:
-            os.remove(file_info['file_path'])
-            return jsonify(create_response(False, error={'code': 'PARSE_ERROR', 'message': parse_error})), 400
-        
-        file_record = File.create_file(
-            filename=file_info['filename'],
-            original_filename=file_info['original_filename'],
-            file_path=file_info['file_path'],
-            file_size=file_info['file_size'],
-            file_type=file_info['file_type'],
-            uploaded_by=current_user.id
-        )
-        QAPair.create_from_jsonl_data(file_record.id, qa_pairs)
-        
-        current_app.logger.info(f"文件 {file.filename} 上传成功, ID: {file_record.id}")
-        return jsonify(create_response(True, data={'file': file_record.to_dict(), 'qa_count': len(qa_pairs)}, message='文件上传成功')), 201
+        return create_file_from_saved_file(current_user, file_info)
     except Exception as e:
         db.session.rollback()
+        if file_info:
+            discard_uploaded_file(file_info)
         current_app.logger.error(f"文件上传异常: {e}", exc_info=True)
         return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'文件上传失败: {str(e)}'})), 500
 
@@ -81,38 +145,39 @@ def export_file_get(current_user, file_id):
         if not file_record.can_be_accessed_by(current_user):
             return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
 
-        export_format = request.args.get('format', 'jsonl').lower()
-        qa_pairs = QAPair.query.filter_by(file_id=file_id, is_deleted=False).order_by(QAPair.index_in_file).all()
-        
-        if not qa_pairs:
+        # 默认为 jsonl，可选 jsonl.gz、excel
+        export_format = parse_export_format(request.args.get('format'))
+        version = QAPair.get_export_version(file_id)
+        if version[1] == 0:
             return jsonify(create_response(False, error={'code': 'NO_DATA', 'message': '没有可导出的数据'})), 400
 
-        export_data = [{'prompt': qa.prompt, 'completion': qa.completion} for qa in qa_pairs]
         filename = create_export_filename(file_record.original_filename, export_format, 'edited')
-
-        if export_format == 'excel':
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "QA Pairs"
-            ws.append(['prompt', 'completion'])
-            for item in export_data:
-                ws.append([item['prompt'], item['completion']])
-            
-            mem_file = io.BytesIO()
-            wb.save(mem_file)
-            mem_file.seek(0)
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        else: # 默认为 jsonl
-            jsonl_content = '\n'.join([json.dumps(item, ensure_ascii=False) for item in export_data])
-            mem_file = io.BytesIO(jsonl_content.encode('utf-8'))
-            mimetype = 'application/jsonl'
-
-        return send_file(mem_file, as_attachment=True, download_name=filename, mimetype=mimetype)
+        return send_export(
+            file_id, export_format, 'file', version, filename,
+            lambda: QAPair.iter_for_export(file_id),
+            excel_options={'sheet_title': 'QA Pairs', 'with_index': False}
+        )
 
     except Exception as e:
         current_app.logger.error(f"导出文件失败 (File ID: {file_id}): {e}", exc_info=True)
         return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'导出文件失败: {str(e)}'})), 500
 
+@file_management_bp.route('/files/<int:file_id>/original', methods=['GET'])
+@login_required
+def download_original_file(current_user, file_id):
+    """下载上传的原始文件（压缩上传时为原压缩文件），支持断点续传"""
+    try:
+        file_record = File.get_or_404(file_id)
+        if not file_record.can_be_accessed_by(current_user):
+            return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+        if not os.path.exists(file_record.file_path):
+            return jsonify(create_response(False, error={'code': 'FILE_NOT_FOUND', 'message': '原始文件不存在'})), 404
+
+        return send_file(file_record.file_path, as_attachment=True, download_name=file_record.original_filename)
+    except Exception as e:
+        current_app.logger.error(f"下载原始文件失败 (File ID: {file_id}): {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'下载原始文件失败: {str(e)}'})), 500
+
 # --- 其他路由保持不变 ---
 
 @file_management_bp.route('/files/<int:file_id>', methods=['GET'])
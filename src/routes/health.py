@@ -0,0 +1,21 @@
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+from src.models import db
+from src.utils.auth import create_response
+from src.utils.sqlite_profile import get_sqlite_pragmas
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/health', methods=['GET'])
+def health_check():
+    """健康检查：数据库连通性，使用 SQLite 时附带当前连接生效的 PRAGMA"""
+    try:
+        db.session.execute(text('SELECT 1'))
+        database = {'dialect': db.engine.dialect.name, 'status': 'ok'}
+        if db.engine.dialect.name == 'sqlite':
+            database['pragmas'] = get_sqlite_pragmas(db.session)
+        return jsonify(create_response(True, data={'status': 'ok', 'database': database}))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"健康检查失败: {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'DATABASE_UNAVAILABLE', 'message': f'数据库不可用: {str(e)}'})), 503
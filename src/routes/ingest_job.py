@@ -0,0 +1,20 @@
+from flask import Blueprint, jsonify, current_app
+from src.models.ingest_job import IngestJob
+from src.utils.auth import login_required, create_response
+from src.utils.ingest import get_live_progress
+
+ingest_job_bp = Blueprint('ingest_job', __name__)
+
+@ingest_job_bp.route('/ingest-jobs/<int:job_id>', methods=['GET'])
+@login_required
+def get_ingest_job(current_user, job_id):
+    """获取导入任务进度"""
+    try:
+        job = IngestJob.query.get_or_404(job_id)
+        if not job.can_be_accessed_by(current_user):
+            return jsonify(create_response(False, error={'code': 'FORBIDDEN', 'message': '权限不足'})), 403
+
+        return jsonify(create_response(True, data=job.to_dict(live_progress=get_live_progress(job.id))))
+    except Exception as e:
+        current_app.logger.error(f"获取导入任务 {job_id} 失败: {e}", exc_info=True)
+        return jsonify(create_response(False, error={'code': 'INTERNAL_ERROR', 'message': f'获取导入任务失败: {str(e)}'})), 500
@@ -1,10 +1,14 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from src.models.notification import Notification, TaskStatusReminder
 from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
 from src.models.user import User
 from src.models import db
 from src.utils.auth import login_required, create_response
+from src.utils.pagination import paginate_from_request, has_pagination_args, get_list_arg, InvalidCursorError
+from src.utils.notification_events import get_notification_broker, publish_notification_event, format_sse
 from datetime import datetime, timedelta
+import time
+import queue
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -13,8 +17,6 @@ notification_bp = Blueprint('notification', __name__)
 def get_notifications(current_user):
     """获取用户通知列表"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         unread_only = request.args.get('unread_only', 'false').lower() == 'true'
         
         query = Notification.query.filter_by(user_id=current_user.id)
@@ -22,39 +24,30 @@ def get_notifications(current_user):
         if unread_only:
             query = query.filter_by(is_read=False)
         
-        query = query.order_by(Notification.created_at.desc())
-        
-        # 分页
-        pagination = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
+        # 分页（按创建时间倒序）
+        items, pagination = paginate_from_request(
+            query, [Notification.created_at, Notification.id], descending=True
         )
         
-        notifications = [notification.to_dict() for notification in pagination.items]
+        notifications = [notification.to_dict() for notification in items]
         
         # 获取未读通知数量
-        unread_count = Notification.query.filter_by(
-            user_id=current_user.id,
-            is_read=False
-        ).count()
+        unread_count = Notification.get_unread_count(current_user.id)
         
         return jsonify(create_response(
             success=True,
             data={
                 'notifications': notifications,
                 'unread_count': unread_count,
-                'pagination': {
-                    'page': pagination.page,
-                    'per_page': pagination.per_page,
-                    'total': pagination.total,
-                    'pages': pagination.pages,
-                    'has_prev': pagination.has_prev,
-                    'has_next': pagination.has_next
-                }
+                'pagination': pagination
             }
         ))
     
+    except InvalidCursorError as e:
+        return jsonify(create_response(
+            success=False,
+            error={'code': 'INVALID_CURSOR', 'message': str(e)}
+        )), 400
     except Exception as e:
         return jsonify(create_response(
             success=False,
@@ -94,12 +87,8 @@ def mark_notification_as_read(current_user, notification_id):
 def mark_all_notifications_as_read(current_user):
     """标记所有通知为已读"""
     try:
-        Notification.query.filter_by(
-            user_id=current_user.id,
-            is_read=False
-        ).update({'is_read': True})
-        
-        db.session.commit()
+        Notification.mark_all_as_read(current_user.id)
+        publish_notification_event(current_user.id, 'unread_count', {'unread_count': 0})
         
         return jsonify(create_response(
             success=True,
@@ -118,10 +107,7 @@ def mark_all_notifications_as_read(current_user):
 def get_unread_notification_count(current_user):
     """获取未读通知数量"""
     try:
-        unread_count = Notification.query.filter_by(
-            user_id=current_user.id,
-            is_read=False
-        ).count()
+        unread_count = Notification.get_unread_count(current_user.id)
         
         return jsonify(create_response(
             success=True,
@@ -134,48 +120,107 @@ def get_unread_notification_count(current_user):
             error={'code': 'INTERNAL_ERROR', 'message': f'获取未读通知数量失败: {str(e)}'}
         )), 500
 
+@notification_bp.route('/notifications/stream', methods=['GET'])
+@login_required
+def stream_notifications(current_user):
+    """通知事件流（Server-Sent Events）
+
+    连接后先推送当前未读数量，之后推送 notification（新通知及未读数量）与 unread_count 事件；
+    空闲时定期发送注释行保持连接。连接超过 NOTIFICATION_STREAM_MAX_DURATION 秒后由服务端关闭，
+    客户端重新连接即可，避免长期占用 Worker。未配置 NOTIFICATION_PUBSUB_BACKEND 时返回 503，
+    客户端改为定期查询未读数量。
+    """
+    broker = get_notification_broker()
+    if broker is None:
+        return jsonify(create_response(
+            success=False,
+            error={'code': 'STREAM_DISABLED', 'message': '未启用通知事件流'}
+        )), 503
+
+    user_id = current_user.id
+    unread_count = Notification.get_unread_count(user_id)
+    # 流式响应期间不占用数据库连接
+    db.session.close()
+
+    subscriber = broker.subscribe(user_id)
+    keepalive = current_app.config.get('NOTIFICATION_STREAM_KEEPALIVE', 15)
+    max_duration = current_app.config.get('NOTIFICATION_STREAM_MAX_DURATION', 300)
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            yield format_sse('unread_count', {'unread_count': unread_count})
+            deadline = time.monotonic() + max_duration
+            while time.monotonic() < deadline:
+                try:
+                    event, data = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(user_id, subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @notification_bp.route('/notifications/task-status', methods=['GET'])
 @login_required
 def get_task_status_notifications(current_user):
-    """获取任务状态提醒"""
+    """获取任务状态提醒
+
+    与任务列表共用一条查询取出任务与当前用户的分配，进度取自任务上的计数列；
+    支持 status、assignment_status 过滤，带 cursor/page/per_page 时分页返回。
+    """
     try:
-        # 获取用户相关的任务状态
-        task_statuses = []
-        
-        # 获取用户创建的任务
-        created_tasks = CollaborationTask.query.filter_by(created_by=current_user.id).all()
-        for task in created_tasks:
-            progress = task.get_progress()
-            task_statuses.append({
-                'task_id': task.id,
-                'task_title': task.title,
-                'role': 'creator',
-                'status': task.status,
-                'progress': progress,
-                'deadline': task.deadline.isoformat() if task.deadline else None,
-                'created_at': task.created_at.isoformat() if task.created_at else None
-            })
-        
-        # 获取用户被分配的任务
-        assignments = CollaborationTaskAssignment.query.filter_by(assigned_to=current_user.id).all()
-        for assignment in assignments:
-            task = assignment.task
-            task_statuses.append({
-                'task_id': task.id,
-                'task_title': task.title,
-                'role': 'assignee',
-                'status': task.status,
-                'assignment_status': assignment.status,
-                'assignment_info': assignment.to_dict(),
-                'deadline': task.deadline.isoformat() if task.deadline else None,
-                'assigned_at': assignment.assigned_at.isoformat() if assignment.assigned_at else None
-            })
-        
-        return jsonify(create_response(
-            success=True,
-            data={'task_statuses': task_statuses}
-        ))
-    
+        query = CollaborationTask.query_for_user(
+            current_user.id,
+            statuses=get_list_arg('status'),
+            assignment_statuses=get_list_arg('assignment_status')
+        )
+        pagination = None
+        if has_pagination_args():
+            rows, pagination = paginate_from_request(
+                query, [CollaborationTask.created_at, CollaborationTask.id], descending=True
+            )
+        else:
+            rows = query.order_by(CollaborationTask.created_at.desc(), CollaborationTask.id.desc()).all()
+
+        # 先列出用户创建的任务，再列出被分配的任务
+        created_statuses = []
+        assigned_statuses = []
+        for task, assignment in rows:
+            if task.created_by == current_user.id:
+                created_statuses.append({
+                    'task_id': task.id,
+                    'task_title': task.title,
+                    'role': 'creator',
+                    'status': task.status,
+                    'progress': task.get_progress(),
+                    'deadline': task.deadline.isoformat() if task.deadline else None,
+                    'created_at': task.created_at.isoformat() if task.created_at else None
+                })
+            if assignment:
+                assigned_statuses.append({
+                    'task_id': task.id,
+                    'task_title': task.title,
+                    'role': 'assignee',
+                    'status': task.status,
+                    'assignment_status': assignment.status,
+                    'assignment_info': assignment.to_dict(),
+                    'deadline': task.deadline.isoformat() if task.deadline else None,
+                    'assigned_at': assignment.assigned_at.isoformat() if assignment.assigned_at else None
+                })
+
+        data = {'task_statuses': created_statuses + assigned_statuses}
+        if pagination is not None:
+            data['pagination'] = pagination
+        return jsonify(create_response(success=True, data=data))
+
+    except InvalidCursorError as e:
+        return jsonify(create_response(success=False, error={'code': 'INVALID_CURSOR', 'message': str(e)})), 400
     except Exception as e:
         return jsonify(create_response(
             success=False,
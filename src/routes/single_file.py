@@ -1,8 +1,6 @@
 import os
 import json
 import uuid
-import io
-import openpyxl
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app, send_file
 from werkzeug.utils import secure_filename
@@ -11,6 +9,7 @@ from src.models.single_file import SingleFileSession
 from src.models.qa_pair import QAPair
 from src.routes.auth import optional_login
 from src.config import Config
+from src.utils.file_handler import iter_jsonl_export, stream_download, JSONL_MIMETYPE, export_to_excel
 
 # 创建蓝图
 single_file_bp = Blueprint('single_file', __name__)
@@ -220,55 +219,27 @@ def export_session(current_user, file_id):
     
     export_format = request.args.get('format', 'jsonl').lower()
     
-    qa_pairs = QAPair.query.filter_by(session_id=file_id).order_by(QAPair.index_in_file).all()
+    qa_query = QAPair.query.filter_by(session_id=file_id).order_by(QAPair.index_in_file)
     
     filename_base = os.path.splitext(session.original_filename)[0]
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
     if export_format == 'jsonl':
-        # 在内存中创建JSONL文件
-        mem_file = io.StringIO()
-        for qa in qa_pairs:
-            line = json.dumps({
-                "prompt": qa.prompt,
-                "completion": qa.completion
-            }, ensure_ascii=False)
-            mem_file.write(line + '\n')
-        
-        mem_file.seek(0)
-        
-        # 转换为BytesIO以便send_file处理
-        bytes_file = io.BytesIO(mem_file.read().encode('utf-8'))
-        bytes_file.seek(0)
-
+        # 分批读取并流式返回JSONL
         filename = f"{filename_base}_edited_{timestamp}.jsonl"
-        
-        return send_file(
-            bytes_file,
-            mimetype='application/jsonl',
-            as_attachment=True,
-            download_name=filename
-        )
+        qa_pairs = qa_query.yield_per(current_app.config['EXPORT_BATCH_SIZE'])
+        return stream_download(iter_jsonl_export(qa_pairs), filename, JSONL_MIMETYPE)
 
     elif export_format == 'excel':
-        # 在内存中创建Excel文件
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "QA对"
-        ws.append(["prompt", "completion"]) # 写入表头
-
-        for qa in qa_pairs:
-            ws.append([qa.prompt, qa.completion])
-        
-        mem_file = io.BytesIO()
-        wb.save(mem_file)
-        mem_file.seek(0)
+        # 只写模式生成Excel文件，超过阈值时缓冲到临时文件
+        qa_pairs = qa_query.yield_per(current_app.config['EXPORT_BATCH_SIZE'])
+        mem_file, mimetype = export_to_excel(qa_pairs, with_index=False)
 
         filename = f"{filename_base}_edited_{timestamp}.xlsx"
 
         return send_file(
             mem_file,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=mimetype,
             as_attachment=True,
             download_name=filename
         )
@@ -0,0 +1,305 @@
+import atexit
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, bindparam, case
+from src.utils.background import start_periodic_job
+
+
+class MemoryActivityStore:
+    """进程内会话活动记录，数据不跨进程共享，用于测试与单进程部署"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def set(self, task_id, user_id, state):
+        with self._lock:
+            self._data[(task_id, user_id)] = dict(state, pending=0)
+
+    def get(self, task_id, user_id):
+        with self._lock:
+            state = self._data.get((task_id, user_id))
+            return dict(state) if state else None
+
+    def touch(self, task_id, user_id, now):
+        with self._lock:
+            state = self._data.get((task_id, user_id))
+            if state is None:
+                return None
+            state['last_activity'] = now
+            state['activity_count'] += 1
+            state['pending'] += 1
+            return dict(state)
+
+    def remove(self, task_id, user_id):
+        with self._lock:
+            return self._data.pop((task_id, user_id), None)
+
+    def pop_pending(self):
+        with self._lock:
+            batch = []
+            for state in self._data.values():
+                if state['pending']:
+                    batch.append(dict(state))
+                    state['pending'] = 0
+            return batch
+
+    def restore(self, state):
+        with self._lock:
+            current = self._data.get((state['task_id'], state['user_id']))
+            if current is not None and current['id'] == state['id']:
+                current['pending'] += state['pending']
+
+
+class RedisActivityStore:
+    """Redis 会话活动记录：每个 (任务, 用户) 一个 hash，有未写入数据库的活动时记入 dirty 集合"""
+
+    # 会话不存在时不创建，避免已结束的会话被心跳重新写入
+    TOUCH_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+    redis.call('HSET', KEYS[1], 'last_activity', ARGV[1])
+    redis.call('HINCRBY', KEYS[1], 'activity_count', 1)
+    redis.call('HINCRBY', KEYS[1], 'pending', 1)
+    redis.call('SADD', KEYS[2], ARGV[2])
+    return 1
+    """
+
+    # 取出并清零待写入的活动数
+    TAKE_SCRIPT = """
+    redis.call('SREM', KEYS[2], ARGV[1])
+    if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+    local pending = redis.call('HGET', KEYS[1], 'pending')
+    redis.call('HSET', KEYS[1], 'pending', 0)
+    return {redis.call('HGET', KEYS[1], 'id'), redis.call('HGET', KEYS[1], 'last_activity'), pending}
+    """
+
+    def __init__(self, client, prefix='qa:sessions'):
+        self.client = client
+        self.prefix = prefix
+        self.dirty_key = f'{prefix}:dirty'
+        self._touch = client.register_script(self.TOUCH_SCRIPT)
+        self._take = client.register_script(self.TAKE_SCRIPT)
+
+    def _key(self, task_id, user_id):
+        return f'{self.prefix}:{task_id}:{user_id}'
+
+    def _load(self, values):
+        if not values or 'id' not in values:
+            return None
+        state = dict(values)
+        for name in ('id', 'task_id', 'user_id', 'activity_count', 'pending'):
+            state[name] = int(state[name])
+        return state
+
+    def set(self, task_id, user_id, state):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(self._key(task_id, user_id))
+        pipe.hset(self._key(task_id, user_id), mapping=dict(state, pending=0))
+        pipe.execute()
+
+    def get(self, task_id, user_id):
+        return self._load(self.client.hgetall(self._key(task_id, user_id)))
+
+    def touch(self, task_id, user_id, now):
+        if not self._touch(keys=[self._key(task_id, user_id), self.dirty_key], args=[now, f'{task_id}:{user_id}']):
+            return None
+        return self.get(task_id, user_id)
+
+    def remove(self, task_id, user_id):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self._key(task_id, user_id))
+        pipe.delete(self._key(task_id, user_id))
+        pipe.srem(self.dirty_key, f'{task_id}:{user_id}')
+        return self._load(pipe.execute()[0])
+
+    def pop_pending(self):
+        batch = []
+        for member in self.client.smembers(self.dirty_key):
+            task_id, user_id = (int(part) for part in member.split(':'))
+            taken = self._take(keys=[self._key(task_id, user_id), self.dirty_key], args=[member])
+            if taken and int(taken[2]):
+                batch.append({
+                    'id': int(taken[0]), 'task_id': task_id, 'user_id': user_id,
+                    'last_activity': taken[1], 'pending': int(taken[2])
+                })
+        return batch
+
+    def restore(self, state):
+        key = self._key(state['task_id'], state['user_id'])
+        if self.client.hget(key, 'id') == str(state['id']):
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hincrby(key, 'pending', state['pending'])
+            pipe.sadd(self.dirty_key, f"{state['task_id']}:{state['user_id']}")
+            pipe.execute()
+
+
+def init_activity_tracker(app):
+    """按 SESSION_TRACKER_BACKEND 创建会话活动记录，并启动定期批量写入"""
+    backend = app.config.get('SESSION_TRACKER_BACKEND')
+    if not backend:
+        return
+
+    if backend == 'redis':
+        from src.utils.redis_client import get_redis
+        store = RedisActivityStore(get_redis(app))
+    elif backend == 'memory':
+        store = MemoryActivityStore()
+    else:
+        raise ValueError(f'未知的会话活动记录后端: {backend}')
+    app.extensions['activity_tracker'] = store
+
+    interval = app.config.get('SESSION_TRACKER_FLUSH_INTERVAL', 30)
+    if interval:
+        start_periodic_job(app, 'session-activity-flush', flush_activity, interval)
+
+    def flush_on_exit():
+        with app.app_context():
+            try:
+                flush_activity()
+            except Exception as e:
+                app.logger.error(f"退出时写入会话活动失败: {e}")
+
+    atexit.register(flush_on_exit)
+
+
+def get_activity_store():
+    """获取会话活动记录，未启用时返回 None"""
+    return current_app.extensions.get('activity_tracker')
+
+
+def _session_state(session):
+    return {
+        'id': session.id,
+        'task_id': session.task_id,
+        'user_id': session.user_id,
+        'session_start': session.session_start.isoformat(),
+        'last_activity': session.last_activity.isoformat(),
+        'activity_count': session.activity_count
+    }
+
+
+def session_state_dict(state):
+    """将活动记录转换为与 CollaborationTaskSession.to_dict() 相同的结构"""
+    now = datetime.utcnow()
+    session_start = datetime.fromisoformat(state['session_start'])
+    last_activity = datetime.fromisoformat(state['last_activity'])
+    return {
+        'id': state['id'],
+        'task_id': state['task_id'],
+        'user_id': state['user_id'],
+        'session_start': state['session_start'],
+        'session_end': None,
+        'last_activity': state['last_activity'],
+        'is_active': True,
+        'activity_count': state['activity_count'],
+        'session_duration': (now - session_start).total_seconds() / 60,
+        'idle_time': (now - last_activity).total_seconds() / 60
+    }
+
+
+def get_tracked_session(task_id, user_id):
+    """获取活跃会话的 to_dict() 结构，优先读取活动记录；不在记录中时从数据库加载一次"""
+    from src.models.collaboration_task_draft import CollaborationTaskSession
+
+    store = get_activity_store()
+    state = store.get(task_id, user_id) if store is not None else None
+    if state is not None:
+        return session_state_dict(state)
+
+    session = CollaborationTaskSession.get_active_session(task_id, user_id)
+    if session is None:
+        return None
+    if store is not None:
+        store.set(task_id, user_id, _session_state(session))
+    return session.to_dict()
+
+
+def record_activity(task_id, user_id, commit=True):
+    """记录一次用户活动，返回会话的 to_dict() 结构，无活跃会话时返回 None
+
+    启用活动记录时只更新记录，由定期任务批量写入数据库；
+    未启用时直接更新数据库（commit=False 时不提交）。
+    """
+    from src.models.collaboration_task_draft import CollaborationTaskSession
+
+    store = get_activity_store()
+    if store is None:
+        session = CollaborationTaskSession.update_activity(task_id, user_id, commit=commit)
+        return session.to_dict() if session else None
+
+    now = datetime.utcnow().isoformat()
+    state = store.touch(task_id, user_id, now)
+    if state is None:
+        if get_tracked_session(task_id, user_id) is None:
+            return None
+        state = store.touch(task_id, user_id, now)
+    return session_state_dict(state) if state else None
+
+
+def start_tracked_session(task_id, user_id):
+    """开始新会话，之前会话未写入的活动与新会话一起写入数据库"""
+    from src.models.collaboration_task_draft import CollaborationTaskSession
+
+    store = get_activity_store()
+    state = store.remove(task_id, user_id) if store is not None else None
+    if state and state['pending']:
+        _apply_activity([state])
+    session = CollaborationTaskSession.start_session(task_id, user_id)
+    if store is not None:
+        store.set(task_id, user_id, _session_state(session))
+    return session
+
+
+def end_tracked_session(task_id, user_id):
+    """结束会话，未写入的活动与结束状态一起写入数据库"""
+    from src.models.collaboration_task_draft import CollaborationTaskSession
+
+    store = get_activity_store()
+    state = store.remove(task_id, user_id) if store is not None else None
+    if state and state['pending']:
+        _apply_activity([state])
+    return CollaborationTaskSession.end_session(task_id, user_id)
+
+
+def _apply_activity(batch):
+    """以一条 executemany 的 UPDATE 写入多条会话的活动，不提交"""
+    from src.models import db
+    from src.models.collaboration_task_draft import CollaborationTaskSession
+
+    table = CollaborationTaskSession.__table__
+    last_activity = bindparam('b_last_activity')
+    db.session.execute(
+        update(table).where(table.c.id == bindparam('b_id')).values(
+            # 多个进程各自写入时只向前推进最后活动时间
+            last_activity=case((table.c.last_activity < last_activity, last_activity), else_=table.c.last_activity),
+            activity_count=table.c.activity_count + bindparam('b_pending')
+        ),
+        [{
+            'b_id': state['id'],
+            'b_last_activity': datetime.fromisoformat(state['last_activity']),
+            'b_pending': state['pending']
+        } for state in batch]
+    )
+
+
+def flush_activity():
+    """将累计的会话活动批量写入数据库，返回写入的会话数；失败时活动数放回记录"""
+    from src.models import db
+
+    store = get_activity_store()
+    if store is None:
+        return 0
+    batch = store.pop_pending()
+    if not batch:
+        return 0
+
+    try:
+        _apply_activity(batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        for state in batch:
+            store.restore(state)
+        raise
+    return len(batch)
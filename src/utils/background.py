@@ -0,0 +1,66 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+_executor = None
+_executor_lock = threading.Lock()
+_periodic_jobs = {}
+
+
+def get_background_executor():
+    """获取进程内共享的后台线程池"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get('BACKGROUND_WORKERS', 2),
+                thread_name_prefix='qa-background'
+            )
+        return _executor
+
+
+def submit_background_job(fn, *args, **kwargs):
+    """在后台线程中以应用上下文执行 fn，异常只记录日志不向外抛出"""
+    from src.models import db
+
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                app.logger.error(f"后台任务 {fn.__name__} 执行失败: {e}", exc_info=True)
+            finally:
+                db.session.remove()
+
+    return get_background_executor().submit(run)
+
+
+def start_periodic_job(app, name, fn, interval):
+    """在守护线程中每隔 interval 秒以应用上下文执行一次 fn
+
+    同名任务在每个进程中只启动一次，异常只记录日志，不会中断后续执行。
+    """
+    from src.models import db
+
+    with _executor_lock:
+        if name in _periodic_jobs:
+            return _periodic_jobs[name]
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                with app.app_context():
+                    try:
+                        fn()
+                    except Exception as e:
+                        app.logger.error(f"定期任务 {name} 执行失败: {e}", exc_info=True)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=loop, name=f'qa-{name}', daemon=True)
+        thread.start()
+        _periodic_jobs[name] = thread
+        return thread
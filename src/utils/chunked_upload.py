@@ -0,0 +1,60 @@
+import os
+import threading
+from src.utils.file_handler import compute_file_sha256
+
+# 每个上传会话在当前进程中的写锁与滚动校验状态：upload_id -> (已校验字节数, hashlib对象)
+# 状态丢失（如进程重启或请求落到其他进程）时会从磁盘上的已接收部分重新计算
+_locks = {}
+_hashers = {}
+_registry_lock = threading.Lock()
+
+
+def get_upload_lock(upload_id):
+    """获取上传会话的写锁，保证同一会话的分块按顺序追加"""
+    with _registry_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _get_running_hasher(upload_id, file_path, offset):
+    """获取覆盖文件前 offset 字节的滚动SHA-256"""
+    state = _hashers.get(upload_id)
+    if state and state[0] == offset:
+        return state[1]
+    return compute_file_sha256(file_path, size=offset)
+
+
+def append_chunk(upload_id, file_path, offset, stream, block_size=1024 * 1024):
+    """将请求流中的分块追加写入文件，同时更新滚动校验，返回写入后的偏移量
+
+    数据按 block_size 逐块读写，内存占用与分块大小无关。连接中断时已写入的部分
+    仍然有效，客户端可查询偏移量后从断点继续上传。
+    """
+    hasher = _get_running_hasher(upload_id, file_path, offset)
+    written = offset
+    try:
+        with open(file_path, 'ab') as f:
+            while True:
+                block = stream.read(block_size)
+                if not block:
+                    break
+                f.write(block)
+                hasher.update(block)
+                written += len(block)
+    finally:
+        _hashers[upload_id] = (written, hasher)
+    return written
+
+
+def finish_upload(upload_id, file_path):
+    """结束上传并返回完整文件的SHA-256十六进制摘要"""
+    size = os.path.getsize(file_path)
+    hasher = _get_running_hasher(upload_id, file_path, size)
+    discard_upload_state(upload_id)
+    return hasher.hexdigest()
+
+
+def discard_upload_state(upload_id):
+    """清理上传会话在当前进程中的状态"""
+    with _registry_lock:
+        _locks.pop(upload_id, None)
+    _hashers.pop(upload_id, None)
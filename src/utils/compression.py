@@ -0,0 +1,80 @@
+import zlib
+from flask import current_app, request
+
+# 支持的响应压缩编码，按优先级排列
+COMPRESS_ENCODINGS = ('gzip', 'deflate')
+
+
+def make_compressor(encoding='gzip', level=6):
+    """创建增量压缩器：gzip 输出带 gzip 头，deflate 输出 zlib 格式（HTTP 中 deflate 的含义）"""
+    wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+    return zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+
+def iter_compressed(chunks, encoding='gzip', level=6):
+    """边读取边压缩分块，不在内存中保留完整内容
+
+    结束或中途关闭时会关闭原始迭代器，保证 stream_with_context 等清理逻辑得到执行。
+    """
+    compressor = make_compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def init_compression(app):
+    """按 COMPRESS_ENABLED 注册响应压缩"""
+    if app.config.get('COMPRESS_ENABLED'):
+        app.after_request(compress_response)
+
+
+def choose_encoding():
+    """根据请求的 Accept-Encoding 选择压缩编码，客户端不支持时返回None"""
+    return request.accept_encodings.best_match(COMPRESS_ENCODINGS)
+
+
+def compress_response(response):
+    """压缩JSON/文本响应
+
+    生成器响应按块流式压缩；基于文件的响应（send_file）保持原样，以免破坏字节区间请求，
+    这类响应由前端代理或 .jsonl.gz 导出处理。
+    """
+    config = current_app.config
+    if response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304) \
+            or response.direct_passthrough or request.method == 'HEAD' \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    if response.content_length is not None and response.content_length < config['COMPRESS_MIN_SIZE']:
+        return response
+
+    level = config['COMPRESS_LEVEL']
+    if response.is_streamed:
+        response.response = iter_compressed(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(b''.join(iter_compressed([data], encoding, level)))
+
+    response.headers['Content-Encoding'] = encoding
+    # 压缩后的内容与原始内容字节不同，强 ETag 需降为弱 ETag
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,254 @@
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from src.utils.background import start_periodic_job
+
+
+class MemoryDraftStore:
+    """进程内草稿缓冲，数据不跨进程共享，用于测试与单进程部署"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._flush_locks = {}
+
+    def put_many(self, task_id, user_id, entries):
+        with self._lock:
+            self._data.setdefault((task_id, user_id), {}).update(entries)
+
+    def get_all(self, task_id, user_id):
+        with self._lock:
+            return dict(self._data.get((task_id, user_id), {}))
+
+    def pending(self):
+        with self._lock:
+            return list(self._data)
+
+    def pop_all(self, task_id, user_id):
+        with self._lock:
+            return self._data.pop((task_id, user_id), {})
+
+    def restore(self, task_id, user_id, entries):
+        with self._lock:
+            current = self._data.setdefault((task_id, user_id), {})
+            for qa_pair_id, entry in entries.items():
+                current.setdefault(qa_pair_id, entry)
+
+    def lock(self, task_id, user_id, timeout):
+        with self._lock:
+            return self._flush_locks.setdefault((task_id, user_id), threading.Lock())
+
+
+class RedisDraftStore:
+    """Redis 草稿缓冲：每个 (任务, 用户) 一个 hash，字段为 qa_pair_id，值为草稿JSON
+
+    有待刷写草稿的 (任务, 用户) 记录在 dirty 集合中。
+    """
+
+    def __init__(self, client, prefix='qa:drafts'):
+        self.client = client
+        self.prefix = prefix
+        self.dirty_key = f'{prefix}:dirty'
+
+    def _key(self, task_id, user_id):
+        return f'{self.prefix}:{task_id}:{user_id}'
+
+    def put_many(self, task_id, user_id, entries):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(self._key(task_id, user_id), mapping={
+            str(qa_pair_id): json.dumps(entry) for qa_pair_id, entry in entries.items()
+        })
+        pipe.sadd(self.dirty_key, f'{task_id}:{user_id}')
+        pipe.execute()
+
+    def get_all(self, task_id, user_id):
+        return {int(k): json.loads(v) for k, v in self.client.hgetall(self._key(task_id, user_id)).items()}
+
+    def pending(self):
+        return [tuple(int(part) for part in member.split(':')) for member in self.client.smembers(self.dirty_key)]
+
+    def pop_all(self, task_id, user_id):
+        # 读取与删除在同一个 MULTI 中执行，期间写入的草稿会留到下一次刷写
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self._key(task_id, user_id))
+        pipe.delete(self._key(task_id, user_id))
+        pipe.srem(self.dirty_key, f'{task_id}:{user_id}')
+        values = pipe.execute()[0]
+        return {int(k): json.loads(v) for k, v in values.items()}
+
+    def restore(self, task_id, user_id, entries):
+        pipe = self.client.pipeline(transaction=True)
+        for qa_pair_id, entry in entries.items():
+            pipe.hsetnx(self._key(task_id, user_id), str(qa_pair_id), json.dumps(entry))
+        pipe.sadd(self.dirty_key, f'{task_id}:{user_id}')
+        pipe.execute()
+
+    def lock(self, task_id, user_id, timeout):
+        # 跨进程互斥；超过 timeout 未获取到锁时抛出 LockError
+        return self.client.lock(f'{self.prefix}:lock:{task_id}:{user_id}', timeout=timeout, blocking_timeout=timeout)
+
+
+def init_draft_buffer(app):
+    """按 DRAFT_BUFFER_BACKEND 创建草稿缓冲，并启动定期刷写"""
+    backend = app.config.get('DRAFT_BUFFER_BACKEND')
+    if not backend:
+        return
+
+    if backend == 'redis':
+        from src.utils.redis_client import get_redis
+        store = RedisDraftStore(get_redis(app))
+    elif backend == 'memory':
+        store = MemoryDraftStore()
+    else:
+        raise ValueError(f'未知的草稿缓冲后端: {backend}')
+    app.extensions['draft_buffer'] = store
+
+    interval = app.config.get('DRAFT_BUFFER_FLUSH_INTERVAL', 5)
+    if interval:
+        start_periodic_job(app, 'draft-buffer-flush', flush_all_drafts, interval)
+
+    def flush_on_exit():
+        with app.app_context():
+            try:
+                flush_all_drafts()
+            except Exception as e:
+                app.logger.error(f"退出时刷写草稿缓冲失败: {e}")
+
+    atexit.register(flush_on_exit)
+
+
+def get_draft_store():
+    """获取草稿缓冲，未启用时返回 None"""
+    return current_app.extensions.get('draft_buffer')
+
+
+def buffer_drafts(task_id, user_id, items):
+    """将自动暂存的草稿写入缓冲，返回写入的 {qa_pair_id: entry}；未启用缓冲时返回 None，由调用方直接写数据库"""
+    store = get_draft_store()
+    if store is None:
+        return None
+
+    saved_at = datetime.utcnow().isoformat()
+    entries = {
+        item['qa_pair_id']: {
+            'prompt': item.get('prompt'),
+            'completion': item.get('completion'),
+            'is_deleted': bool(item.get('is_deleted', False)),
+            'saved_at': saved_at
+        }
+        for item in items
+    }
+    store.put_many(task_id, user_id, entries)
+    return entries
+
+
+def get_buffered_drafts(task_id, user_id):
+    """缓冲中尚未写入数据库的草稿 {qa_pair_id: entry}"""
+    store = get_draft_store()
+    return store.get_all(task_id, user_id) if store is not None else {}
+
+
+def buffered_draft_dict(task_id, user_id, qa_pair_id, entry, base=None):
+    """将缓冲中的草稿叠加到数据库草稿的 to_dict() 结果上，与 save_draft 相同，None 字段保留原值"""
+    data = dict(base) if base else {
+        'id': None,
+        'task_id': task_id,
+        'user_id': user_id,
+        'qa_pair_id': qa_pair_id,
+        'draft_prompt': None,
+        'draft_completion': None,
+        'created_at': None,
+        'updated_at': None
+    }
+    if entry['prompt'] is not None:
+        data['draft_prompt'] = entry['prompt']
+    if entry['completion'] is not None:
+        data['draft_completion'] = entry['completion']
+    data['is_auto_saved'] = True
+    data['last_saved_at'] = entry['saved_at']
+    data['is_buffered'] = True
+    return data
+
+
+def _flush_lock(store, task_id, user_id):
+    """同一 (任务, 用户) 的刷写与提交互斥，避免已取出但尚未写入数据库的草稿被提交遗漏"""
+    return store.lock(task_id, user_id, current_app.config.get('DRAFT_BUFFER_LOCK_TIMEOUT', 60))
+
+
+def _flush_entries(store, task_id, user_id):
+    from src.models import db
+    from src.models.collaboration_task_draft import CollaborationTaskDraft
+
+    entries = store.pop_all(task_id, user_id)
+    if not entries:
+        return 0
+
+    items = [{
+        'qa_pair_id': qa_pair_id,
+        'prompt': entry['prompt'],
+        'completion': entry['completion'],
+        'is_deleted': entry['is_deleted'],
+        'saved_at': datetime.fromisoformat(entry['saved_at'])
+    } for qa_pair_id, entry in entries.items()]
+
+    try:
+        CollaborationTaskDraft.upsert_drafts(task_id, user_id, items, is_auto_saved=True)
+    except IntegrityError as e:
+        db.session.rollback()
+        current_app.logger.warning(f"丢弃任务 {task_id} 用户 {user_id} 的 {len(items)} 条缓冲草稿: {e}")
+        return 0
+    except Exception:
+        db.session.rollback()
+        store.restore(task_id, user_id, entries)
+        raise
+    return len(items)
+
+
+def flush_drafts(task_id, user_id):
+    """将某用户在任务中缓冲的草稿以一条批量 upsert 写入数据库并提交，返回写入条数
+
+    写入失败时草稿放回缓冲（不覆盖期间新写入的草稿）并抛出异常；
+    违反约束（如任务已删除）的草稿无法重试，记录日志后丢弃。
+    """
+    store = get_draft_store()
+    if store is None:
+        return 0
+    with _flush_lock(store, task_id, user_id):
+        return _flush_entries(store, task_id, user_id)
+
+
+@contextmanager
+def drafts_flushed(task_id, user_id):
+    """刷写某用户在任务中缓冲的草稿，并在 with 块结束前阻止其他刷写
+
+    用于提交：其他线程或进程已取出、尚未提交的草稿会先写入数据库，
+    提交期间不会有缓冲草稿在提交之后才写入。
+    """
+    store = get_draft_store()
+    if store is None:
+        yield
+        return
+    with _flush_lock(store, task_id, user_id):
+        _flush_entries(store, task_id, user_id)
+        yield
+
+
+def flush_all_drafts():
+    """刷写所有缓冲中的草稿，返回写入条数"""
+    store = get_draft_store()
+    if store is None:
+        return 0
+
+    total = 0
+    for task_id, user_id in store.pending():
+        try:
+            total += flush_drafts(task_id, user_id)
+        except Exception as e:
+            current_app.logger.error(f"刷写任务 {task_id} 用户 {user_id} 的草稿缓冲失败: {e}")
+    if total:
+        current_app.logger.info(f"草稿缓冲刷写完成: {total} 条")
+    return total
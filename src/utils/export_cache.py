@@ -0,0 +1,138 @@
+import os
+import glob
+import uuid
+import hashlib
+from flask import current_app, request, send_file, Response
+from src.utils.file_handler import (
+    iter_jsonl_export, stream_download, write_excel, export_to_excel, delete_file_safe,
+    JSONL_MIMETYPE, GZIP_MIMETYPE, EXCEL_MIMETYPE
+)
+from src.utils.compression import iter_compressed
+
+# 导出文件的内容格式发生变化时递增，使已有缓存和客户端持有的 ETag 失效
+EXPORT_CACHE_FORMAT_VERSION = 1
+
+
+def build_export_etag(file_id, export_format, profile, version):
+    """根据 (file_id, 导出格式, 导出样式, 最后更新时间, QA对数量) 计算 ETag"""
+    max_updated_at, count = version
+    key = ':'.join([
+        str(EXPORT_CACHE_FORMAT_VERSION),
+        str(file_id),
+        profile,
+        export_format,
+        max_updated_at.isoformat() if max_updated_at else '',
+        str(count)
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def get_export_cache_dir():
+    """获取导出缓存目录（EXPORT_FOLDER/cache）"""
+    cache_dir = os.path.join(current_app.config['EXPORT_FOLDER'], 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _cache_prefix(file_id, profile, export_format):
+    return f"{file_id}_{profile}_{export_format}_"
+
+
+def get_cache_path(file_id, profile, export_format, etag):
+    """获取某一版本导出结果的缓存路径"""
+    ext = 'xlsx' if export_format == 'excel' else export_format
+    return os.path.join(get_export_cache_dir(), f"{_cache_prefix(file_id, profile, export_format)}{etag}.{ext}")
+
+
+def remove_stale_exports(file_id, profile, export_format, keep_path):
+    """删除同一文件、同一导出样式的旧版本缓存"""
+    pattern = os.path.join(get_export_cache_dir(), _cache_prefix(file_id, profile, export_format) + '*')
+    for path in glob.glob(pattern):
+        if path != keep_path and not path.endswith('.tmp'):
+            delete_file_safe(path)
+
+
+def _iter_export_chunks(rows, export_format):
+    """生成JSONL导出内容，jsonl.gz 格式时流式gzip压缩"""
+    chunks = iter_jsonl_export(rows)
+    if export_format == 'jsonl.gz':
+        chunks = iter_compressed(chunks, 'gzip', current_app.config['COMPRESS_LEVEL'])
+    return chunks
+
+
+def _export_mimetype(export_format):
+    return {'excel': EXCEL_MIMETYPE, 'jsonl.gz': GZIP_MIMETYPE}.get(export_format, JSONL_MIMETYPE)
+
+
+def _tee_to_cache(chunks, cache_path, on_complete):
+    """转发导出内容的同时写入缓存，完整写完后才原子替换为正式缓存文件"""
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    completed = False
+    try:
+        with open(tmp_path, 'wb') as out:
+            for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        os.replace(tmp_path, cache_path)
+        completed = True
+        on_complete()
+    finally:
+        # 客户端中途断开或导出出错时丢弃不完整的缓存
+        if not completed:
+            delete_file_safe(tmp_path)
+
+
+def _mark_revalidate(response, etag):
+    """导出结果可被客户端缓存，但每次使用前都需要用 ETag 重新验证"""
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def send_export(file_id, export_format, profile, version, download_name, rows_factory, excel_options=None):
+    """返回导出结果，命中缓存时不再查询QA对
+
+    version 为 QAPair.get_export_version 的返回值；rows_factory 只在需要重新生成时调用，
+    返回待导出的QA对迭代器；profile 区分不同接口的导出样式。客户端 If-None-Match
+    与当前版本一致时返回304（弱比较，响应经过压缩后 ETag 会变为弱 ETag）。
+    export_format 为 jsonl、jsonl.gz 或 excel。
+    """
+    etag = build_export_etag(file_id, export_format, profile, version)
+    if request.if_none_match.contains_weak(etag):
+        return _mark_revalidate(Response(status=304), etag)
+
+    excel_options = excel_options or {}
+    if not current_app.config.get('EXPORT_CACHE_ENABLED', True):
+        if export_format == 'excel':
+            mem_file, mimetype = export_to_excel(rows_factory(), **excel_options)
+            response = send_file(mem_file, as_attachment=True, download_name=download_name, mimetype=mimetype)
+        else:
+            chunks = _iter_export_chunks(rows_factory(), export_format)
+            response = stream_download(chunks, download_name, _export_mimetype(export_format))
+        return _mark_revalidate(response, etag)
+
+    cache_path = get_cache_path(file_id, profile, export_format, etag)
+    on_complete = lambda: remove_stale_exports(file_id, profile, export_format, cache_path)
+
+    if not os.path.exists(cache_path):
+        if export_format != 'excel':
+            # 首次导出边生成边返回，同时写入缓存
+            chunks = _tee_to_cache(_iter_export_chunks(rows_factory(), export_format), cache_path, on_complete)
+            return _mark_revalidate(stream_download(chunks, download_name, _export_mimetype(export_format)), etag)
+
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            write_excel(rows_factory(), tmp_path, **excel_options)
+            os.replace(tmp_path, cache_path)
+        finally:
+            delete_file_safe(tmp_path)
+        on_complete()
+    else:
+        current_app.logger.info(f"导出缓存命中: {os.path.basename(cache_path)}")
+
+    response = send_file(
+        cache_path, as_attachment=True, download_name=download_name,
+        mimetype=_export_mimetype(export_format), etag=False
+    )
+    return _mark_revalidate(response, etag)
@@ -0,0 +1,144 @@
+import os
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from src.utils.file_handler import iter_jsonl_export, write_excel, delete_file_safe
+from src.utils.export_cache import get_export_cache_dir
+
+# 当前进程中正在运行的导出任务进度
+_live_progress = {}
+
+
+def get_live_progress(job_id):
+    """获取当前进程中导出任务的实时进度，不在本进程运行时返回None"""
+    progress = _live_progress.get(job_id)
+    return dict(progress) if progress else None
+
+
+def get_export_jobs_dir():
+    """获取后台导出结果目录（EXPORT_FOLDER/jobs）"""
+    jobs_dir = os.path.join(current_app.config['EXPORT_FOLDER'], 'jobs')
+    os.makedirs(jobs_dir, exist_ok=True)
+    return jobs_dir
+
+
+def final_result_metadata(task):
+    """最终结果导出中每行附带的元数据"""
+    def build(row):
+        return {
+            'original_index': row.index_in_file,
+            'editor': row.editor_name,
+            'is_modified': row.is_modified,
+            'task_id': task.id,
+            'task_name': task.title
+        }
+    return build
+
+
+def _count_rows(rows, progress):
+    """在产出记录的同时累计已写出行数"""
+    for row in rows:
+        progress['rows_written'] += 1
+        yield row
+
+
+def write_export_file(job, out_path, progress):
+    """按导出任务的类型与格式将结果写入 out_path"""
+    from src.models.qa_pair import QAPair
+    from src.models.collaboration_task_summary import CollaborationTaskSummary
+
+    if job.kind == 'final':
+        rows = CollaborationTaskSummary.iter_for_export(job.task_id)
+        metadata = final_result_metadata(job.task)
+    else:
+        rows = QAPair.iter_for_export(job.file_id)
+        metadata = None
+    rows = _count_rows(rows, progress)
+
+    if job.export_format == 'excel':
+        write_excel(rows, out_path)
+    else:
+        with open(out_path, 'wb') as out:
+            for chunk in iter_jsonl_export(rows, metadata=metadata):
+                out.write(chunk)
+
+
+def start_export_job(job_id):
+    """提交导出任务到后台线程执行"""
+    from src.utils.background import submit_background_job
+    return submit_background_job(run_export_job, job_id)
+
+
+def run_export_job(job_id):
+    """执行导出任务：结果写入 EXPORT_FOLDER/jobs 后签发下载令牌"""
+    from src.models import db
+    from src.models.export_job import ExportJob
+
+    job = ExportJob.query.get(job_id)
+    if not job or job.status != 'pending':
+        return
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    progress = _live_progress[job_id] = {'rows_written': 0}
+    ext = 'xlsx' if job.export_format == 'excel' else 'jsonl'
+    file_path = os.path.join(get_export_jobs_dir(), f"{job.id}_{uuid.uuid4().hex}.{ext}")
+    tmp_path = f"{file_path}.tmp"
+    try:
+        started = time.perf_counter()
+        write_export_file(job, tmp_path, progress)
+        os.replace(tmp_path, file_path)
+
+        job.mark_completed(
+            file_path, os.path.getsize(file_path), progress['rows_written'],
+            current_app.config['EXPORT_JOB_TTL']
+        )
+        db.session.commit()
+        current_app.logger.info(
+            f"导出任务 {job_id} 完成: {progress['rows_written']} 行, 耗时 {time.perf_counter() - started:.2f}s"
+        )
+    except Exception as e:
+        db.session.rollback()
+        delete_file_safe(tmp_path)
+        current_app.logger.error(f"导出任务 {job_id} 失败: {e}", exc_info=True)
+
+        job = ExportJob.query.get(job_id)
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.rows_written = progress['rows_written']
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    finally:
+        _live_progress.pop(job_id, None)
+
+
+def sweep_expired_exports():
+    """删除下载令牌已过期的导出结果，以及超过 EXPORT_CACHE_MAX_AGE 的导出缓存"""
+    from src.models import db
+    from src.models.export_job import ExportJob
+
+    expired_jobs = ExportJob.get_expired_jobs()
+    for job in expired_jobs:
+        if job.file_path:
+            delete_file_safe(job.file_path)
+        job.mark_expired()
+    db.session.commit()
+
+    cache_dir = get_export_cache_dir()
+    cutoff = time.time() - current_app.config['EXPORT_CACHE_MAX_AGE']
+    removed_cache = 0
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed_cache += 1
+        except OSError:
+            continue
+
+    if expired_jobs or removed_cache:
+        current_app.logger.info(f"导出清理完成: 过期导出任务 {len(expired_jobs)} 个, 过期缓存文件 {removed_cache} 个")
+    return len(expired_jobs), removed_cache
@@ -1,24 +1,69 @@
 import os
 import json
 import uuid
+import hashlib
+import gzip
+import bz2
+import lzma
+import unicodedata
+import tempfile
 from datetime import datetime
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
 from openpyxl import Workbook
-from flask import current_app
+from flask import current_app, Response, stream_with_context
 import io
 
+# 支持的压缩格式及对应的流式解压函数，可接受文件路径或文件对象
+DECOMPRESSORS = {
+    'gz': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open
+}
+
+def get_compression(filename):
+    """获取文件的压缩格式（gz/bz2/xz），未压缩时返回None"""
+    parts = filename.lower().rsplit('.', 2)
+    if len(parts) == 3 and parts[2] in DECOMPRESSORS:
+        return parts[2]
+    return None
+
+def get_file_type(filename):
+    """获取文件类型，压缩文件包含内层扩展名，如 jsonl.gz"""
+    if get_compression(filename):
+        return '.'.join(filename.lower().rsplit('.', 2)[1:])
+    return filename.rsplit('.', 1)[1].lower()
+
 def allowed_file(filename):
-    """检查文件扩展名是否允许"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+    """检查文件扩展名是否允许，压缩文件检查压缩格式与内层扩展名"""
+    if '.' not in filename:
+        return False
+    compression = get_compression(filename)
+    if compression:
+        inner_ext = filename.lower().rsplit('.', 2)[1]
+        return compression in current_app.config['ALLOWED_COMPRESSIONS'] and \
+               inner_ext in current_app.config['ALLOWED_EXTENSIONS']
+    return filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
 def generate_unique_filename(original_filename):
     """生成唯一的文件名"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     unique_id = str(uuid.uuid4())[:8]
-    name, ext = os.path.splitext(secure_filename(original_filename))
+    safe_name = secure_filename(original_filename)
+    if get_compression(safe_name):
+        name, inner_ext, compression = safe_name.rsplit('.', 2)
+        ext = f".{inner_ext}.{compression}"
+    else:
+        name, ext = os.path.splitext(safe_name)
     return f"{name}_{timestamp}_{unique_id}{ext}"
 
+def open_jsonl_binary(file_path):
+    """以二进制方式打开JSONL文件，压缩文件通过流式解压读取"""
+    compression = get_compression(file_path)
+    if compression:
+        return DECOMPRESSORS[compression](file_path, 'rb')
+    return open(file_path, 'rb')
+
 def save_uploaded_file(file, upload_folder):
     """保存上传的文件"""
     if not file or not allowed_file(file.filename):
@@ -28,94 +73,318 @@ def save_uploaded_file(file, upload_folder):
     file_path = os.path.join(upload_folder, filename)
     
     try:
-        file.save(file_path)
+        # 边写入磁盘边计算SHA-256，用于识别重复上传的数据集
+        hasher = hashlib.sha256()
+        with open(file_path, 'wb') as out:
+            while True:
+                block = file.stream.read(1024 * 1024)
+                if not block:
+                    break
+                out.write(block)
+                hasher.update(block)
+
         file_size = os.path.getsize(file_path)
         return {
             'filename': filename,
             'original_filename': file.filename,
             'file_path': file_path,
             'file_size': file_size,
-            'file_type': file.filename.rsplit('.', 1)[1].lower()
+            'file_type': get_file_type(file.filename),
+            'content_hash': hasher.hexdigest()
         }, None
     except Exception as e:
         return None, f"文件保存失败: {str(e)}"
 
+def prepare_stream_upload(original_filename, upload_folder):
+    """为直接从请求流写入的上传分配目标文件，内容由 iter_jsonl_stream 写入"""
+    if not original_filename or not allowed_file(original_filename):
+        return None, "不支持的文件类型"
+
+    filename = generate_unique_filename(original_filename)
+    return {
+        'filename': filename,
+        'original_filename': original_filename,
+        'file_path': os.path.join(upload_folder, filename),
+        'file_size': 0,
+        'file_type': get_file_type(original_filename)
+    }, None
+
+class JsonlParseError(ValueError):
+    """JSONL内容格式错误，line_num 为出错的行号（从1开始）"""
+
+    def __init__(self, reason, line_num=None):
+        self.reason = reason
+        self.line_num = line_num
+        super().__init__(f"第{line_num}行{reason}" if line_num is not None else reason)
+
+
+def parse_jsonl_line(line, line_num):
+    """解析并校验单行JSONL，返回QA对字典；空行返回None"""
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise JsonlParseError(f"JSON格式错误: {str(e)}", line_num)
+
+    if not isinstance(data, dict):
+        raise JsonlParseError("不是有效的JSON对象", line_num)
+
+    if 'prompt' not in data or 'completion' not in data:
+        raise JsonlParseError("缺少必需的字段 'prompt' 或 'completion'", line_num)
+
+    return {
+        'prompt': str(data['prompt']),
+        'completion': str(data['completion'])
+    }
+
+def iter_jsonl_records(file_path):
+    """逐行流式解析JSONL文件，遇到格式错误时抛出 JsonlParseError
+
+    压缩文件（.gz/.bz2/.xz）边解压边解析，不会解压到磁盘或内存中。
+    """
+    compressed = get_compression(file_path) is not None
+    try:
+        with open_jsonl_binary(file_path) as f:
+            for line_num, raw_line in enumerate(f, 1):
+                record = _parse_jsonl_bytes(raw_line, line_num)
+                if record is not None:
+                    yield record
+    except (EOFError, lzma.LZMAError, OSError) as e:
+        if not compressed:
+            raise
+        raise JsonlParseError(f"文件解压失败: {str(e)}")
+
+def _parse_jsonl_bytes(raw_line, line_num):
+    """解码并解析单行字节内容"""
+    try:
+        line = raw_line.decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise JsonlParseError(f"文件读取失败: {str(e)}", line_num)
+    return parse_jsonl_line(line, line_num)
+
+class _TeeReader:
+    """读取输入流的同时将原始字节写入 out 并更新 hasher"""
+
+    def __init__(self, stream, out, hasher):
+        self.stream = stream
+        self.out = out
+        self.hasher = hasher
+
+    def read(self, size=-1):
+        block = self.stream.read(size)
+        if block:
+            self.out.write(block)
+            self.hasher.update(block)
+        return block
+
+def iter_jsonl_stream(stream, out, hasher, block_size=1024 * 1024, compression=None):
+    """从输入流逐块读取JSONL，原样写入 out 并更新 hasher，同时逐行产出QA对
+
+    只需读取一遍上传内容；遇到格式错误的行立即抛出 JsonlParseError，
+    不再读取剩余内容。compression 为 gz/bz2/xz 时磁盘上保留压缩后的原始字节，
+    解析时流式解压。
+    """
+    tee = _TeeReader(stream, out, hasher)
+    source = DECOMPRESSORS[compression](tee, 'rb') if compression else tee
+
+    try:
+        yield from _iter_jsonl_blocks(source, block_size)
+    except (EOFError, lzma.LZMAError, OSError) as e:
+        if not compression:
+            raise
+        raise JsonlParseError(f"文件解压失败: {str(e)}")
+
+    # 压缩流结束后可能还有未读取的尾部字节，同样写入磁盘以保证哈希完整
+    while tee.read(block_size):
+        pass
+
+def _iter_jsonl_blocks(source, block_size):
+    """按块读取并切分为行，逐行产出QA对"""
+    pending = b''
+    line_num = 0
+    while True:
+        block = source.read(block_size)
+        if not block:
+            break
+
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        for raw_line in lines:
+            line_num += 1
+            record = _parse_jsonl_bytes(raw_line, line_num)
+            if record is not None:
+                yield record
+
+    if pending:
+        record = _parse_jsonl_bytes(pending, line_num + 1)
+        if record is not None:
+            yield record
+
+def split_jsonl_ranges(file_path, shard_size):
+    """按换行符对齐切分文件，返回字节区间列表 [(start, end), ...]"""
+    file_size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, 'rb') as f:
+        while start < file_size:
+            end = start + shard_size
+            if end >= file_size:
+                end = file_size
+            else:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def parse_jsonl_range(file_path, start, end):
+    """解析文件 [start, end) 字节区间内的行，供多进程分片解析调用
+
+    返回 (records, line_count, error)。line_count 为区间内的总行数（含空行），
+    用于换算全局行号；error 为 (区间内行号, 原因) 或 None。
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    lines = data.split(b'\n')
+    if lines and lines[-1] == b'':
+        lines.pop()
+
+    records = []
+    for local_num, raw_line in enumerate(lines, 1):
+        try:
+            record = parse_jsonl_line(raw_line.decode('utf-8'), local_num)
+        except UnicodeDecodeError as e:
+            return [], len(lines), (local_num, f"文件读取失败: {str(e)}")
+        except JsonlParseError as e:
+            return [], len(lines), (e.line_num, e.reason)
+        if record is not None:
+            records.append(record)
+
+    return records, len(lines), None
+
 def parse_jsonl_file(file_path):
     """解析JSONL文件"""
     try:
-        qa_pairs = []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                try:
-                    data = json.loads(line)
-                    if not isinstance(data, dict):
-                        return None, f"第{line_num}行不是有效的JSON对象"
-                    
-                    if 'prompt' not in data or 'completion' not in data:
-                        return None, f"第{line_num}行缺少必需的字段 'prompt' 或 'completion'"
-                    
-                    qa_pairs.append({
-                        'prompt': str(data['prompt']),
-                        'completion': str(data['completion'])
-                    })
-                
-                except json.JSONDecodeError as e:
-                    return None, f"第{line_num}行JSON格式错误: {str(e)}"
-        
-        if not qa_pairs:
-            current_app.logger.warning(f"文件 {file_path} 中没有有效的QA对")
-            return None, "文件中没有有效的QA对"
-        
-        return qa_pairs, None
-    
+        qa_pairs = list(iter_jsonl_records(file_path))
+    except JsonlParseError as e:
+        return None, str(e)
     except Exception as e:
         return None, f"文件读取失败: {str(e)}"
 
-def export_to_jsonl(qa_pairs):
-    """导出QA对到内存中的JSONL文件流"""
-    try:
-        jsonl_content = '\n'.join([json.dumps({
+    if not qa_pairs:
+        current_app.logger.warning(f"文件 {file_path} 中没有有效的QA对")
+        return None, "文件中没有有效的QA对"
+
+    return qa_pairs, None
+
+JSONL_MIMETYPE = 'application/jsonl'
+GZIP_MIMETYPE = 'application/gzip'
+
+def iter_jsonl_export(qa_pairs, buffer_size=64 * 1024, metadata=None):
+    """逐行编码QA对为JSONL，累积到约 buffer_size 字节后产出一块UTF-8字节
+
+    qa_pairs 可以是任意产出带 prompt/completion 属性对象的可迭代对象，
+    配合 QAPair.iter_for_export 使用时导出的内存占用与文件大小无关。
+    传入 metadata 时以每行对象调用，返回值写入该行的 metadata 字段。
+    """
+    buffer = []
+    buffered = 0
+    for qa_pair in qa_pairs:
+        record = {
             'prompt': qa_pair.prompt,
             'completion': qa_pair.completion
-        }, ensure_ascii=False) for qa_pair in qa_pairs])
-        
-        mem_file = io.BytesIO(jsonl_content.encode('utf-8'))
-        mimetype = 'application/jsonl'
-        
-        return mem_file, mimetype
+        }
+        if metadata:
+            record['metadata'] = metadata(qa_pair)
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        buffer.append(line)
+        buffered += len(line)
+        if buffered >= buffer_size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield b''.join(buffer)
+
+def export_to_jsonl(qa_pairs):
+    """导出QA对到内存中的JSONL文件流（大文件请使用 iter_jsonl_export 流式导出）"""
+    try:
+        mem_file = io.BytesIO(b''.join(iter_jsonl_export(qa_pairs)))
+        return mem_file, JSONL_MIMETYPE
     except Exception as e:
         raise IOError(f"导出JSONL文件流失败: {str(e)}")
 
-def export_to_excel(qa_pairs):
-    """导出QA对到内存中的Excel文件流"""
+def set_attachment_filename(response, download_name):
+    """设置 Content-Disposition，非ASCII文件名按 RFC 5987 编码（与 send_file 一致）"""
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "QA对"
-        
-        ws.append(['序号', '问题(prompt)', '答案(completion)'])
-        
-        for index, qa_pair in enumerate(qa_pairs, 1):
-            ws.append([index, qa_pair.prompt, qa_pair.completion])
-        
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        quoted = quote(download_name, safe="!#$&+^`|~")
+        response.headers.set('Content-Disposition', 'attachment', filename=simple, **{'filename*': f"UTF-8''{quoted}"})
+    else:
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return response
+
+def stream_download(chunks, download_name, mimetype):
+    """以附件形式流式返回生成器产出的内容，生成器在请求上下文中执行"""
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    return set_attachment_filename(response, download_name)
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def write_excel(qa_pairs, out, sheet_title="QA对", with_index=True):
+    """以 openpyxl 只写模式将QA对写入Excel，out 为文件路径或可写的文件对象
+
+    只写模式逐行序列化，不在内存中保留单元格对象。with_index 为 True 时首列为序号。
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+
+    if with_index:
         ws.column_dimensions['A'].width = 8
         ws.column_dimensions['B'].width = 50
         ws.column_dimensions['C'].width = 50
-        
-        mem_file = io.BytesIO()
-        wb.save(mem_file)
-        mem_file.seek(0) # Move the cursor to the beginning of the memory file
-        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        
-        return mem_file, mimetype
+        ws.append(['序号', '问题(prompt)', '答案(completion)'])
+        for index, qa_pair in enumerate(qa_pairs, 1):
+            ws.append([index, qa_pair.prompt, qa_pair.completion])
+    else:
+        ws.append(['prompt', 'completion'])
+        for qa_pair in qa_pairs:
+            ws.append([qa_pair.prompt, qa_pair.completion])
+
+    wb.save(out)
+
+def export_to_excel(qa_pairs, sheet_title="QA对", with_index=True):
+    """导出QA对到Excel文件流，返回 (文件对象, mimetype)
+
+    生成的文件写入 SpooledTemporaryFile，超过 EXPORT_SPOOL_MAX_SIZE 后自动转存到磁盘，
+    可直接交给 send_file 返回。
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=current_app.config['EXPORT_SPOOL_MAX_SIZE'])
+    try:
+        write_excel(qa_pairs, spooled, sheet_title=sheet_title, with_index=with_index)
+        spooled.seek(0)
+        return spooled, EXCEL_MIMETYPE
     except Exception as e:
+        spooled.close()
         raise IOError(f"导出Excel文件流失败: {str(e)}")
 
 
+# 同步导出接口支持的格式，jsonl.gz 为 gzip 压缩后的JSONL文件，可直接重新上传
+EXPORT_FORMATS = ('jsonl', 'jsonl.gz', 'excel')
+
+def parse_export_format(value):
+    """解析 format 查询参数，未知格式按 jsonl 处理"""
+    value = (value or 'jsonl').lower()
+    return value if value in EXPORT_FORMATS else 'jsonl'
+
 def create_export_filename(original_filename, export_type='jsonl', suffix='edited'):
     """创建导出文件名"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -123,9 +392,25 @@ def create_export_filename(original_filename, export_type='jsonl', suffix='edite
     
     if export_type == 'excel':
         return f"{name}_{suffix}_{timestamp}.xlsx"
+    elif export_type == 'jsonl.gz':
+        return f"{name}_{suffix}_{timestamp}.jsonl.gz"
     else:
         return f"{name}_{suffix}_{timestamp}.jsonl"
 
+def compute_file_sha256(file_path, size=None, block_size=1024 * 1024, hasher=None):
+    """流式计算文件（或文件前 size 字节）的SHA-256，返回 hashlib 对象"""
+    hasher = hasher or hashlib.sha256()
+    remaining = size
+    with open(file_path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(block_size if remaining is None else min(block_size, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return hasher
+
 def get_file_info(file_path):
     """获取文件信息"""
     try:
@@ -152,6 +437,12 @@ def delete_file_safe(file_path):
     
     return True, None
 
+def discard_uploaded_file(file_info):
+    """删除导入失败的上传文件；已改为引用相同内容的已有文件时不删除共享文件"""
+    if file_info.get('deduplicated'):
+        return True, None
+    return delete_file_safe(file_info['file_path'])
+
 def ensure_directory_exists(directory):
     """确保目录存在"""
     try:
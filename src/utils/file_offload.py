@@ -0,0 +1,71 @@
+import os
+from urllib.parse import quote
+from flask import current_app, request
+from werkzeug.wsgi import wrap_file
+
+# 支持的下载卸载方式：Apache/lighttpd 使用 X-Sendfile，nginx 使用 X-Accel-Redirect
+OFFLOAD_MODES = ('x-sendfile', 'x-accel-redirect')
+
+
+def init_file_offload(app):
+    """按 FILE_OFFLOAD_MODE 开启文件下载卸载
+
+    开启后所有基于路径的 send_file / send_from_directory（导出结果、上传原文件、前端静态文件）
+    只返回响应头，文件内容与字节区间请求由前端代理直接处理。
+    """
+    mode = app.config.get('FILE_OFFLOAD_MODE')
+    if not mode:
+        return
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"不支持的 FILE_OFFLOAD_MODE: {mode}")
+
+    app.config['USE_X_SENDFILE'] = True
+    if mode == 'x-accel-redirect' and not app.config.get('FILE_OFFLOAD_LOCATIONS'):
+        prefix = app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+        app.config['FILE_OFFLOAD_LOCATIONS'] = {
+            app.config['EXPORT_FOLDER']: f'{prefix}/exports/',
+            app.config['UPLOAD_FOLDER']: f'{prefix}/uploads/',
+            app.static_folder: f'{prefix}/static/'
+        }
+    app.after_request(offload_file_response)
+
+
+def get_internal_uri(file_path):
+    """将本地文件路径映射为 nginx internal location 下的URI，不在映射目录内时返回None"""
+    real_path = os.path.realpath(file_path)
+    for root, prefix in current_app.config.get('FILE_OFFLOAD_LOCATIONS', {}).items():
+        relative = os.path.relpath(real_path, os.path.realpath(root))
+        if not relative.startswith(os.pardir):
+            return prefix.rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+    return None
+
+
+def offload_file_response(response):
+    """将带 X-Sendfile 的响应整理为交给代理处理的形式"""
+    file_path = response.headers.get('X-Sendfile')
+    if not file_path:
+        return response
+
+    # 304 不需要代理再发送文件（werkzeug 已去掉响应体）
+    if response.status_code == 304:
+        del response.headers['X-Sendfile']
+        return response
+
+    # 字节区间由代理按客户端原始的 Range 头从完整文件中截取，这里始终描述完整文件
+    if response.status_code == 206:
+        response.status_code = 200
+        response.headers.pop('Content-Range', None)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.content_length = os.path.getsize(file_path)
+
+    if current_app.config['FILE_OFFLOAD_MODE'] == 'x-accel-redirect':
+        del response.headers['X-Sendfile']
+        uri = get_internal_uri(file_path)
+        if uri is None:
+            # 不在映射目录内的文件代理无法访问，回退为由应用直接返回
+            current_app.logger.warning(f"文件 {file_path} 不在 FILE_OFFLOAD_LOCATIONS 中，改为直接返回")
+            response.response = wrap_file(request.environ, open(file_path, 'rb'))
+            return response
+        response.headers['X-Accel-Redirect'] = uri
+
+    return response
@@ -0,0 +1,337 @@
+import os
+import time
+import hashlib
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from src.utils.file_handler import (
+    iter_jsonl_records, iter_jsonl_stream, split_jsonl_ranges, parse_jsonl_range,
+    get_compression, delete_file_safe, JsonlParseError
+)
+
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
+
+class IngestStats:
+    """一次JSONL导入的统计信息"""
+
+    def __init__(self, rows=0, elapsed=0.0, mode='single', workers=1):
+        self.rows = rows
+        self.elapsed = elapsed
+        self.mode = mode
+        self.workers = workers
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_sec': round(self.rows_per_sec, 1),
+            'mode': self.mode,
+            'workers': self.workers
+        }
+
+
+def get_ingest_workers():
+    """获取并行解析的进程数，配置为0时使用CPU核数"""
+    return current_app.config.get('INGEST_WORKERS') or os.cpu_count() or 1
+
+
+def get_parse_executor(workers):
+    """获取进程内共享的解析进程池，所有导入共用，进程数不超过 workers
+
+    子进程通过 forkserver（不支持时为 spawn）启动，不从多线程的 Worker 进程 fork，
+    避免继承日志、连接池等已被其他线程持有的锁。
+    """
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _parse_executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        return _parse_executor
+
+
+def iter_jsonl_records_parallel(file_path, workers, shard_size):
+    """多进程分片解析JSONL文件，按原始顺序产出QA对
+
+    文件先按换行符对齐切分为字节区间，由共享进程池并行解析；结果按区间顺序合并，
+    错误信息中的行号换算为全局行号。同时在途的分片数限制为 workers 的两倍，
+    避免解析结果在内存中堆积。
+    """
+    ranges = iter(split_jsonl_ranges(file_path, shard_size))
+    executor = get_parse_executor(workers)
+    pending = deque()
+
+    def submit_next():
+        byte_range = next(ranges, None)
+        if byte_range is not None:
+            pending.append(executor.submit(parse_jsonl_range, file_path, *byte_range))
+
+    try:
+        for _ in range(workers * 2):
+            submit_next()
+
+        lines_before = 0
+        while pending:
+            records, line_count, error = pending.popleft().result()
+            if error:
+                line_num, reason = error
+                raise JsonlParseError(reason, lines_before + line_num if line_num is not None else None)
+
+            submit_next()
+            yield from records
+            lines_before += line_count
+    finally:
+        # 进程池由其他导入共用，只取消本次尚未开始的分片
+        for future in pending:
+            future.cancel()
+
+
+def _count_records(records, progress):
+    """在产出记录的同时累计已解析行数"""
+    for record in records:
+        progress['lines_parsed'] += 1
+        yield record
+
+
+def reuse_existing_blob(file_info):
+    """已存在内容相同的文件时，删除新上传的副本并改为引用已有的物理文件
+
+    file_info 会被原地更新并标记 deduplicated，返回被复用的文件记录或None。
+    """
+    from src.models.file import File
+
+    content_hash = file_info.get('content_hash')
+    if not content_hash:
+        return None
+
+    existing = File.find_by_content_hash(content_hash)
+    if existing is None or existing.file_path == file_info['file_path']:
+        return None
+
+    delete_file_safe(file_info['file_path'])
+    file_info.update(filename=existing.filename, file_path=existing.file_path, deduplicated=True)
+    current_app.logger.info(f"上传文件与文件 {existing.id} 内容相同，复用已有文件 {existing.filename}")
+    return existing
+
+
+def copy_rows_from_duplicate(content_hash, file_id, progress=None):
+    """从内容相同且未被修改过的文件复制QA对，无可用来源时返回None"""
+    from src.models.file import File
+    from src.models.qa_pair import QAPair
+
+    source_id = File.find_pristine_source_id(content_hash, exclude_id=file_id)
+    if source_id is None:
+        return None
+
+    started = time.perf_counter()
+    rows = QAPair.copy_from_file(source_id, file_id, commit=False)
+    stats = IngestStats(rows=rows, elapsed=time.perf_counter() - started, mode='dedup')
+    if progress is not None:
+        progress.update(lines_parsed=rows, rows_inserted=rows)
+
+    current_app.logger.info(
+        f"文件 {file_id} 从文件 {source_id} 复制 {stats.rows} 行QA对, 耗时 {stats.elapsed:.2f}s"
+    )
+    return stats
+
+
+def ingest_jsonl_file(file_path, file_id, chunk_size=None, progress=None, content_hash=None):
+    """流式解析JSONL文件并批量写入QA对
+
+    解析与写入按块交替进行，峰值内存只与 chunk_size 相关。文件大小超过
+    INGEST_PARALLEL_THRESHOLD 时改用多进程分片解析。写入在调用方的事务中完成，
+    本函数不提交；遇到格式错误时抛出 JsonlParseError，由调用方回滚。
+    传入 progress 字典时会实时更新其中的 lines_parsed 与 rows_inserted。
+    传入 content_hash 且已有相同内容的文件导入过时，直接复制其QA对而不再解析。
+    """
+    from src.models.qa_pair import QAPair
+
+    if content_hash:
+        stats = copy_rows_from_duplicate(content_hash, file_id, progress=progress)
+        if stats is not None:
+            return stats
+
+    config = current_app.config
+    workers = get_ingest_workers()
+    # 压缩文件无法按字节区间切分，只能顺序解压解析
+    if workers > 1 and get_compression(file_path) is None \
+            and os.path.getsize(file_path) >= config['INGEST_PARALLEL_THRESHOLD']:
+        stats = IngestStats(mode='parallel', workers=workers)
+        records = iter_jsonl_records_parallel(file_path, workers, config['INGEST_SHARD_SIZE'])
+    else:
+        stats = IngestStats()
+        records = iter_jsonl_records(file_path)
+
+    on_batch = None
+    if progress is not None:
+        records = _count_records(records, progress)
+        on_batch = lambda total: progress.update(rows_inserted=total)
+
+    started = time.perf_counter()
+    stats.rows = QAPair.create_from_jsonl_data(
+        file_id, records, chunk_size=chunk_size, commit=False, on_batch=on_batch
+    )
+    stats.elapsed = time.perf_counter() - started
+
+    current_app.logger.info(
+        f"文件 {file_id} 导入完成({stats.mode}, {stats.workers}进程): "
+        f"{stats.rows} 行, 耗时 {stats.elapsed:.2f}s, {stats.rows_per_sec:.0f} 行/秒"
+    )
+    return stats
+
+
+def ingest_upload_stream(stream, file_info, file_record, chunk_size=None):
+    """单遍导入：边从请求流读取边写入磁盘、计算哈希、校验并批量写入QA对
+
+    上传尚未结束时就开始写入数据库，遇到格式错误的行立即抛出 JsonlParseError，
+    由调用方回滚并删除已写入的部分文件。完成后回填文件大小与内容哈希，
+    内容与已有文件相同时改为引用已有的物理文件。本函数不提交。
+    """
+    from src.models.qa_pair import QAPair
+
+    hasher = hashlib.sha256()
+    stats = IngestStats(mode='stream')
+    started = time.perf_counter()
+    with open(file_info['file_path'], 'wb') as out:
+        records = iter_jsonl_stream(stream, out, hasher, compression=get_compression(file_info['filename']))
+        stats.rows = QAPair.create_from_jsonl_data(file_record.id, records, chunk_size=chunk_size, commit=False)
+    stats.elapsed = time.perf_counter() - started
+
+    file_info['file_size'] = os.path.getsize(file_info['file_path'])
+    file_info['content_hash'] = hasher.hexdigest()
+    file_record.file_size = file_info['file_size']
+    file_record.content_hash = file_info['content_hash']
+    if reuse_existing_blob(file_info):
+        file_record.filename = file_info['filename']
+        file_record.file_path = file_info['file_path']
+
+    current_app.logger.info(
+        f"文件 {file_record.id} 流式导入完成: {stats.rows} 行, "
+        f"耗时 {stats.elapsed:.2f}s, {stats.rows_per_sec:.0f} 行/秒"
+    )
+    return stats
+
+
+# 当前进程中正在运行的导入任务进度，导入期间数据尚未提交，进度只能保存在内存中
+_live_progress = {}
+
+
+def get_live_progress(job_id):
+    """获取当前进程中导入任务的实时进度，不在本进程运行时返回None"""
+    progress = _live_progress.get(job_id)
+    return dict(progress) if progress else None
+
+
+def start_ingest_job(job_id):
+    """提交导入任务到后台线程执行"""
+    from src.utils.background import submit_background_job
+    return submit_background_job(run_ingest_job, job_id)
+
+
+def run_ingest_job(job_id):
+    """执行导入任务：写入QA对后将协作任务从 importing 切换为 draft"""
+    from src.models import db
+    from src.models.ingest_job import IngestJob
+    from src.models.collaboration_task import CollaborationTask
+    from src.models.file import File
+
+    job = IngestJob.query.get(job_id)
+    if not job or job.status != 'pending':
+        return
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    progress = _live_progress[job_id] = {'lines_parsed': 0, 'rows_inserted': 0}
+    file_path = job.file.file_path
+    try:
+        stats = ingest_jsonl_file(file_path, job.file_id, progress=progress, content_hash=job.file.content_hash)
+        if stats.rows == 0:
+            raise JsonlParseError("文件中没有有效的QA对")
+
+        task = CollaborationTask.query.get(job.task_id)
+        task.total_qa_pairs = stats.rows
+        task.status = 'draft'
+
+        job.status = 'completed'
+        job.lines_parsed = progress['lines_parsed']
+        job.rows_inserted = stats.rows
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"导入任务 {job_id} 失败: {e}")
+        _fail_ingest_job(job_id, progress, e)
+        if not File.is_file_path_shared(file_path):
+            delete_file_safe(file_path)
+    finally:
+        _live_progress.pop(job_id, None)
+
+
+def _fail_ingest_job(job_id, progress, error):
+    """记录导入失败，并删除尚未完成导入的协作任务与文件记录"""
+    from src.models import db
+    from src.models.ingest_job import IngestJob
+
+    job = IngestJob.query.get(job_id)
+    if job.task:
+        db.session.delete(job.task)
+    if job.file:
+        db.session.delete(job.file)
+
+    job.task_id = None
+    job.file_id = None
+    job.status = 'failed'
+    job.error_message = str(error)
+    job.lines_parsed = progress['lines_parsed']
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def sweep_stale_ingest_jobs():
+    """将超过 INGEST_JOB_TIMEOUT 仍未结束的导入任务记为失败，返回处理的任务数
+
+    后台导入只在进程内的线程池中执行，Worker 重启或崩溃后任务会一直停留在
+    pending/running，协作任务停留在 importing。本进程中仍在运行的任务不处理；
+    多个进程同时清理时以条件 UPDATE 认领，同一任务只由一个进程清理。
+    """
+    from src.models import db
+    from src.models.ingest_job import IngestJob
+    from src.models.file import File
+
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['INGEST_JOB_TIMEOUT'])
+    stale_jobs = IngestJob.query.filter(
+        IngestJob.status.in_(['pending', 'running']),
+        db.func.coalesce(IngestJob.started_at, IngestJob.created_at) < cutoff
+    ).all()
+
+    failed = 0
+    for job in stale_jobs:
+        if job.id in _live_progress:
+            continue
+        claimed = IngestJob.query.filter_by(id=job.id, status=job.status).update(
+            {'status': 'failed'}, synchronize_session=False
+        )
+        if not claimed:
+            db.session.rollback()
+            continue
+
+        file_path = job.file.file_path if job.file else None
+        _fail_ingest_job(job.id, {'lines_parsed': job.lines_parsed}, '导入超时或中断（Worker 重启），请重新上传')
+        if file_path and not File.is_file_path_shared(file_path):
+            delete_file_safe(file_path)
+        failed += 1
+
+    if failed:
+        current_app.logger.warning(f"清理超时的导入任务 {failed} 个")
+    return failed
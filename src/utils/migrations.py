@@ -0,0 +1,256 @@
+from datetime import datetime
+from sqlalchemy import inspect, text, select, func, case, Table, Column, String, DateTime, MetaData
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', String(32), primary_key=True),
+    Column('description', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+# 已注册的迁移 [(version, description, fn)]，已执行的版本记录在 schema_migrations 表中
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """注册一个迁移，版本号须递增"""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return decorator
+
+
+def has_table(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def has_column(conn, table_name, column_name):
+    return any(c['name'] == column_name for c in inspect(conn).get_columns(table_name))
+
+
+def has_index(conn, table_name, index_name):
+    return any(i['name'] == index_name for i in inspect(conn).get_indexes(table_name))
+
+
+def create_table(conn, model):
+    """按模型当前定义建表（含索引），表已存在时跳过"""
+    model.__table__.create(conn, checkfirst=True)
+
+
+def add_column(conn, model, column_name):
+    """按模型中的列定义执行 ALTER TABLE ADD COLUMN，并创建该列上的单列索引"""
+    table = model.__table__
+    if has_column(conn, table.name, column_name):
+        return
+    column = table.c[column_name]
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+    for index in table.indexes:
+        if [c.name for c in index.columns] == [column_name]:
+            create_index(conn, index)
+
+
+def create_index(conn, index):
+    """创建模型中声明的索引，已存在时跳过"""
+    if not has_index(conn, index.table.name, index.name):
+        index.create(conn)
+
+
+def get_index(model, index_name):
+    return next(i for i in model.__table__.indexes if i.name == index_name)
+
+
+def get_applied_versions(conn):
+    """获取已执行的迁移版本"""
+    if not has_table(conn, schema_migrations.name):
+        return set()
+    return {row.version for row in conn.execute(schema_migrations.select())}
+
+
+def upgrade_database(engine, logger=None):
+    """按版本号顺序执行尚未执行的迁移，返回本次执行的版本列表
+
+    每个迁移在独立的事务中执行。迁移会先检查表、列、索引是否已存在，
+    对 create_all 创建的新库重复执行也是安全的，不会删除任何数据。
+    """
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        applied = get_applied_versions(conn)
+
+    executed = []
+    for version, description, fn in sorted(MIGRATIONS):
+        if version in applied:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description, applied_at=datetime.utcnow()
+            ))
+        executed.append(version)
+        if logger:
+            logger(f"已执行迁移 {version}: {description}")
+    return executed
+
+
+# ---------------------------------------------------------------------------
+# 迁移定义
+# ---------------------------------------------------------------------------
+
+@migration('0001', '协作任务增加 importing 状态，新增 ingest_jobs 表')
+def add_ingest_jobs(conn):
+    from src.models.collaboration_task import CollaborationTask
+    from src.models.ingest_job import IngestJob
+
+    status = CollaborationTask.__table__.c.status
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f"ALTER TYPE {status.type.name} ADD VALUE IF NOT EXISTS 'importing'"))
+    elif conn.dialect.name == 'mysql':
+        conn.execute(text(
+            f"ALTER TABLE collaboration_tasks MODIFY status {status.type.compile(dialect=conn.dialect)} NOT NULL"
+        ))
+    # SQLite 中枚举存为 VARCHAR 且不带 CHECK 约束，无需修改
+
+    create_table(conn, IngestJob)
+
+
+@migration('0002', '新增 upload_sessions 表（分块上传）')
+def add_upload_sessions(conn):
+    from src.models.upload_session import UploadSession
+    create_table(conn, UploadSession)
+
+
+@migration('0003', 'files 增加 content_hash 列及索引（上传去重）')
+def add_file_content_hash(conn):
+    from src.models.file import File
+    add_column(conn, File, 'content_hash')
+
+
+@migration('0004', '新增 export_jobs 表（后台导出）')
+def add_export_jobs(conn):
+    from src.models.export_job import ExportJob
+    create_table(conn, ExportJob)
+
+
+@migration('0005', '为编辑页、汇总页与通知列表的查询增加复合索引')
+def add_hot_query_indexes(conn):
+    from src.models.qa_pair import QAPair
+    from src.models.collaboration_task_draft import CollaborationTaskDraft
+    from src.models.collaboration_task import CollaborationTaskAssignment
+    from src.models.notification import Notification
+
+    create_index(conn, get_index(QAPair, 'ix_qa_pairs_file_index_deleted'))
+    create_index(conn, get_index(CollaborationTaskDraft, 'ix_collaboration_task_drafts_task_user_deleted'))
+    create_index(conn, get_index(CollaborationTaskAssignment, 'ix_collaboration_task_assignments_task_user'))
+    create_index(conn, get_index(Notification, 'ix_notifications_user_read_created'))
+    if conn.dialect.name == 'sqlite':
+        # 更新查询规划器的统计信息，使其选用新索引
+        conn.execute(text("ANALYZE"))
+
+
+@migration('0006', '协作任务与分配增加进度计数列，并按现有数据回填')
+def add_progress_counters(conn):
+    from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
+    from src.models.collaboration_task_draft import CollaborationTaskDraft
+
+    for column_name in ('assignment_count', 'completed_assignment_count', 'drafted_pair_count',
+                        'deleted_pair_count', 'modified_pair_count'):
+        add_column(conn, CollaborationTask, column_name)
+    for column_name in ('drafted_pair_count', 'deleted_pair_count', 'modified_pair_count'):
+        add_column(conn, CollaborationTaskAssignment, column_name)
+
+    tasks = CollaborationTask.__table__
+    assignments = CollaborationTaskAssignment.__table__
+    drafts = CollaborationTaskDraft.__table__
+
+    def count_drafts(is_deleted):
+        return select(func.count()).where(
+            drafts.c.task_id == assignments.c.task_id,
+            drafts.c.user_id == assignments.c.assigned_to,
+            drafts.c.is_deleted == is_deleted
+        ).scalar_subquery()
+
+    def count_assignments(*conditions):
+        return select(func.count()).where(assignments.c.task_id == tasks.c.id, *conditions).scalar_subquery()
+
+    def sum_assignments(column):
+        return select(func.coalesce(func.sum(column), 0)).where(assignments.c.task_id == tasks.c.id).scalar_subquery()
+
+    # 提交前的修改数无从得知，已完成的分配按其中已编辑的草稿数回填
+    conn.execute(assignments.update().values(
+        drafted_pair_count=count_drafts(False),
+        deleted_pair_count=count_drafts(True),
+        modified_pair_count=case((assignments.c.status == 'completed', count_drafts(False)), else_=0)
+    ))
+    conn.execute(tasks.update().values(
+        assignment_count=count_assignments(),
+        completed_assignment_count=count_assignments(assignments.c.status == 'completed'),
+        drafted_pair_count=sum_assignments(assignments.c.drafted_pair_count),
+        deleted_pair_count=sum_assignments(assignments.c.deleted_pair_count),
+        modified_pair_count=sum_assignments(assignments.c.modified_pair_count)
+    ))
+
+
+@migration('0007', '按分配重新汇总任务上的草稿计数（修正无分配用户的草稿计入任务的问题）')
+def resum_task_draft_counters(conn):
+    from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
+
+    tasks = CollaborationTask.__table__
+    assignments = CollaborationTaskAssignment.__table__
+
+    def sum_assignments(column):
+        return select(func.coalesce(func.sum(column), 0)).where(assignments.c.task_id == tasks.c.id).scalar_subquery()
+
+    conn.execute(tasks.update().values(
+        drafted_pair_count=sum_assignments(assignments.c.drafted_pair_count),
+        deleted_pair_count=sum_assignments(assignments.c.deleted_pair_count),
+        modified_pair_count=sum_assignments(assignments.c.modified_pair_count)
+    ))
+
+
+@migration('0008', '按分配范围重新统计分配上的草稿计数（同一用户有多个分配时各自只计入范围内的草稿）')
+def recount_assignment_draft_counters(conn):
+    from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
+    from src.models.collaboration_task_draft import CollaborationTaskDraft
+    from src.models.qa_pair import QAPair
+
+    tasks = CollaborationTask.__table__
+    assignments = CollaborationTaskAssignment.__table__
+    drafts = CollaborationTaskDraft.__table__
+    qa_pairs = QAPair.__table__
+
+    def count_drafts(is_deleted):
+        return select(func.count()).select_from(
+            drafts.join(qa_pairs, qa_pairs.c.id == drafts.c.qa_pair_id)
+        ).where(
+            drafts.c.task_id == assignments.c.task_id,
+            drafts.c.user_id == assignments.c.assigned_to,
+            drafts.c.is_deleted == is_deleted,
+            qa_pairs.c.file_id == select(tasks.c.file_id).where(tasks.c.id == assignments.c.task_id).scalar_subquery(),
+            qa_pairs.c.index_in_file >= assignments.c.start_index,
+            qa_pairs.c.index_in_file <= assignments.c.end_index
+        ).scalar_subquery()
+
+    def sum_assignments(column):
+        return select(func.coalesce(func.sum(column), 0)).where(assignments.c.task_id == tasks.c.id).scalar_subquery()
+
+    # 修改数无法重新统计，只将超出范围内草稿数的部分截断
+    drafted = count_drafts(False)
+    conn.execute(assignments.update().values(
+        drafted_pair_count=drafted,
+        deleted_pair_count=count_drafts(True),
+        modified_pair_count=case(
+            (assignments.c.modified_pair_count > drafted, drafted),
+            else_=assignments.c.modified_pair_count
+        )
+    ))
+    conn.execute(tasks.update().values(
+        drafted_pair_count=sum_assignments(assignments.c.drafted_pair_count),
+        deleted_pair_count=sum_assignments(assignments.c.deleted_pair_count),
+        modified_pair_count=sum_assignments(assignments.c.modified_pair_count)
+    ))
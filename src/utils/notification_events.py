@@ -0,0 +1,119 @@
+import json
+import time
+import queue
+import threading
+from flask import current_app
+
+NOTIFICATION_CHANNEL = 'qa:notifications'
+
+
+class NotificationBroker:
+    """进程内的通知订阅表：每个 SSE 连接对应一个队列，按用户分发事件"""
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def dispatch(self, user_id, event, data):
+        """投递给本进程中该用户的所有连接，队列已满的连接丢弃该事件"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+    def publish(self, user_id, event, data):
+        self.dispatch(user_id, event, data)
+
+
+class RedisNotificationBroker(NotificationBroker):
+    """通过 Redis pub/sub 在多个 Worker 进程间广播事件，再由各进程投递给本地连接"""
+
+    def __init__(self, client, max_queue_size=100):
+        super().__init__(max_queue_size)
+        self.client = client
+        self._listener = None
+
+    def publish(self, user_id, event, data):
+        self.client.publish(NOTIFICATION_CHANNEL, json.dumps({'user_id': user_id, 'event': event, 'data': data}))
+
+    def start_listener(self, logger):
+        """启动订阅 NOTIFICATION_CHANNEL 的守护线程，断线后自动重连"""
+        if self._listener is not None:
+            return
+
+        def listen():
+            while True:
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(NOTIFICATION_CHANNEL)
+                    for message in pubsub.listen():
+                        payload = json.loads(message['data'])
+                        self.dispatch(payload['user_id'], payload['event'], payload['data'])
+                except Exception as e:
+                    logger.error(f"通知订阅连接中断，稍后重连: {e}")
+                    time.sleep(1)
+
+        self._listener = threading.Thread(target=listen, name='qa-notification-listener', daemon=True)
+        self._listener.start()
+
+
+def init_notification_events(app):
+    """按 NOTIFICATION_PUBSUB_BACKEND 创建通知事件分发器"""
+    backend = app.config.get('NOTIFICATION_PUBSUB_BACKEND')
+    if not backend:
+        return
+
+    max_queue_size = app.config.get('NOTIFICATION_STREAM_QUEUE_SIZE', 100)
+    if backend == 'redis':
+        from src.utils.redis_client import get_redis
+        broker = RedisNotificationBroker(get_redis(app), max_queue_size)
+        broker.start_listener(app.logger)
+    elif backend == 'memory':
+        broker = NotificationBroker(max_queue_size)
+    else:
+        raise ValueError(f'未知的通知分发后端: {backend}')
+    app.extensions['notification_broker'] = broker
+
+
+def get_notification_broker():
+    """获取通知事件分发器，未启用时返回 None"""
+    return current_app.extensions.get('notification_broker')
+
+
+def publish_notification_event(user_id, event, data):
+    """向用户的所有 SSE 连接推送事件，推送失败只记录日志，不影响通知本身
+
+    data 可以是返回事件数据的函数，只在启用了分发器时调用，未启用时不构造事件数据。
+    """
+    broker = get_notification_broker()
+    if broker is None:
+        return
+    if callable(data):
+        data = data()
+    try:
+        broker.publish(user_id, event, data)
+    except Exception as e:
+        current_app.logger.error(f"推送通知事件失败(user={user_id}, event={event}): {e}")
+
+
+def format_sse(event, data):
+    """按 text/event-stream 格式编码一个事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
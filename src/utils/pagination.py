@@ -0,0 +1,160 @@
+import json
+import base64
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_, DateTime, Integer
+from sqlalchemy.engine import Row
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析或与当前排序不匹配"""
+
+
+def encode_cursor(values, direction='next'):
+    """将排序键的值编码为不透明的游标字符串"""
+    payload = {
+        'v': [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        'd': direction
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """解析游标，按排序列的类型还原各值，返回 (values, direction)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values, direction = payload['v'], payload['d']
+        if direction not in ('next', 'prev') or len(values) != len(columns):
+            raise ValueError('游标格式错误')
+
+        decoded = []
+        for column, value in zip(columns, values):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Integer):
+                value = int(value)
+            decoded.append(value)
+        return decoded, direction
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError) as e:
+        raise InvalidCursorError(f'无效的分页游标: {token}') from e
+
+
+def _cursor_values(item, columns):
+    # 多实体查询返回 Row 时，排序列取自第一个实体
+    entity = item[0] if isinstance(item, Row) else item
+    return [getattr(entity, column.key) for column in columns]
+
+
+class KeysetPage:
+    """一页游标分页结果"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def to_dict(self):
+        data = {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev
+        }
+        if self.total is not None:
+            data['total'] = self.total
+            data['pages'] = (self.total + self.per_page - 1) // self.per_page if self.per_page else 0
+        return data
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=False, include_total=False):
+    """按 columns（最后一列须唯一，通常为 id）做游标分页
+
+    通过 WHERE (col1, col2) > (:v1, :v2) 定位，而不是 OFFSET 跳过前面的行，
+    第N页与第一页的开销相同。总数需要额外的 COUNT 查询，只在 include_total 时计算。
+    """
+    total = query.order_by(None).count() if include_total else None
+
+    direction = 'next'
+    if cursor:
+        values, direction = decode_cursor(cursor, columns)
+        row = tuple_(*columns)
+        # 向前翻页时反向排序取出游标之前的行，再恢复原顺序
+        if (direction == 'next') != descending:
+            query = query.filter(row > tuple_(*values))
+        else:
+            query = query.filter(row < tuple_(*values))
+
+    reverse = direction == 'prev'
+    ordering = [c.desc() if descending != reverse else c.asc() for c in columns]
+    items = query.order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if reverse:
+        items.reverse()
+
+    has_next = has_more if not reverse else True
+    has_prev = bool(cursor) if not reverse else has_more
+    return KeysetPage(
+        items,
+        per_page,
+        next_cursor=encode_cursor(_cursor_values(items[-1], columns), 'next') if items and has_next else None,
+        prev_cursor=encode_cursor(_cursor_values(items[0], columns), 'prev') if items and has_prev else None,
+        total=total
+    )
+
+
+def paginate_from_request(query, columns, default_per_page=20, descending=False):
+    """按请求参数分页，返回 (items, pagination)
+
+    带 cursor 参数或未指定 page 时使用游标分页，include_total=true 时附带总数；
+    仍传 page 的客户端继续使用页码分页，同时返回相邻页的游标，便于之后改用游标翻页。
+    游标无效时抛出 InvalidCursorError。
+    """
+    per_page = max(request.args.get('per_page', default_per_page, type=int), 1)
+
+    if 'cursor' in request.args or 'page' not in request.args:
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        result = keyset_paginate(
+            query, columns, cursor=request.args.get('cursor'), per_page=per_page,
+            descending=descending, include_total=include_total
+        )
+        return result.items, result.to_dict()
+
+    page = request.args.get('page', 1, type=int)
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    pagination = query.order_by(*ordering).paginate(page=page, per_page=per_page, error_out=False)
+    items = pagination.items
+    return items, {
+        'page': pagination.page,
+        'per_page': pagination.per_page,
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'has_prev': pagination.has_prev,
+        'has_next': pagination.has_next,
+        'next_cursor': encode_cursor(_cursor_values(items[-1], columns), 'next') if items and pagination.has_next else None,
+        'prev_cursor': encode_cursor(_cursor_values(items[0], columns), 'prev') if items and pagination.has_prev else None
+    }
+
+
+def has_pagination_args():
+    """请求是否带有分页参数，用于默认返回全部结果的列表接口"""
+    return any(name in request.args for name in ('cursor', 'page', 'per_page'))
+
+
+def get_list_arg(name):
+    """读取逗号分隔的列表参数，如 ?status=draft,in_progress"""
+    return [value.strip() for value in request.args.get(name, '').split(',') if value.strip()]
@@ -0,0 +1,16 @@
+import threading
+from flask import current_app
+
+_client_lock = threading.Lock()
+
+
+def get_redis(app=None):
+    """获取进程内共享的 Redis 客户端，按 REDIS_URL 延迟创建"""
+    app = app or current_app
+    with _client_lock:
+        client = app.extensions.get('redis')
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(app.config['REDIS_URL'], decode_responses=True)
+            app.extensions['redis'] = client
+        return client
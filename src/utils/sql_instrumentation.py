@@ -0,0 +1,110 @@
+import re
+import time
+import logging
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+# 慢查询与 N+1 告警单独写入 LOG_FILE
+sql_logger = logging.getLogger('qa_platform.sql')
+
+# IN (?, ?, ?) 等参数列表的长度随数据变化，统计语句形状时折叠为 IN (?)
+_PARAM_LIST_RE = re.compile(r'\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)')
+_MAX_LOGGED_STATEMENT = 500
+
+
+def statement_shape(statement):
+    """去掉多余空白并折叠参数列表，参数不同但结构相同的语句得到相同的形状"""
+    return _PARAM_LIST_RE.sub('(?)', ' '.join(statement.split()))
+
+
+_SELECT_COLUMNS_RE = re.compile(r'^SELECT\s.*?\sFROM\s', re.IGNORECASE | re.DOTALL)
+
+
+def _summarize(statement):
+    """日志中省略 SELECT 的列清单，保留 FROM 之后的条件部分"""
+    return _truncate(_SELECT_COLUMNS_RE.sub('SELECT ... FROM ', ' '.join(statement.split()), count=1))
+
+
+def _truncate(value, limit=_MAX_LOGGED_STATEMENT):
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _configure_sql_logger(log_file, level):
+    """为 sql_logger 添加写入 LOG_FILE 的处理器，同一文件只添加一次"""
+    sql_logger.setLevel(level)
+    for handler in sql_logger.handlers:
+        if getattr(handler, 'baseFilename', None) == log_file:
+            return
+    handler = RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s %(name)s: %(message)s'))
+    sql_logger.addHandler(handler)
+
+
+def init_sql_instrumentation(app, db):
+    """在引擎上注册 before/after_cursor_execute 事件，按请求统计SQL
+
+    SERVER_TIMING_ENABLED 时每个请求结束时输出 Server-Timing 响应头（db 为语句总耗时与条数，
+    app 为请求总耗时），同一形状的语句执行次数达到 N_PLUS_ONE_THRESHOLD 时记录 N+1 告警，
+    单条语句超过 SLOW_QUERY_THRESHOLD 时写入慢查询日志。后台线程中的语句只记录慢查询。
+    流式响应在 after_request 之后才执行的查询不计入。
+    """
+    if not app.config.get('SQL_INSTRUMENTATION_ENABLED'):
+        return
+
+    _configure_sql_logger(app.config['LOG_FILE'], app.config.get('LOG_LEVEL', 'INFO'))
+    slow_threshold = app.config['SLOW_QUERY_THRESHOLD']
+    n_plus_one_threshold = app.config['N_PLUS_ONE_THRESHOLD']
+    server_timing = app.config.get('SERVER_TIMING_ENABLED', False)
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        in_request = has_request_context()
+        stats = g.get('sql_stats') if in_request else None
+        if stats is not None:
+            stats['count'] += 1
+            stats['duration'] += elapsed
+            stats['shapes'][statement_shape(statement)] += 1
+
+        if elapsed >= slow_threshold:
+            where = f"{request.method} {request.path}" if in_request else '后台任务'
+            sql_logger.warning(
+                f"慢查询 {elapsed * 1000:.1f}ms [{where}]: {_summarize(statement)} "
+                f"参数: {_truncate(parameters, 200)}"
+            )
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = {'count': 0, 'duration': 0.0, 'shapes': Counter(), 'started': time.perf_counter()}
+
+    @app.after_request
+    def finish_sql_stats(response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+
+        if server_timing:
+            total = time.perf_counter() - stats['started']
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats["duration"] * 1000:.1f};desc="{stats["count"]} queries", app;dur={total * 1000:.1f}'
+            )
+
+        for shape, count in stats['shapes'].most_common():
+            if count < n_plus_one_threshold:
+                break
+            sql_logger.warning(
+                f"疑似 N+1 查询 [{request.method} {request.path}]: 同一语句执行了 {count} 次"
+                f"（本次请求共 {stats['count']} 条语句）: {_summarize(shape)}"
+            )
+        return response
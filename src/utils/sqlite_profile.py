@@ -0,0 +1,49 @@
+from sqlalchemy import event, text
+
+# 先设置 busy_timeout，使切换 journal_mode 时遇到其他连接持锁能够等待而不是立即失败
+SQLITE_PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+def init_sqlite_profile(app, db):
+    """为 SQLite 引擎注册 connect 事件，在每个新连接上执行 SQLITE_PRAGMAS"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+
+def _pragma_order(name):
+    return SQLITE_PRAGMA_ORDER.index(name) if name in SQLITE_PRAGMA_ORDER else len(SQLITE_PRAGMA_ORDER)
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    """在 DBAPI 连接上执行 PRAGMA 设置"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in sorted(pragmas, key=_pragma_order):
+            cursor.execute(f"PRAGMA {name} = {pragmas[name]}")
+    finally:
+        cursor.close()
+
+
+# 以数字返回的 PRAGMA 值对应的名称
+_PRAGMA_VALUE_NAMES = {
+    'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+    'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'},
+}
+
+
+def get_sqlite_pragmas(connection, names=SQLITE_PRAGMA_ORDER):
+    """读取连接上当前生效的 PRAGMA 值"""
+    result = {}
+    for name in names:
+        value = connection.execute(text(f"PRAGMA {name}")).scalar()
+        result[name] = _PRAGMA_VALUE_NAMES.get(name, {}).get(value, value)
+    return result
@@ -0,0 +1,86 @@
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update, func, or_
+from src.models import db
+from src.models.qa_pair import QAPair
+from src.models.collaboration_task import CollaborationTaskAssignment
+from src.models.collaboration_task_draft import CollaborationTaskDraft
+
+
+class SubmitStats:
+    """一次分配提交的统计信息"""
+
+    def __init__(self, edited=0, deleted=0, modified=0, elapsed=0.0, task_completed=False):
+        self.edited = edited
+        self.deleted = deleted
+        self.modified = modified
+        self.elapsed = elapsed
+        self.task_completed = task_completed
+
+    def to_dict(self):
+        return {
+            'edited': self.edited,
+            'deleted': self.deleted,
+            'modified': self.modified,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'task_completed': self.task_completed
+        }
+
+
+def submit_assignment_drafts(assignment):
+    """将用户的草稿批量写回QA对并完成分配，全部操作在一个事务中提交
+
+    草稿通过 UPDATE qa_pairs ... FROM collaboration_task_drafts 一次性应用，
+    只处理分配范围内的QA对；出错时不提交，由调用方回滚。
+    """
+    started = time.perf_counter()
+    task = assignment.task
+    user_id = assignment.assigned_to
+    now = datetime.utcnow()
+
+    draft_conditions = (
+        CollaborationTaskDraft.task_id == assignment.task_id,
+        CollaborationTaskDraft.user_id == user_id,
+        CollaborationTaskDraft.qa_pair_id == QAPair.id,
+        QAPair.file_id == task.file_id,
+        QAPair.index_in_file >= assignment.start_index,
+        QAPair.index_in_file <= assignment.end_index
+    )
+    draft_prompt = func.coalesce(CollaborationTaskDraft.draft_prompt, QAPair.prompt)
+    draft_completion = func.coalesce(CollaborationTaskDraft.draft_completion, QAPair.completion)
+
+    stats = SubmitStats()
+    # 应用前统计内容确有变化的QA对
+    stats.modified = db.session.query(func.count(CollaborationTaskDraft.id)).filter(
+        *draft_conditions,
+        CollaborationTaskDraft.is_deleted == False,
+        or_(QAPair.prompt != draft_prompt, QAPair.completion != draft_completion)
+    ).scalar()
+
+    stats.edited = db.session.execute(
+        update(QAPair).where(*draft_conditions, CollaborationTaskDraft.is_deleted == False).values(
+            prompt=draft_prompt,
+            completion=draft_completion,
+            edited_by=user_id,
+            edited_at=now
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    stats.deleted = db.session.execute(
+        update(QAPair).where(*draft_conditions, CollaborationTaskDraft.is_deleted == True).values(
+            is_deleted=True,
+            edited_by=user_id,
+            edited_at=now
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    CollaborationTaskAssignment.adjust_pair_counters(assignment.task_id, assignment.id, modified=stats.modified)
+    stats.task_completed = assignment.submit(commit=False)
+    db.session.commit()
+
+    stats.elapsed = time.perf_counter() - started
+    current_app.logger.info(
+        f"任务 {assignment.task_id} 用户 {user_id} 提交完成: 编辑 {stats.edited} 条, "
+        f"删除 {stats.deleted} 条, 修改 {stats.modified} 条, 耗时 {stats.elapsed * 1000:.1f}ms"
+    )
+    return stats
@@ -0,0 +1,183 @@
+import threading
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import func
+from src.utils.background import start_periodic_job
+
+
+class MemoryUnreadCounter:
+    """进程内未读通知计数（LRU），只缓存最近访问的用户，不跨进程共享"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            count = self._data.get(user_id)
+            if count is not None:
+                self._data.move_to_end(user_id)
+            return count
+
+    def set_many(self, counts):
+        with self._lock:
+            for user_id, count in counts.items():
+                self._data[user_id] = count
+                self._data.move_to_end(user_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def incr(self, user_id, amount):
+        # 未缓存的用户不创建计数，下次读取时从数据库加载
+        with self._lock:
+            count = self._data.get(user_id)
+            if count is None:
+                return None
+            self._data[user_id] = max(count + amount, 0)
+            return self._data[user_id]
+
+    def users(self):
+        with self._lock:
+            return list(self._data)
+
+
+class RedisUnreadCounter:
+    """Redis 未读通知计数：每个用户一个带过期时间的整数键，多个Worker进程共享"""
+
+    # 键不存在时不创建，避免用不完整的增量覆盖数据库中的数量；计数不小于0
+    INCR_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then return false end
+    local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+    if count < 0 then
+        redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+        count = 0
+    end
+    return count
+    """
+
+    def __init__(self, client, ttl=24 * 60 * 60, prefix='qa:unread'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self._incr = client.register_script(self.INCR_SCRIPT)
+
+    def _key(self, user_id):
+        return f'{self.prefix}:{user_id}'
+
+    def get(self, user_id):
+        value = self.client.get(self._key(user_id))
+        return int(value) if value is not None else None
+
+    def set_many(self, counts):
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, count in counts.items():
+            pipe.set(self._key(user_id), count, ex=self.ttl)
+        pipe.execute()
+
+    def incr(self, user_id, amount):
+        count = self._incr(keys=[self._key(user_id)], args=[amount])
+        return int(count) if count is not None else None
+
+    def users(self):
+        return [int(key.rsplit(':', 1)[1]) for key in self.client.scan_iter(match=f'{self.prefix}:*', count=1000)]
+
+
+def init_unread_counter(app):
+    """按 UNREAD_COUNTER_BACKEND 创建未读通知计数，并启动定期与数据库对账"""
+    backend = app.config.get('UNREAD_COUNTER_BACKEND')
+    if not backend:
+        return
+
+    if backend == 'redis':
+        from src.utils.redis_client import get_redis
+        counter = RedisUnreadCounter(get_redis(app), ttl=app.config.get('UNREAD_COUNTER_TTL', 24 * 60 * 60))
+    elif backend == 'memory':
+        counter = MemoryUnreadCounter(app.config.get('UNREAD_COUNTER_MAX_SIZE', 10000))
+    else:
+        raise ValueError(f'未知的未读通知计数后端: {backend}')
+    app.extensions['unread_counter'] = counter
+
+    interval = app.config.get('UNREAD_COUNTER_RECONCILE_INTERVAL', 300)
+    if interval:
+        start_periodic_job(app, 'unread-counter-reconcile', reconcile_unread_counts, interval)
+
+
+def get_unread_counter():
+    """获取未读通知计数，未启用时返回 None"""
+    return current_app.extensions.get('unread_counter')
+
+
+def count_unread(user_ids):
+    """以一条分组 COUNT 查询统计多个用户的未读通知数量，返回 {user_id: count}"""
+    from src.models import db
+    from src.models.notification import Notification
+
+    counts = dict.fromkeys(user_ids, 0)
+    if not counts:
+        return counts
+    rows = db.session.query(Notification.user_id, func.count(Notification.id)).filter(
+        Notification.user_id.in_(counts),
+        Notification.is_read == False
+    ).group_by(Notification.user_id).all()
+    counts.update(rows)
+    return counts
+
+
+def get_cached_unread_count(user_id):
+    """读取用户的未读通知数量，优先读取计数；未缓存或计数不可用时查询数据库"""
+    counter = get_unread_counter()
+    if counter is None:
+        return count_unread([user_id])[user_id]
+
+    try:
+        count = counter.get(user_id)
+        if count is not None:
+            return count
+    except Exception as e:
+        current_app.logger.error(f"读取未读通知计数失败(user={user_id}): {e}")
+        return count_unread([user_id])[user_id]
+
+    count = count_unread([user_id])[user_id]
+    try:
+        counter.set_many({user_id: count})
+    except Exception as e:
+        current_app.logger.error(f"写入未读通知计数失败(user={user_id}): {e}")
+    return count
+
+
+def adjust_unread_count(user_id, amount):
+    """在数据库提交后调整用户的未读通知计数，失败只记录日志，由定期对账修正"""
+    counter = get_unread_counter()
+    if counter is None or not amount:
+        return
+    try:
+        counter.incr(user_id, amount)
+    except Exception as e:
+        current_app.logger.error(f"更新未读通知计数失败(user={user_id}): {e}")
+
+
+def reset_unread_count(user_id):
+    """将用户的未读通知计数置为0（全部标记已读后调用）"""
+    counter = get_unread_counter()
+    if counter is None:
+        return
+    try:
+        counter.set_many({user_id: 0})
+    except Exception as e:
+        current_app.logger.error(f"重置未读通知计数失败(user={user_id}): {e}")
+
+
+def reconcile_unread_counts(batch_size=500):
+    """按数据库重新统计已缓存用户的未读数量，修正计数的漂移，返回对账的用户数
+
+    统计与写回之间新产生的通知可能被覆盖，误差会在下一次对账时修正。
+    """
+    counter = get_unread_counter()
+    if counter is None:
+        return 0
+
+    user_ids = counter.users()
+    for start in range(0, len(user_ids), batch_size):
+        counter.set_many(count_unread(user_ids[start:start + batch_size]))
+    return len(user_ids)
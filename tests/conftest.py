@@ -0,0 +1,84 @@
+import io
+import os
+import json
+import pytest
+
+# src.main 在导入时按 FLASK_ENV 创建应用，测试中不使用开发配置（数据库与定期清理线程）
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+from src.config import Config, TestingConfig
+from src.main import create_app
+from src.models import db as _db
+from src.models.user import User
+from src.utils.auth import generate_token
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(Config, 'EXPORT_FOLDER', str(tmp_path / 'exports'))
+    monkeypatch.setattr(Config, 'LOG_FILE', str(tmp_path / 'logs' / 'app.log'))
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(TestingConfig, 'INGEST_ASYNC_ENABLED', False)
+
+    app = create_app('testing')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.engine.dispose()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def users(app):
+    return {
+        'admin': User.create_user('admin', 'pw', 'Admin', role='super_admin'),
+        'u1': User.create_user('u1', 'pw', 'U1', role='user'),
+        'u2': User.create_user('u2', 'pw', 'U2', role='user'),
+        'u3': User.create_user('u3', 'pw', 'U3', role='user'),
+    }
+
+
+def auth_headers(user):
+    return {'Authorization': 'Bearer ' + generate_token(user.id, user.role)}
+
+
+@pytest.fixture
+def create_task(client, users):
+    """上传 n 个QA对创建协作任务，返回任务ID"""
+    def create(n=10, title='task'):
+        content = ''.join(json.dumps({'prompt': f'p{i}', 'completion': f'c{i}'}) + '\n' for i in range(n))
+        response = client.post(
+            '/api/v1/collaboration-tasks',
+            data={'title': title, 'file': (io.BytesIO(content.encode()), 'data.jsonl')},
+            headers=auth_headers(users['admin']),
+            content_type='multipart/form-data'
+        )
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['data']['id']
+    return create
+
+
+@pytest.fixture
+def assign_manual(client, users):
+    """按 [(user, start_index, end_index), ...] 自定义分配任务"""
+    def assign(task_id, ranges):
+        response = client.post(
+            f'/api/v1/collaboration-tasks/{task_id}/assign',
+            json={'strategy': 'manual', 'manual_assignments': [
+                {'user_id': user.id, 'start_index': start, 'end_index': end} for user, start, end in ranges
+            ]},
+            headers=auth_headers(users['admin'])
+        )
+        assert response.status_code == 200, response.get_json()
+    return assign
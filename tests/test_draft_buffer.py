@@ -0,0 +1,46 @@
+import threading
+from src.models.collaboration_task import CollaborationTask
+from src.models.collaboration_task_draft import CollaborationTaskDraft
+from src.models.qa_pair import QAPair
+from src.utils.draft_buffer import buffer_drafts, flush_drafts
+from tests.conftest import auth_headers
+
+
+def test_submit_waits_for_drafts_popped_by_a_background_flush(app, db, client, users, create_task, assign_manual, monkeypatch):
+    u1 = users['u1']
+    task_id = create_task(2)
+    assign_manual(task_id, [(u1, 0, 1)])
+    task = db.session.get(CollaborationTask, task_id)
+    pair_id = QAPair.query.filter_by(file_id=task.file_id, index_in_file=0).one().id
+    buffer_drafts(task_id, u1.id, [{'qa_pair_id': pair_id, 'prompt': 'late', 'completion': 'late'}])
+    db.session.commit()
+
+    # 后台刷写取出草稿后、写入数据库前暂停
+    popped, release = threading.Event(), threading.Event()
+    upsert_drafts = CollaborationTaskDraft.upsert_drafts.__func__
+
+    def paused_upsert(cls, *args, **kwargs):
+        popped.set()
+        release.wait(5)
+        return upsert_drafts(cls, *args, **kwargs)
+
+    monkeypatch.setattr(CollaborationTaskDraft, 'upsert_drafts', classmethod(paused_upsert))
+
+    def background_flush():
+        with app.app_context():
+            flush_drafts(task_id, u1.id)
+            db.session.remove()
+
+    flusher = threading.Thread(target=background_flush)
+    flusher.start()
+    assert popped.wait(5)
+
+    threading.Timer(0.2, release.set).start()
+    response = client.post(f'/api/v1/collaboration-tasks/{task_id}/submit', headers=auth_headers(u1))
+    flusher.join(5)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['data']['edited'] == 1
+    db.session.expire_all()
+    pair = db.session.get(QAPair, pair_id)
+    assert (pair.prompt, pair.completion) == ('late', 'late')
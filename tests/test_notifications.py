@@ -0,0 +1,38 @@
+from src.models.notification import Notification
+
+
+def _count_unread_calls(monkeypatch):
+    calls = []
+    get_unread_count = Notification.get_unread_count.__func__
+
+    def counting(cls, user_id):
+        calls.append(user_id)
+        return get_unread_count(cls, user_id)
+
+    monkeypatch.setattr(Notification, 'get_unread_count', classmethod(counting))
+    return calls
+
+
+def test_notifications_skip_event_payload_without_broker(app, users, monkeypatch):
+    u1 = users['u1']
+    app.extensions.pop('notification_broker', None)
+    calls = _count_unread_calls(monkeypatch)
+
+    notification = Notification.create_notification(u1.id, 'title', 'content')
+    notification.mark_as_read()
+
+    assert calls == []
+
+
+def test_notifications_publish_unread_count_to_broker(app, users, monkeypatch):
+    u1 = users['u1']
+    published = []
+    broker = app.extensions['notification_broker']
+    monkeypatch.setattr(broker, 'publish', lambda user_id, event, data: published.append((user_id, event, data)))
+
+    Notification.create_notification(u1.id, 'title', 'content')
+
+    assert len(published) == 1
+    user_id, event, data = published[0]
+    assert (user_id, event, data['unread_count']) == (u1.id, 'notification', 1)
+    assert data['notification']['title'] == 'title'
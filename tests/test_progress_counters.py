@@ -0,0 +1,90 @@
+from src.models.collaboration_task import CollaborationTask, CollaborationTaskAssignment
+from src.models.collaboration_task_draft import CollaborationTaskDraft
+from src.models.qa_pair import QAPair
+from tests.conftest import auth_headers
+
+
+def _pair_ids(db, task_id):
+    task = db.session.get(CollaborationTask, task_id)
+    return [q.id for q in QAPair.query.filter_by(file_id=task.file_id).order_by(QAPair.index_in_file)]
+
+
+def _counters(db, task_id, user):
+    db.session.expire_all()
+    task = db.session.get(CollaborationTask, task_id)
+    assignments = CollaborationTaskAssignment.query.filter_by(
+        task_id=task_id, assigned_to=user.id
+    ).order_by(CollaborationTaskAssignment.start_index).all()
+    return task, [(a.drafted_pair_count, a.deleted_pair_count) for a in assignments]
+
+
+def _assert_task_matches_assignments(task):
+    assert task.drafted_pair_count == sum(a.drafted_pair_count for a in task.assignments)
+    assert task.deleted_pair_count == sum(a.deleted_pair_count for a in task.assignments)
+
+
+def test_drafts_count_only_on_the_assignment_owning_the_pair(db, client, users, create_task, assign_manual):
+    u1, u2 = users['u1'], users['u2']
+    task_id = create_task(6)
+    assign_manual(task_id, [(u1, 0, 1), (u2, 2, 3), (u1, 4, 5)])
+    pairs = _pair_ids(db, task_id)
+
+    response = client.post(
+        f'/api/v1/collaboration-tasks/{task_id}/draft',
+        json={'qa_pair_id': pairs[0], 'prompt': 'edited'},
+        headers=auth_headers(u1)
+    )
+    assert response.status_code == 200
+    CollaborationTaskDraft.save_draft(task_id, u1.id, pairs[4], prompt='edited')
+    CollaborationTaskDraft.save_draft(task_id, u1.id, pairs[5], is_deleted=True)
+
+    task, counters = _counters(db, task_id, u1)
+    assert counters == [(1, 0), (1, 1)]
+    assert (task.drafted_pair_count, task.deleted_pair_count) == (2, 1)
+    _assert_task_matches_assignments(task)
+
+    CollaborationTaskDraft.clear_draft(task_id, u1.id, pairs[5])
+    task, counters = _counters(db, task_id, u1)
+    assert counters == [(1, 0), (1, 0)]
+    _assert_task_matches_assignments(task)
+
+
+def test_batch_recount_splits_drafts_across_assignments(db, users, create_task, assign_manual):
+    u1, u2 = users['u1'], users['u2']
+    task_id = create_task(6)
+    assign_manual(task_id, [(u1, 0, 1), (u2, 2, 3), (u1, 4, 5)])
+    pairs = _pair_ids(db, task_id)
+
+    CollaborationTaskDraft.upsert_drafts(task_id, u1.id, [
+        {'qa_pair_id': pairs[0], 'prompt': 'a'},
+        {'qa_pair_id': pairs[1], 'prompt': 'b'},
+        {'qa_pair_id': pairs[4], 'is_deleted': True},
+    ])
+
+    task, counters = _counters(db, task_id, u1)
+    assert counters == [(2, 0), (0, 1)]
+    assert (task.drafted_pair_count, task.deleted_pair_count) == (2, 1)
+    _assert_task_matches_assignments(task)
+
+    CollaborationTaskDraft.clear_user_drafts(task_id, u1.id)
+    task, counters = _counters(db, task_id, u1)
+    assert counters == [(0, 0), (0, 0)]
+    _assert_task_matches_assignments(task)
+
+
+def test_drafts_without_an_assignment_leave_counters_unchanged(db, client, users, create_task, assign_manual):
+    u1, u3 = users['u1'], users['u3']
+    task_id = create_task(4)
+    assign_manual(task_id, [(u1, 0, 3)])
+    pairs = _pair_ids(db, task_id)
+
+    response = client.post(
+        f'/api/v1/collaboration-tasks/{task_id}/draft',
+        json={'qa_pair_id': pairs[0], 'prompt': 'edited'},
+        headers=auth_headers(u3)
+    )
+    assert response.status_code == 200
+
+    task, _ = _counters(db, task_id, u1)
+    assert task.drafted_pair_count == 0
+    _assert_task_matches_assignments(task)